@@ -0,0 +1,39 @@
+"""Compare the compiled payload encoder with build_payload + encode_payload.
+
+Run with ``uv run python benchmarks/bench_payload.py``.
+"""
+
+import timeit
+
+from umd_client.sensors.sensor_hat import CORE_FIELDS
+from umd_client.transport import PayloadEncoder, build_payload, encode_payload
+
+STATION = "example-station"
+KEY = "replace-with-your-key"
+VALUES = [1_700_000_000, 22.53, 61.2, 1013.25, 1200.51, 4, 5.0990195135927845]
+
+
+def legacy(indent: int | None) -> bytes:
+    payload = build_payload(STATION, KEY, CORE_FIELDS, VALUES, timestamp=1_700_000_000)
+    return encode_payload(payload, indent=indent)
+
+
+def main(number: int = 100_000) -> None:
+    encoder = PayloadEncoder(STATION, KEY, CORE_FIELDS)
+    assert encoder.encode(VALUES, timestamp=1_700_000_000) == legacy(indent=None)
+
+    cases = {
+        "build_payload + encode_payload (indent=4)": lambda: legacy(indent=4),
+        "build_payload + encode_payload (compact)": lambda: legacy(indent=None),
+        "PayloadEncoder.encode": lambda: encoder.encode(VALUES, timestamp=1_700_000_000),
+    }
+    baseline = None
+    for name, func in cases.items():
+        seconds = min(timeit.repeat(func, number=number, repeat=5))
+        per_call = seconds / number * 1e6
+        baseline = per_call if baseline is None else baseline
+        print(f"{name:45s} {per_call:7.2f} us/payload  {baseline / per_call:5.1f}x  {len(func())} bytes")
+
+
+if __name__ == "__main__":
+    main()
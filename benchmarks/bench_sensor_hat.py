@@ -0,0 +1,76 @@
+"""Profile the Sensor HAT drivers against the simulated chips.
+
+Reports the wall time of a full read and the I2C traffic per device, then
+compares sampling the ICM20948 register by register with draining its FIFO,
+so driver changes can be compared without a Raspberry Pi. Run with
+``uv run python benchmarks/bench_sensor_hat.py``.
+"""
+
+import statistics
+import time
+
+from umd_client.sensors.i2c import I2CBus
+from umd_client.sensors.sensor_hat import Sensor_HAT
+from umd_client.sensors.sensor_hat.ICM20948 import ICM20948
+from umd_client.simulator import SimulatedSMBus
+
+
+class SteppedClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def bench_read(reads: int = 10) -> None:
+    bus = I2CBus(SimulatedSMBus())
+    sensor = Sensor_HAT(bus=bus)
+    bus.devices.clear()  # count reads only, not initialization
+
+    latencies = []
+    for _ in range(reads):
+        sensor.read()
+        latencies.append(sensor.latency)
+    print(f"read latency: median {statistics.median(latencies) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms")
+    for address, stats in bus.stats().items():
+        print(
+            f"{address}: {stats['transactions'] / reads:6.1f} transactions/read"
+            f"  {stats['read_bytes'] / reads:6.1f} bytes read  {stats['written_bytes'] / reads:6.1f} bytes written"
+        )
+
+
+def bench_imu(rate: float = 100.0, seconds: int = 10) -> None:
+    for fifo in (False, True):
+        clock = SteppedClock()
+        bus = I2CBus(SimulatedSMBus(clock=clock))
+        icm = ICM20948(bus=bus)
+        rate = icm.SetSampleRate(rate)
+        if fifo:
+            icm.StartFIFO()
+        bus.devices.clear()
+
+        samples = 0
+        started = time.process_time()
+        if fifo:
+            interval = icm.fifo_capacity / rate / 2
+            for _ in range(int(seconds / interval)):
+                clock.now += interval
+                samples += len(icm.getfifo())
+        else:
+            for _ in range(int(seconds * rate)):
+                clock.now += 1 / rate
+                icm.getdata(halfT=0.5 / rate)
+                samples += 1
+        cpu = time.process_time() - started
+        stats = bus.stats()["0x68"]
+        print(
+            f"IMU {'FIFO' if fifo else 'polled'} at {rate:.1f} Hz: {stats['transactions'] / seconds:6.1f} transactions/s"
+            f"  {(stats['read_bytes'] + stats['written_bytes']) / samples:5.1f} bus bytes/sample"
+            f"  {cpu / samples * 1e6:6.1f} us CPU/sample"
+        )
+
+
+if __name__ == "__main__":
+    bench_read()
+    bench_imu()
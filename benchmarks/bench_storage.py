@@ -0,0 +1,61 @@
+"""Compare the history store with the old per-row connect/insert/commit pattern.
+
+Run with ``uv run python benchmarks/bench_storage.py``.
+"""
+
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from umd_client.sensors.sensor_hat import CORE_FIELDS
+from umd_client.sensors.types import Reading
+from umd_client.storage.sqlite import Database
+
+VALUES = [22.53, 61.2, 1013.25, 1200.51, 4, 5.0990195135927845]
+
+
+def readings(count: int) -> list[Reading]:
+    return [Reading(timestamp=t, data=dict(zip(CORE_FIELDS, [t, *VALUES], strict=True))) for t in range(count)]
+
+
+def legacy(path: Path, rows: list[Reading]) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE RECORD (TIME INT PRIMARY KEY NOT NULL, " + ", ".join(f"{n} FLOAT" for n in CORE_FIELDS[1:]) + ")"
+    )
+    conn.commit()
+    conn.close()
+    for reading in rows:
+        conn = sqlite3.connect(path)
+        values = ",".join(str(value) for value in reading.values[1:])
+        conn.execute(f"INSERT INTO RECORD VALUES ({reading.timestamp},{values})")
+        conn.commit()
+        conn.close()
+
+
+def grouped(path: Path, rows: list[Reading], flush_interval: float) -> None:
+    database = Database(path, flush_interval=flush_interval)
+    database.insert_many(rows)
+    database.close()
+
+
+def main(count: int = 2000) -> None:
+    rows = readings(count)
+    cases = {
+        "per-row connect + commit (legacy)": lambda path: legacy(path, rows),
+        "Database, commit every row": lambda path: grouped(path, rows, flush_interval=0),
+        "Database, group commit": lambda path: grouped(path, rows, flush_interval=60),
+    }
+    baseline = None
+    for name, func in cases.items():
+        with tempfile.TemporaryDirectory() as directory:
+            started = time.perf_counter()
+            func(Path(directory) / "bench.sqlite3")
+            rate = count / (time.perf_counter() - started)
+        baseline = rate if baseline is None else baseline
+        print(f"{name:40s} {rate:10.0f} rows/s  {rate / baseline:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,16 @@ from pathlib import Path
 
 from umd_client.config import ClientConfig, load_config
 from umd_client.init_config import init
-from umd_client.scheduler import ScheduledTask, due_tasks
+from umd_client.sampler import Sampler
+from umd_client.scheduler import ScheduledTask, Scheduler, due_tasks
 from umd_client.sensors.factory import Sensor, create_sensor
 from umd_client.sensors.types import Reading
-from umd_client.transport import build_payload, send_payload
+from umd_client.simulator import SimulatedPanel
+from umd_client.storage.binlog import BinLog
+from umd_client.storage.compactor import Compactor
+from umd_client.storage.quota import QuotaManager
+from umd_client.storage.sqlite import HISTORY_FILENAME, Database
+from umd_client.uplink import Uplink, build_uplink
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,32 +24,102 @@ logger = logging.getLogger("umd_client")
 
 
 def run(config_path: str | Path = ".env.toml") -> None:
+    config = prepare_config(config_path)
+    sensor = build_sensor(config)
+    scheduler = Scheduler(build_tasks(config))
+    uplink = build_uplink(config)
+    history = build_history(config)
+    quota = build_quota(config)
+    compactor = build_compactor(config, quota=quota)
+    panel = build_panel(config)
+    latest_reading = None
+    logger.info("Starting scheduler with %s second collection interval", config.record_frequency)
+
+    uplink.start()
+    if history is not None:
+        history.start()
+    if compactor is not None:
+        compactor.start()
+    if quota is not None:
+        quota.start()
+    try:
+        while True:
+            for task in scheduler.wait():
+                latest_reading = run_task(
+                    config, sensor, task, latest_reading, uplink=uplink, history=history, quota=quota, panel=panel
+                )
+    except KeyboardInterrupt:
+        logger.info("Scheduler stopped by user")
+    finally:
+        uplink.close()
+        if compactor is not None:
+            compactor.stop(timeout=10)
+        if quota is not None:
+            quota.stop(timeout=10)
+        if history is not None:
+            history.close()
+        close = getattr(sensor, "close", None)
+        if close is not None:
+            close()
+
+
+def prepare_config(config_path: str | Path = ".env.toml") -> ClientConfig:
     config_path = Path(config_path)
     if not config_path.exists():
         logger.info("Initializing")
         init(config_path)
+    return load_config(config_path)
 
-    config = load_config(config_path)
 
+def build_sensor(config: ClientConfig) -> Sensor:
     sensor = create_sensor(config)
-    tasks = build_tasks(config)
-    latest_reading = None
-    logger.info("Starting scheduler with %s second collection interval", config.record_frequency)
+    if config.sample_frequency is None:
+        return sensor
+    window = -(-config.record_frequency // config.sample_frequency)
+    binlog = BinLog(config.data_path / "binlog") if config.binlog_enabled else None
+    return Sampler(sensor, max_samples=4 * window, binlog=binlog)
 
-    try:
-        while True:
-            latest_reading = run_due_tasks(config, sensor, tasks, latest_reading)
-            time.sleep(1)
-    except KeyboardInterrupt:
-        logger.info("Scheduler stopped by user")
+
+def build_history(config: ClientConfig) -> Database | None:
+    if not config.history_enabled:
+        return None
+    return Database(
+        config.data_path / HISTORY_FILENAME,
+        flush_interval=config.history_flush_interval,
+        max_rows=config.storage_size,
+        max_age=config.history_max_age,
+    )
+
+
+def build_compactor(config: ClientConfig, quota: QuotaManager | None = None) -> Compactor | None:
+    if config.archive_compression == "off":
+        return None
+    return Compactor(config.data_path, codec=config.archive_compression, quota=quota)
+
+
+def build_quota(config: ClientConfig) -> QuotaManager | None:
+    if not config.quota:
+        return None
+    config.data_path.mkdir(parents=True, exist_ok=True)
+    return QuotaManager(config.data_path, config.quota)
+
+
+def build_panel(config: ClientConfig) -> SimulatedPanel | None:
+    """The e-Paper panel to drive, or None to let the driver detect the board."""
+    if config.hardware == "simulated":
+        return SimulatedPanel()
+    return None
 
 
 def build_tasks(config: ClientConfig) -> list[ScheduledTask]:
-    tasks = [ScheduledTask("upload", config.record_frequency)]
+    tasks = []
+    if config.sample_frequency is not None:
+        tasks.append(ScheduledTask("sample", config.sample_frequency))
+    tasks.append(ScheduledTask("upload", config.record_frequency, catch_up=config.upload_catch_up))
     if config.display_enabled:
-        tasks.append(ScheduledTask("display", config.display_frequency))
+        tasks.append(ScheduledTask("display", config.display_frequency, catch_up=config.display_catch_up))
     if config.camera_enabled:
-        tasks.append(ScheduledTask("camera", config.camera_frequency))
+        tasks.append(ScheduledTask("camera", config.camera_frequency, catch_up=config.camera_catch_up))
     return tasks
 
 
@@ -53,52 +129,102 @@ def run_due_tasks(
     tasks: list[ScheduledTask],
     latest_reading: Reading | None = None,
     now: int | None = None,
+    uplink: Uplink | None = None,
+    history: Database | None = None,
+    quota: QuotaManager | None = None,
+    panel: SimulatedPanel | None = None,
 ) -> Reading | None:
     now = int(time.time()) if now is None else now
     for task in due_tasks(tasks, now):
-        if task.name == "upload":
-            latest_reading = collect_and_upload(config, sensor)
-        elif task.name == "display" and latest_reading is not None:
-            refresh_display(latest_reading, config)
-        elif task.name == "camera":
-            capture_camera(config)
-        task.mark_run(now)
+        latest_reading = run_task(
+            config, sensor, task, latest_reading, now, uplink=uplink, history=history, quota=quota, panel=panel
+        )
+    return latest_reading
+
+
+def run_task(
+    config: ClientConfig,
+    sensor: Sensor,
+    task: ScheduledTask,
+    latest_reading: Reading | None = None,
+    now: int | None = None,
+    uplink: Uplink | None = None,
+    history: Database | None = None,
+    quota: QuotaManager | None = None,
+    panel: SimulatedPanel | None = None,
+) -> Reading | None:
+    now = int(time.time()) if now is None else now
+    if task.name == "sample":
+        sample(sensor)
+    elif task.name == "upload":
+        latest_reading = collect_and_upload(config, sensor, uplink=uplink, history=history)
+    elif task.name == "display" and latest_reading is not None:
+        refresh_display(latest_reading, config, panel=panel)
+    elif task.name == "camera":
+        capture_camera(config, quota=quota)
+    task.mark_run(now)
     return latest_reading
 
 
-def collect_and_upload(config: ClientConfig, sensor: Sensor) -> Reading | None:
+def collect_and_upload(
+    config: ClientConfig,
+    sensor: Sensor,
+    uplink: Uplink | None = None,
+    history: Database | None = None,
+) -> Reading | None:
+    uplink = Uplink(config) if uplink is None else uplink
     try:
         reading = sensor.read()
-        payload = build_payload(
-            station_name=config.station_name,
-            station_key=config.station_key,
-            value_names=reading.value_names,
-            values=reading.values,
-        )
-        send_payload(server=config.server, payload=payload)
+        record_reading(history, reading)
+        publish_reading(uplink, reading)
         return reading
     except Exception:
         logger.exception("Error occurred while collecting or sending data")
         return None
 
 
+def publish_reading(uplink: Uplink, reading: Reading) -> bool:
+    try:
+        return uplink.publish(reading)
+    except Exception:
+        logger.exception("Error occurred while sending data")
+        return False
+
+
+def record_reading(history: Database | None, reading: Reading) -> None:
+    if history is None:
+        return
+    try:
+        history.insert(reading)
+    except Exception:
+        logger.exception("Error occurred while storing reading")
+
+
+def sample(sensor: Sampler) -> Reading | None:
+    try:
+        return sensor.sample()
+    except Exception:
+        logger.exception("Error occurred while sampling sensor")
+        return None
+
+
 def run_once(config: ClientConfig, sensor: Sensor) -> bool:
     return collect_and_upload(config, sensor) is not None
 
 
-def refresh_display(reading: Reading, config: ClientConfig) -> None:
+def refresh_display(reading: Reading, config: ClientConfig, panel: SimulatedPanel | None = None) -> None:
     try:
         from umd_client.display.epd2in13b_v4 import display_reading
 
-        display_reading(reading, location=config.location)
+        display_reading(reading, location=config.location, panel=panel)
     except Exception:
         logger.exception("Error occurred while refreshing display")
 
 
-def capture_camera(config: ClientConfig) -> None:
+def capture_camera(config: ClientConfig, quota: QuotaManager | None = None) -> None:
     try:
         from umd_client.camera.ov5647 import capture_photo
 
-        capture_photo(config.data_path, location=config.location)
+        capture_photo(config.data_path, location=config.location, quota=quota)
     except Exception:
         logger.exception("Error occurred while capturing photo")
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from umd_client.app import (
+    build_compactor,
+    build_history,
+    build_panel,
+    build_quota,
+    build_sensor,
+    build_tasks,
+    capture_camera,
+    prepare_config,
+    publish_reading,
+    record_reading,
+    refresh_display,
+    sample,
+)
+from umd_client.config import ClientConfig
+from umd_client.scheduler import ScheduledTask, Scheduler
+from umd_client.sensors.factory import Sensor
+from umd_client.sensors.types import Reading
+from umd_client.simulator import SimulatedPanel
+from umd_client.storage.quota import QuotaManager
+from umd_client.storage.sqlite import Database
+from umd_client.uplink import Uplink, build_uplink
+
+logger = logging.getLogger("umd_client")
+
+
+class TaskRunner:
+    """Run blocking calls for one task on its own executor with a per-call timeout.
+
+    A timed-out call keeps running in its worker thread (threads cannot be
+    cancelled), so with ``skip_if_busy`` the next call is skipped instead of
+    queueing behind it. The timeout starts when the call does, so a call
+    waiting behind a slow one is not given up before it has run.
+    """
+
+    def __init__(self, name: str, timeout: float, skip_if_busy: bool = True) -> None:
+        self.name = name
+        self.timeout = timeout
+        self.skip_if_busy = skip_if_busy
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"umd-{name}")
+        self._future: Future | None = None
+
+    @property
+    def busy(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.skip_if_busy and self.busy:
+            logger.warning("Skipping %s: previous run has not finished", self.name)
+            return None
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+
+        def call() -> Any:
+            loop.call_soon_threadsafe(started.set)
+            return func(*args)
+
+        self._future = self.executor.submit(call)
+        result = asyncio.wrap_future(self._future)
+        waiter = asyncio.ensure_future(started.wait())
+        try:
+            await asyncio.wait({result, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            return await asyncio.wait_for(result, self.timeout)
+        except TimeoutError:
+            logger.warning("%s did not finish within %s seconds", self.name, self.timeout)
+        except Exception:
+            logger.exception("Error occurred while running %s", self.name)
+        finally:
+            waiter.cancel()
+        return None
+
+    def shutdown(self, timeout: float = 0.0) -> None:
+        """Stop accepting calls; with a ``timeout``, give queued and running calls that long to finish first."""
+        self.executor.shutdown(wait=False, cancel_futures=not timeout)
+        if timeout and self._future is not None:
+            # One worker runs calls in order, so the last one finishing means the queue is empty.
+            if wait_futures([self._future], timeout).not_done:
+                logger.warning("%s still had calls queued after %s seconds", self.name, timeout)
+
+
+@dataclass
+class RuntimeState:
+    latest_reading: Reading | None = None
+    background: set[asyncio.Task] = field(default_factory=set)
+
+    def spawn(self, coroutine: Awaitable[Any]) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+
+
+def run(config_path: str | Path = ".env.toml") -> None:
+    config = prepare_config(config_path)
+    sensor = build_sensor(config)
+    uplink = build_uplink(config)
+    history = build_history(config)
+    quota = build_quota(config)
+    compactor = build_compactor(config, quota=quota)
+    logger.info("Starting asyncio runtime with %s second collection interval", config.record_frequency)
+
+    uplink.start()
+    if history is not None:
+        history.start()
+    if compactor is not None:
+        compactor.start()
+    if quota is not None:
+        quota.start()
+    try:
+        asyncio.run(serve(config, sensor, uplink=uplink, history=history, quota=quota, panel=build_panel(config)))
+    except KeyboardInterrupt:
+        logger.info("Scheduler stopped by user")
+    finally:
+        uplink.close()
+        if compactor is not None:
+            compactor.stop(timeout=10)
+        if quota is not None:
+            quota.stop(timeout=10)
+        if history is not None:
+            history.close()
+        close = getattr(sensor, "close", None)
+        if close is not None:
+            close()
+
+
+async def serve(
+    config: ClientConfig,
+    sensor: Sensor,
+    tasks: list[ScheduledTask] | None = None,
+    state: RuntimeState | None = None,
+    uplink: Uplink | None = None,
+    history: Database | None = None,
+    quota: QuotaManager | None = None,
+    panel: SimulatedPanel | None = None,
+) -> None:
+    tasks = build_tasks(config) if tasks is None else tasks
+    state = RuntimeState() if state is None else state
+    uplink = Uplink(config) if uplink is None else uplink
+    runners = {
+        "sample": TaskRunner("sample", config.sample_frequency or config.upload_timeout),
+        "sensor": TaskRunner("sensor", config.upload_timeout),
+        "upload": TaskRunner("upload", config.upload_timeout, skip_if_busy=False),
+        "history": TaskRunner("history", config.upload_timeout, skip_if_busy=False),
+        "display": TaskRunner("display", config.display_timeout),
+        "camera": TaskRunner("camera", config.camera_timeout),
+    }
+
+    async def sample_sensor() -> None:
+        await runners["sample"].run(sample, sensor)
+
+    async def upload() -> None:
+        reading = await runners["sensor"].run(sensor.read)
+        # A failed read keeps the last good reading for the display.
+        if reading is not None:
+            state.latest_reading = reading
+            if history is not None:
+                state.spawn(runners["history"].run(record_reading, history, reading))
+            # Sending happens off the sampling path so a slow server never delays the next reading.
+            state.spawn(runners["upload"].run(publish_reading, uplink, reading))
+
+    async def display() -> None:
+        if state.latest_reading is not None:
+            await runners["display"].run(refresh_display, state.latest_reading, config, panel)
+
+    async def camera() -> None:
+        await runners["camera"].run(capture_camera, config, quota)
+
+    jobs = {"sample": sample_sensor, "upload": upload, "display": display, "camera": camera}
+    try:
+        await asyncio.gather(*(run_periodic(task, jobs[task.name]) for task in tasks))
+    finally:
+        # Finish queued uploads and history writes before run() closes the uplink and the database.
+        for name in ("upload", "history"):
+            runners[name].shutdown(timeout=config.upload_timeout)
+        for task in state.background:
+            task.cancel()
+        for runner in runners.values():
+            runner.shutdown()
+
+
+async def run_periodic(
+    task: ScheduledTask,
+    job: Callable[[], Awaitable[None]],
+    clock: Callable[[], float] = time.monotonic,
+) -> None:
+    scheduler = Scheduler([task], clock=clock)
+    while True:
+        delay = scheduler.next_deadline() - clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        for due in scheduler.pop_due():
+            await job()
+            due.mark_run(int(time.time()))
@@ -5,6 +5,7 @@ from pathlib import Path
 from zoneinfo import ZoneInfo
 
 from umd_client.config import LocationConfig
+from umd_client.storage.quota import QuotaManager
 
 
 @dataclass(frozen=True)
@@ -43,13 +44,23 @@ def capture_photo(
     location: LocationConfig,
     timestamp: int | None = None,
     runner=subprocess.run,
+    quota: QuotaManager | None = None,
 ) -> Path:
+    """Capture one photo into ``data_path/photo/YYYYMMDD-HHMMSS.jpg``.
+
+    Without a photo quota only the newest photo is kept; with one, the quota
+    manager indexes the new file and evicts old photos in the background.
+    """
     config = CaptureConfig(data_path=Path(data_path))
     config.photo_dir.mkdir(parents=True, exist_ok=True)
     now = _datetime_from_timestamp(timestamp, location)
-    output_path = config.photo_dir / f"{now.strftime('%H-%M-%S')}.jpg"
+    # The date keeps a day's photos from overwriting the previous day's at the same time of day.
+    output_path = config.photo_dir / f"{now.strftime('%Y%m%d-%H%M%S')}.jpg"
     runner(build_capture_command(output_path, location=location, timestamp=timestamp), check=True)
-    prune_old_photos(config.photo_dir, keep=1)
+    if quota is not None:
+        quota.record(output_path)
+    if quota is None or "photos" not in quota.budgets:
+        prune_old_photos(config.photo_dir, keep=1)
     return output_path
 
 
@@ -1,10 +1,14 @@
 import argparse
 import json
+import sys
+import time
+from datetime import datetime
 from pathlib import Path
 
-from umd_client.app import capture_camera, refresh_display, run
-from umd_client.config import load_config
+from umd_client.app import build_panel, capture_camera, refresh_display, run
+from umd_client.config import ClientConfig, load_config
 from umd_client.sensors.factory import create_sensor
+from umd_client.sensors.types import Reading
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -18,6 +22,12 @@ def build_parser() -> argparse.ArgumentParser:
         type=Path,
         help="Path to the TOML configuration file.",
     )
+    run_parser.add_argument(
+        "--engine",
+        choices=["sync", "asyncio"],
+        default="sync",
+        help="Runtime engine: one sequential loop, or independent asyncio tasks.",
+    )
     for command, help_text in [
         ("sample", "Read the configured sensor once and print JSON."),
         ("display-once", "Read the configured sensor once and refresh the display."),
@@ -31,30 +41,224 @@ def build_parser() -> argparse.ArgumentParser:
             help="Path to the TOML configuration file.",
         )
 
+    query_parser = subparsers.add_parser("query", help="Print stored readings for a time range as NDJSON or CSV.")
+    query_parser.add_argument(
+        "--config",
+        default=".env.toml",
+        type=Path,
+        help="Path to the TOML configuration file.",
+    )
+    query_parser.add_argument(
+        "--from",
+        dest="start",
+        type=_timestamp,
+        help="Start of the range (Unix seconds or ISO 8601). Defaults to 24 hours before --to.",
+    )
+    query_parser.add_argument(
+        "--to",
+        dest="end",
+        type=_timestamp,
+        help="End of the range, exclusive (Unix seconds or ISO 8601). Defaults to now.",
+    )
+    query_parser.add_argument("--fields", type=_field_list, help="Comma-separated fields. Defaults to all.")
+    query_parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson", help="Output format.")
+    query_parser.add_argument("--points", type=int, help="Downsample each field to about this many points.")
+    query_parser.add_argument(
+        "--method",
+        choices=["lttb", "minmax"],
+        default="lttb",
+        help="Downsampling method: largest-triangle-three-buckets, or min and max per time bucket.",
+    )
+
+    export_parser = subparsers.add_parser("export", help="Stream stored readings to a CSV, Parquet or Arrow file.")
+    export_parser.add_argument(
+        "--config",
+        default=".env.toml",
+        type=Path,
+        help="Path to the TOML configuration file.",
+    )
+    export_parser.add_argument(
+        "--from",
+        dest="start",
+        type=_timestamp,
+        default=0,
+        help="Start of the range (Unix seconds or ISO 8601). Defaults to the oldest reading.",
+    )
+    export_parser.add_argument(
+        "--to",
+        dest="end",
+        type=_timestamp,
+        help="End of the range, exclusive (Unix seconds or ISO 8601). Defaults to now.",
+    )
+    export_parser.add_argument("--fields", type=_field_list, help="Comma-separated fields. Defaults to all.")
+    export_parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv", help="Output format.")
+    export_parser.add_argument(
+        "--output",
+        type=Path,
+        help="Output file. CSV is written to standard output when omitted; Parquet and Arrow require a file.",
+    )
+
+    loadtest_parser = subparsers.add_parser(
+        "loadtest",
+        help="Upload synthetic readings from many virtual stations and report throughput and latency.",
+    )
+    loadtest_parser.add_argument("--stations", default=1000, type=int, help="Number of virtual stations.")
+    loadtest_parser.add_argument("--rounds", default=1, type=int, help="Readings uploaded per station.")
+    loadtest_parser.add_argument("--concurrency", default=32, type=int, help="Concurrent upload threads.")
+    loadtest_parser.add_argument(
+        "--server",
+        default=None,
+        help="Upload endpoint to test. Defaults to an embedded local stand-in server.",
+    )
+    loadtest_parser.add_argument(
+        "--server-delay",
+        default=0.0,
+        type=float,
+        help="Seconds the stand-in server waits before answering each request.",
+    )
+    loadtest_parser.add_argument(
+        "--no-keep-alive",
+        dest="keep_alive",
+        action="store_false",
+        help="Open a new connection for every upload.",
+    )
+
+    latest_mean_parser = subparsers.add_parser(
+        "latest-mean", help="Print the SN3003 rolling-mean history kept in data_path as CSV."
+    )
+    latest_mean_parser.add_argument(
+        "--config",
+        default=".env.toml",
+        type=Path,
+        help="Path to the TOML configuration file.",
+    )
+
+    usage_parser = subparsers.add_parser("usage", help="Print disk usage per storage category as JSON.")
+    usage_parser.add_argument(
+        "--config",
+        default=".env.toml",
+        type=Path,
+        help="Path to the TOML configuration file.",
+    )
+
     return parser
 
 
+def _timestamp(value: str) -> int:
+    if value.lstrip("-").isdigit():
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid time {value!r}: use Unix seconds or ISO 8601") from exc
+
+
+def _field_list(value: str) -> list[str]:
+    return [field.strip() for field in value.split(",") if field.strip()]
+
+
+def _read_once(config: ClientConfig) -> Reading:
+    sensor = create_sensor(config)
+    try:
+        return sensor.read()
+    finally:
+        close = getattr(sensor, "close", None)
+        if close is not None:
+            close()
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
 
     if args.command == "run":
-        run(args.config)
+        if args.engine == "asyncio":
+            from umd_client.async_app import run as run_async
+
+            run_async(args.config)
+        else:
+            run(args.config)
         return 0
     if args.command == "sample":
         config = load_config(args.config)
-        reading = create_sensor(config).read()
+        reading = _read_once(config)
         print(json.dumps(reading.data, ensure_ascii=True, indent=4))
         return 0
     if args.command == "display-once":
         config = load_config(args.config)
-        reading = create_sensor(config).read()
-        refresh_display(reading, config)
+        reading = _read_once(config)
+        refresh_display(reading, config, panel=build_panel(config))
         return 0
     if args.command == "photo-once":
         config = load_config(args.config)
         capture_camera(config)
         return 0
+    if args.command == "query":
+        from umd_client.storage.query import query, query_fields, write_csv, write_ndjson
+        from umd_client.storage.sqlite import HISTORY_FILENAME
+
+        config = load_config(args.config)
+        path = config.data_path / HISTORY_FILENAME
+        end = int(time.time()) if args.end is None else args.end
+        start = end - 86400 if args.start is None else args.start
+        try:
+            fields = query_fields(path, args.fields)
+        except (FileNotFoundError, ValueError) as exc:
+            parser.error(str(exc))
+        rows = query(path, start, end, fields=fields, points=args.points, method=args.method)
+        if args.format == "csv":
+            write_csv(rows, fields, sys.stdout)
+        else:
+            write_ndjson(rows, sys.stdout)
+        return 0
+    if args.command == "export":
+        from umd_client.storage.export import export
+        from umd_client.storage.sqlite import HISTORY_FILENAME
+
+        if args.output is None and args.format != "csv":
+            parser.error(f"--output is required for {args.format} export")
+        config = load_config(args.config)
+        end = int(time.time()) if args.end is None else args.end
+        try:
+            export(
+                config.data_path / HISTORY_FILENAME,
+                sys.stdout if args.output is None else args.output,
+                start=args.start,
+                end=end,
+                fields=args.fields,
+                format=args.format,
+            )
+        except (FileNotFoundError, ValueError, RuntimeError) as exc:
+            parser.error(str(exc))
+        return 0
+    if args.command == "loadtest":
+        from umd_client.loadtest import loadtest
+
+        report = loadtest(
+            stations=args.stations,
+            rounds=args.rounds,
+            concurrency=args.concurrency,
+            server=args.server,
+            keep_alive=args.keep_alive,
+            server_delay=args.server_delay,
+        )
+        print(json.dumps(report, indent=4))
+        return 0 if report["failures"] == 0 else 1
+    if args.command == "latest-mean":
+        from umd_client.sensors.sn3003 import export_latest_mean_csv
+
+        config = load_config(args.config)
+        try:
+            export_latest_mean_csv(config.data_path, sys.stdout)
+        except (FileNotFoundError, ValueError) as exc:
+            parser.error(str(exc))
+        return 0
+    if args.command == "usage":
+        from umd_client.storage.quota import QuotaManager
+
+        config = load_config(args.config)
+        print(json.dumps(QuotaManager(config.data_path, config.quota).usage(), indent=4))
+        return 0
 
     parser.print_help()
     return 0
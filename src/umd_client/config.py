@@ -1,8 +1,14 @@
+import os
 import tomllib
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+from umd_client.deadband import DEADBAND_FIELDS, Deadband, parse_deadband
+from umd_client.scheduler import CATCH_UP_POLICIES
+from umd_client.simulator import HARDWARE_BACKENDS, HARDWARE_ENV
+from umd_client.storage.quota import EVICTABLE_CATEGORIES
+
 
 class ConfigError(ValueError):
     """Raised when the client configuration is missing or invalid."""
@@ -23,14 +29,40 @@ class ClientConfig:
     station_key: str
     server: str
     sensor_type: str = "sensor_hat"
+    hardware: str = "auto"
     record_frequency: int = 30
+    sample_frequency: int | None = None
+    binlog_enabled: bool = False
+    imu_rate: int | None = None
+    imu_window: int = 10
+    imu_fifo: bool = True
     storage_size: int = 2880
     data_path: Path = Path("data")
     sn3003_port: str = "/dev/ttyS0"
+    http_keep_alive: bool = True
+    outbox_enabled: bool = False
+    batch_size: int = 1
+    batch_max_age: int = 300
+    breaker_failure_threshold: int = 3
+    breaker_reset_timeout: int = 30
+    breaker_max_reset_timeout: int = 600
+    history_enabled: bool = True
+    history_flush_interval: int = 60
+    history_max_age: int | None = None
+    archive_compression: str = "auto"
+    quota: dict[str, int] = field(default_factory=dict)
+    deadbands: dict[str, Deadband] = field(default_factory=dict)
+    heartbeat_interval: int = 600
     display_enabled: bool = False
     display_frequency: int = 300
     camera_enabled: bool = False
     camera_frequency: int = 1800
+    upload_catch_up: str = "coalesce"
+    display_catch_up: str = "coalesce"
+    camera_catch_up: str = "coalesce"
+    upload_timeout: int = 30
+    display_timeout: int = 60
+    camera_timeout: int = 120
     location: LocationConfig = LocationConfig()
 
 
@@ -42,20 +74,54 @@ def load_config(path: str | Path = ".env.toml") -> ClientConfig:
     record_frequency = _positive_int(raw.get("record_frequency", 30), "record_frequency")
     storage_size = _positive_int(raw.get("storage_size", int(86400 / record_frequency)), "storage_size")
     data_path = Path(raw.get("data_path", Path.cwd() / "data"))
+    outbox_enabled = _bool(raw.get("outbox_enabled", False), "outbox_enabled")
+    batch_size = _positive_int(raw.get("batch_size", 1), "batch_size")
+    sample_frequency = _optional_positive_int(raw.get("sample_frequency"), "sample_frequency")
+    binlog_enabled = _bool(raw.get("binlog_enabled", False), "binlog_enabled")
+    if binlog_enabled and sample_frequency is None:
+        raise ConfigError("binlog_enabled = true requires sample_frequency")
+    if batch_size > 1 and not outbox_enabled:
+        raise ConfigError("batch_size greater than 1 requires outbox_enabled = true")
 
     return ClientConfig(
         station_name=_required_string(raw, "station_name"),
         station_key=_required_string(raw, "station_key"),
         server=_required_string(raw, "server"),
         sensor_type=_sensor_type(raw.get("sensor_type", "sensor_hat")),
+        hardware=_hardware(os.environ.get(HARDWARE_ENV) or raw.get("hardware", "auto")),
         record_frequency=record_frequency,
+        sample_frequency=sample_frequency,
+        binlog_enabled=binlog_enabled,
+        imu_rate=_optional_positive_int(raw.get("imu_rate"), "imu_rate"),
+        imu_window=_positive_int(raw.get("imu_window", 10), "imu_window"),
+        imu_fifo=_bool(raw.get("imu_fifo", True), "imu_fifo"),
         storage_size=storage_size,
         data_path=data_path,
         sn3003_port=_optional_string(raw, "sn3003_port", "/dev/ttyS0"),
+        http_keep_alive=_bool(raw.get("http_keep_alive", True), "http_keep_alive"),
+        outbox_enabled=outbox_enabled,
+        batch_size=batch_size,
+        batch_max_age=_positive_int(raw.get("batch_max_age", 300), "batch_max_age"),
+        breaker_failure_threshold=_positive_int(raw.get("breaker_failure_threshold", 3), "breaker_failure_threshold"),
+        breaker_reset_timeout=_positive_int(raw.get("breaker_reset_timeout", 30), "breaker_reset_timeout"),
+        breaker_max_reset_timeout=_positive_int(raw.get("breaker_max_reset_timeout", 600), "breaker_max_reset_timeout"),
+        history_enabled=_bool(raw.get("history_enabled", True), "history_enabled"),
+        history_flush_interval=_non_negative_int(raw.get("history_flush_interval", 60), "history_flush_interval"),
+        history_max_age=_optional_positive_int(raw.get("history_max_age"), "history_max_age"),
+        archive_compression=_archive_compression(raw.get("archive_compression", "auto")),
+        quota=_quota(raw.get("quota", {})),
+        deadbands=_deadbands(raw.get("deadband", {})),
+        heartbeat_interval=_positive_int(raw.get("heartbeat_interval", 600), "heartbeat_interval"),
         display_enabled=_bool(raw.get("display_enabled", False), "display_enabled"),
         display_frequency=_positive_int(raw.get("display_frequency", 300), "display_frequency"),
         camera_enabled=_bool(raw.get("camera_enabled", False), "camera_enabled"),
         camera_frequency=_positive_int(raw.get("camera_frequency", 1800), "camera_frequency"),
+        upload_catch_up=_catch_up(raw.get("upload_catch_up", "coalesce"), "upload_catch_up"),
+        display_catch_up=_catch_up(raw.get("display_catch_up", "coalesce"), "display_catch_up"),
+        camera_catch_up=_catch_up(raw.get("camera_catch_up", "coalesce"), "camera_catch_up"),
+        upload_timeout=_positive_int(raw.get("upload_timeout", 30), "upload_timeout"),
+        display_timeout=_positive_int(raw.get("display_timeout", 60), "display_timeout"),
+        camera_timeout=_positive_int(raw.get("camera_timeout", 120), "camera_timeout"),
         location=LocationConfig(
             city=_optional_string(raw, "city", "Guangzhou"),
             country=_optional_string(raw, "country", "China"),
@@ -90,6 +156,22 @@ def _positive_int(value: Any, key: str) -> int:
     return parsed
 
 
+def _non_negative_int(value: Any, key: str) -> int:
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError) as exc:
+        raise ConfigError(f"{key} must be a non-negative integer") from exc
+    if parsed < 0:
+        raise ConfigError(f"{key} must be a non-negative integer")
+    return parsed
+
+
+def _optional_positive_int(value: Any, key: str) -> int | None:
+    if value is None:
+        return None
+    return _positive_int(value, key)
+
+
 def _bool(value: Any, key: str) -> bool:
     if isinstance(value, bool):
         return value
@@ -107,3 +189,48 @@ def _sensor_type(value: Any) -> str:
     if value not in {"sensor_hat", "sn3003"}:
         raise ConfigError("sensor_type must be 'sensor_hat' or 'sn3003'")
     return value
+
+
+def _hardware(value: Any) -> str:
+    """``UMD_HARDWARE`` in the environment takes precedence over the ``hardware`` key."""
+    value = value.lower() if isinstance(value, str) else value
+    if value not in HARDWARE_BACKENDS:
+        raise ConfigError(f"hardware (or {HARDWARE_ENV}) must be 'auto' or 'simulated'")
+    return value
+
+
+def _archive_compression(value: Any) -> str:
+    if value not in {"auto", "gzip", "zstd", "off"}:
+        raise ConfigError("archive_compression must be 'auto', 'gzip', 'zstd' or 'off'")
+    return value
+
+
+def _quota(value: Any) -> dict[str, int]:
+    if not isinstance(value, dict):
+        raise ConfigError("quota must be a table of category = megabytes")
+    budgets = {}
+    for category, megabytes in value.items():
+        if category not in EVICTABLE_CATEGORIES:
+            raise ConfigError(f"quota category must be one of {', '.join(EVICTABLE_CATEGORIES)}")
+        budgets[category] = _positive_int(megabytes, f"quota.{category}") * 1024 * 1024
+    return budgets
+
+
+def _deadbands(value: Any) -> dict[str, Deadband]:
+    if not isinstance(value, dict):
+        raise ConfigError("deadband must be a table of field = deadband")
+    deadbands = {}
+    for name, deadband in value.items():
+        if name not in DEADBAND_FIELDS:
+            raise ConfigError(f"deadband field must be one of {', '.join(DEADBAND_FIELDS)}")
+        try:
+            deadbands[name] = parse_deadband(deadband)
+        except ValueError as exc:
+            raise ConfigError(f"deadband.{name}: {exc}") from exc
+    return deadbands
+
+
+def _catch_up(value: Any, key: str) -> str:
+    if value not in CATCH_UP_POLICIES:
+        raise ConfigError(f"{key} must be one of {', '.join(CATCH_UP_POLICIES)}")
+    return value
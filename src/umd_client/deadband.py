@@ -0,0 +1,67 @@
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from umd_client.sensors.types import Reading
+
+DEADBAND_FIELDS = ("temperature", "humidity", "pressure", "lux", "uv", "shake")
+
+
+@dataclass(frozen=True)
+class Deadband:
+    value: float
+    relative: bool = False
+
+    def exceeded(self, previous: float, current: float) -> bool:
+        limit = abs(previous) * self.value / 100 if self.relative else self.value
+        return abs(current - previous) > limit
+
+
+def parse_deadband(value: Any) -> Deadband:
+    """Parse ``0.5`` as an absolute deadband and ``"2%"`` as one relative to the last sent value."""
+    if isinstance(value, int | float) and not isinstance(value, bool) and value >= 0:
+        return Deadband(float(value))
+    if isinstance(value, str) and value.strip().endswith("%"):
+        try:
+            percent = float(value.strip()[:-1])
+        except ValueError:
+            percent = -1.0
+        if percent >= 0:
+            return Deadband(percent, relative=True)
+    raise ValueError(f"Invalid deadband {value!r}: use a non-negative number or a percentage such as '2%'")
+
+
+class DeadbandFilter:
+    """Report-by-exception: pass a reading only when it is worth sending.
+
+    A reading passes when any field with a deadband has moved outside it since
+    the last reading that passed, or when ``heartbeat`` seconds have elapsed.
+    Fields without a deadband never trigger a send on their own.
+    """
+
+    def __init__(self, deadbands: Mapping[str, Deadband], heartbeat: int) -> None:
+        self.deadbands = dict(deadbands)
+        self.heartbeat = heartbeat
+        self.last_sent: Reading | None = None
+        self.suppressed = 0
+
+    def should_send(self, reading: Reading) -> bool:
+        if self._changed(reading):
+            self.last_sent = reading
+            return True
+        self.suppressed += 1
+        return False
+
+    def _changed(self, reading: Reading) -> bool:
+        last = self.last_sent
+        if last is None or reading.timestamp - last.timestamp >= self.heartbeat:
+            return True
+        for name, deadband in self.deadbands.items():
+            previous, current = last.data.get(name), reading.data.get(name)
+            if previous is None or current is None:
+                if previous is not current:
+                    return True
+                continue
+            if deadband.exceeded(previous, current):
+                return True
+        return False
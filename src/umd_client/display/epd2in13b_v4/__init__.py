@@ -122,10 +122,10 @@ def render_images(
     return HBlackimage, RedImage
 
 
-def display_reading(reading: Reading, location: LocationConfig | None = None) -> None:
+def display_reading(reading: Reading, location: LocationConfig | None = None, panel=None) -> None:
     from umd_client.display.epd2in13b_v4 import epd2in13b_v4
 
-    epd = epd2in13b_v4.EPD()
+    epd = epd2in13b_v4.EPD(panel)
     HBlackimage, RedImage = render_images(reading, epd=epd, location=location)
     try:
         epd.init()
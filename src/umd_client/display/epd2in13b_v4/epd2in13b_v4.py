@@ -10,49 +10,51 @@ logger = logging.getLogger(__name__)
 
 
 class EPD:
-    def __init__(self):
-        self.reset_pin = epdconfig.RST_PIN
-        self.dc_pin = epdconfig.DC_PIN
-        self.busy_pin = epdconfig.BUSY_PIN
-        self.cs_pin = epdconfig.CS_PIN
+    def __init__(self, panel=None):
+        # Any object with the epdconfig interface, such as a simulated panel; defaults to the detected board.
+        self.epdconfig = epdconfig if panel is None else panel
+        self.reset_pin = self.epdconfig.RST_PIN
+        self.dc_pin = self.epdconfig.DC_PIN
+        self.busy_pin = self.epdconfig.BUSY_PIN
+        self.cs_pin = self.epdconfig.CS_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
 
     # hardware reset
     def reset(self):
-        epdconfig.digital_write(self.reset_pin, 1)
-        epdconfig.delay_ms(20)
-        epdconfig.digital_write(self.reset_pin, 0)
-        epdconfig.delay_ms(2)
-        epdconfig.digital_write(self.reset_pin, 1)
-        epdconfig.delay_ms(20)
+        self.epdconfig.digital_write(self.reset_pin, 1)
+        self.epdconfig.delay_ms(20)
+        self.epdconfig.digital_write(self.reset_pin, 0)
+        self.epdconfig.delay_ms(2)
+        self.epdconfig.digital_write(self.reset_pin, 1)
+        self.epdconfig.delay_ms(20)
 
     # send 1 byte command
     def send_command(self, command):
-        epdconfig.digital_write(self.dc_pin, 0)
-        epdconfig.digital_write(self.cs_pin, 0)
-        epdconfig.spi_writebyte([command])
-        epdconfig.digital_write(self.cs_pin, 1)
+        self.epdconfig.digital_write(self.dc_pin, 0)
+        self.epdconfig.digital_write(self.cs_pin, 0)
+        self.epdconfig.spi_writebyte([command])
+        self.epdconfig.digital_write(self.cs_pin, 1)
 
     # send 1 byte data
     def send_data(self, data):
-        epdconfig.digital_write(self.dc_pin, 1)
-        epdconfig.digital_write(self.cs_pin, 0)
-        epdconfig.spi_writebyte([data])
-        epdconfig.digital_write(self.cs_pin, 1)
+        self.epdconfig.digital_write(self.dc_pin, 1)
+        self.epdconfig.digital_write(self.cs_pin, 0)
+        self.epdconfig.spi_writebyte([data])
+        self.epdconfig.digital_write(self.cs_pin, 1)
 
     # send a lot of data
     def send_data2(self, data):
-        epdconfig.digital_write(self.dc_pin, 1)
-        epdconfig.digital_write(self.cs_pin, 0)
-        epdconfig.spi_writebyte2(data)
-        epdconfig.digital_write(self.cs_pin, 1)
+        self.epdconfig.digital_write(self.dc_pin, 1)
+        self.epdconfig.digital_write(self.cs_pin, 0)
+        self.epdconfig.spi_writebyte2(data)
+        self.epdconfig.digital_write(self.cs_pin, 1)
 
     # judge e-Paper whether is busy
     def busy(self):
         logger.debug("e-Paper busy")
-        while epdconfig.digital_read(self.busy_pin) != 0:
-            epdconfig.delay_ms(10)
+        while self.epdconfig.digital_read(self.busy_pin) != 0:
+            self.epdconfig.delay_ms(10)
         logger.debug("e-Paper busy release")
 
     # set the display window
@@ -78,7 +80,7 @@ class EPD:
 
     # initialize
     def init(self):
-        if epdconfig.module_init() != 0:
+        if self.epdconfig.module_init() != 0:
             return -1
 
         self.reset()
@@ -170,5 +172,5 @@ class EPD:
         self.send_command(0x10)  # DEEP_SLEEP
         self.send_data(0x01)  # check code
 
-        epdconfig.delay_ms(2000)
-        epdconfig.module_exit()
+        self.epdconfig.delay_ms(2000)
+        self.epdconfig.module_exit()
@@ -6,6 +6,8 @@ import subprocess
 
 from ctypes import *
 
+from umd_client.simulator import SimulatedPanel, simulation_enabled
+
 logger = logging.getLogger(__name__)
 
 
@@ -269,20 +271,32 @@ class SunriseX3:
         self.GPIO.cleanup([self.RST_PIN, self.DC_PIN, self.CS_PIN, self.BUSY_PIN], self.PWR_PIN)
 
 
-if sys.version_info[0] == 2:
-    process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE)
-else:
-    process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE, text=True)
-output, _ = process.communicate()
-if sys.version_info[0] == 2:
-    output = output.decode(sys.stdout.encoding)
-
-if "Raspberry" in output:
-    implementation = RaspberryPi()
-elif os.path.exists('/sys/bus/platform/drivers/gpio-x3'):
-    implementation = SunriseX3()
-else:
-    implementation = JetsonNano()
-
-for func in [x for x in dir(implementation) if not x.startswith('_')]:
-    setattr(sys.modules[__name__], func, getattr(implementation, func))
+def detect():
+    if simulation_enabled():
+        return SimulatedPanel()
+    if sys.version_info[0] == 2:
+        process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE)
+    else:
+        process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE, text=True)
+    output, _ = process.communicate()
+    if sys.version_info[0] == 2:
+        output = output.decode(sys.stdout.encoding)
+
+    if "Raspberry" in output:
+        return RaspberryPi()
+    elif os.path.exists('/sys/bus/platform/drivers/gpio-x3'):
+        return SunriseX3()
+    else:
+        return JetsonNano()
+
+
+def __getattr__(name):
+    # The board is detected on first use rather than at import, so a driver
+    # handed an explicit panel never touches the GPIO libraries.
+    global implementation
+    if name.startswith("__") or "implementation" in globals():
+        raise AttributeError(name)
+    implementation = detect()
+    for func in [x for x in dir(implementation) if not x.startswith('_')]:
+        setattr(sys.modules[__name__], func, getattr(implementation, func))
+    return getattr(implementation, name)
@@ -0,0 +1,227 @@
+import gzip
+import http.server
+import json
+import random
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from umd_client.sensors.sensor_hat import CORE_FIELDS
+from umd_client.sensors.types import Reading
+from umd_client.transport import KeepAliveClient, build_payload, send_payload
+
+HOLD_FIELDS = ("hold1", "hold2", "hold3")
+
+
+def validate_payload(payload: Any) -> list[str]:
+    """Return the problems that would make the platform reject ``payload``."""
+    if not isinstance(payload, dict):
+        return ["payload is not an object"]
+    errors = []
+    for name, kind in [("id", str), ("key", str), ("timestamp", int), ("data", dict)]:
+        if not isinstance(payload.get(name), kind) or isinstance(payload.get(name), bool):
+            errors.append(f"{name} must be {kind.__name__}")
+    data = payload.get("data")
+    if isinstance(data, dict):
+        errors.extend(f"data.{name} is missing" for name in HOLD_FIELDS if name not in data)
+        errors.extend(
+            f"data.{name} must be a number or null"
+            for name, value in data.items()
+            if value is not None and (not isinstance(value, int | float) or isinstance(value, bool))
+        )
+    return errors
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    payloads: int = 0
+    rejected: int = 0
+    bytes: int = 0
+    latencies: list[float] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class StandInServer:
+    """Local stand-in for the UMD upload endpoint.
+
+    Accepts single payloads and gzip-compressed batches, answers 400 for payloads
+    that fail ``validate_payload`` and records how long each request took to serve.
+    ``delay`` simulates server processing time.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0) -> None:
+        self.stats = ServerStats()
+        self.delay = delay
+        self._server = http.server.ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/upload"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="umd-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _handler(self) -> type[http.server.BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                started = time.perf_counter()
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                size = len(body)
+                try:
+                    if self.headers.get("Content-Encoding") == "gzip":
+                        body = gzip.decompress(body)
+                    document = json.loads(body)
+                    payloads = document if isinstance(document, list) else [document]
+                    valid = bool(payloads) and not any(validate_payload(payload) for payload in payloads)
+                except (OSError, ValueError):
+                    payloads, valid = [], False
+                if server.delay:
+                    time.sleep(server.delay)
+                status = 200 if valid else 400
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                with server.stats.lock:
+                    server.stats.requests += 1
+                    server.stats.bytes += size
+                    server.stats.payloads += len(payloads) if valid else 0
+                    server.stats.rejected += 0 if valid else 1
+                    server.stats.latencies.append(time.perf_counter() - started)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+
+def synthetic_reading(rng: random.Random, timestamp: int) -> Reading:
+    values = [
+        timestamp,
+        round(rng.gauss(22.0, 3.0), 2),
+        round(rng.uniform(30.0, 90.0), 2),
+        round(rng.gauss(1013.0, 5.0), 2),
+        round(rng.uniform(0.0, 20000.0), 2),
+        rng.randint(0, 11),
+        round(abs(rng.gauss(0.0, 2.0)), 2),
+    ]
+    return Reading(timestamp=timestamp, data=dict(zip(CORE_FIELDS, values, strict=True)))
+
+
+def run_load(
+    server: str,
+    stations: int = 1000,
+    rounds: int = 1,
+    concurrency: int = 32,
+    keep_alive: bool = True,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Upload ``rounds`` synthetic readings for each of ``stations`` virtual stations.
+
+    Every upload goes through ``build_payload`` and ``send_payload``, the same path
+    a real station uses, from ``concurrency`` worker threads.
+    """
+    local = threading.local()
+
+    def opener(request: urllib.request.Request, timeout: int) -> Any:
+        if not keep_alive:
+            return urllib.request.urlopen(request, timeout)
+        if not hasattr(local, "client"):
+            local.client = KeepAliveClient()
+        return local.client(request, timeout)
+
+    def upload(station: int, round_index: int, latest_dir: Path) -> tuple[bool, float]:
+        rng = random.Random(seed * 1_000_003 + station * 1009 + round_index)
+        reading = synthetic_reading(rng, int(time.time()))
+        payload = build_payload(
+            station_name=f"loadtest-{station:05d}",
+            station_key=f"key-{station:05d}",
+            value_names=reading.value_names,
+            values=reading.values,
+        )
+        started = time.perf_counter()
+        sent = send_payload(server=server, payload=payload, latest_path=latest_dir / f"{station}.json", opener=opener)
+        return sent, time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory(prefix="umd-loadtest-") as latest_dir, ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        results = list(
+            pool.map(
+                lambda job: upload(job[0], job[1], Path(latest_dir)),
+                [(station, round_index) for round_index in range(rounds) for station in range(stations)],
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    latencies = [latency for _, latency in results]
+    return {
+        "stations": stations,
+        "requests": len(results),
+        "failures": sum(1 for sent, _ in results if not sent),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": latency_summary(latencies),
+    }
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+    ordered = sorted(latencies)
+    summary = {f"p{p}": round(percentile(ordered, p) * 1000, 2) for p in (50, 90, 99)}
+    summary["max"] = round(ordered[-1] * 1000, 2) if ordered else 0.0
+    return summary
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), -(-len(ordered) * p // 100)))
+    return ordered[int(rank) - 1]
+
+
+def loadtest(
+    stations: int = 1000,
+    rounds: int = 1,
+    concurrency: int = 32,
+    server: str | None = None,
+    keep_alive: bool = True,
+    server_delay: float = 0.0,
+) -> dict[str, Any]:
+    if server is not None:
+        return run_load(server, stations, rounds, concurrency, keep_alive)
+
+    with StandInServer(delay=server_delay) as standin:
+        report = run_load(standin.url, stations, rounds, concurrency, keep_alive)
+    with standin.stats.lock:
+        report["server"] = {
+            "requests": standin.stats.requests,
+            "payloads": standin.stats.payloads,
+            "rejected": standin.stats.rejected,
+            "bytes": standin.stats.bytes,
+            "latency_ms": latency_summary(standin.stats.latencies),
+        }
+    return report
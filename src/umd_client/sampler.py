@@ -0,0 +1,94 @@
+import threading
+from collections import deque
+from typing import Any
+
+from umd_client.sensors.factory import Sensor
+from umd_client.sensors.types import Reading
+from umd_client.storage.binlog import BinLog
+
+
+class Sampler:
+    """Buffer high-rate sensor samples and hand out one aggregate per upload window.
+
+    ``sample()`` reads the wrapped sensor into the buffer. ``read()`` keeps the
+    ``Sensor`` interface: it drains the buffer and returns the window aggregate,
+    so the upload path does not need to know whether sampling is split out.
+    With a ``binlog`` every raw sample is also appended to it. Reads of the
+    wrapped sensor are serialized, so a ``read()`` that finds the buffer empty
+    waits for an in-flight ``sample()`` and uses its result instead of talking
+    to the sensor at the same time.
+    """
+
+    def __init__(self, sensor: Sensor, max_samples: int = 3600, binlog: BinLog | None = None) -> None:
+        self.sensor = sensor
+        self.binlog = binlog
+        self._buffer: deque[Reading] = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._sensor_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def sample(self) -> Reading:
+        with self._sensor_lock:
+            reading = self.sensor.read()
+            with self._lock:
+                self._buffer.append(reading)
+        if self.binlog is not None:
+            self.binlog.append(reading)
+        return reading
+
+    def drain(self) -> list[Reading]:
+        with self._lock:
+            readings = list(self._buffer)
+            self._buffer.clear()
+        return readings
+
+    def read(self) -> Reading:
+        with self._sensor_lock:
+            readings = self.drain()
+            if not readings:
+                readings = [self.sensor.read()]
+        return aggregate_readings(readings)
+
+    def close(self) -> None:
+        if self.binlog is not None:
+            self.binlog.close()
+        close = getattr(self.sensor, "close", None)
+        if close is not None:
+            close()
+
+
+def aggregate_readings(readings: list[Reading]) -> Reading:
+    """Collapse a window into one reading.
+
+    Each numeric field keeps its name for the window mean and gains ``<field>_min``,
+    ``<field>_max`` and ``<field>_last``; ``samples`` counts the readings in the window.
+    """
+    if not readings:
+        raise ValueError("Cannot aggregate an empty window")
+
+    last = readings[-1]
+    data: dict[str, Any] = {}
+    extremes: dict[str, Any] = {}
+    for name, value in last.data.items():
+        if name == "time":
+            data[name] = last.timestamp
+            continue
+        values = [reading.data.get(name) for reading in readings]
+        numbers = [item for item in values if _is_number(item)]
+        if not numbers:
+            data[name] = value
+            continue
+        data[name] = round(sum(numbers) / len(numbers), 2)
+        extremes[f"{name}_min"] = min(numbers)
+        extremes[f"{name}_max"] = max(numbers)
+        extremes[f"{name}_last"] = value
+    data.update(extremes)
+    data["samples"] = len(readings)
+    return Reading(timestamp=last.timestamp, data=data)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, int | float) and not isinstance(value, bool)
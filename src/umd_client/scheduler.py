@@ -1,11 +1,21 @@
+import heapq
+import time
+from collections.abc import Callable
 from dataclasses import dataclass
 
+CATCH_UP_POLICIES = ("skip", "coalesce", "run_all")
+
 
 @dataclass
 class ScheduledTask:
     name: str
     frequency: int
     last_run: int | None = None
+    catch_up: str = "coalesce"
+
+    def __post_init__(self) -> None:
+        if self.catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unsupported catch_up policy: {self.catch_up}")
 
     def is_due(self, now: int) -> bool:
         return self.last_run is None or now - self.last_run >= self.frequency
@@ -16,3 +26,56 @@ class ScheduledTask:
 
 def due_tasks(tasks: list[ScheduledTask], now: int) -> list[ScheduledTask]:
     return [task for task in tasks if task.is_due(now)]
+
+
+class Scheduler:
+    """Deadline heap on a monotonic clock.
+
+    Deadlines advance on a fixed grid (``deadline + frequency``), so the time a task
+    takes to run never shifts its cadence. When a task falls one or more periods
+    behind, its ``catch_up`` policy decides what happens to the missed runs:
+    ``run_all`` runs every missed occurrence, ``coalesce`` runs once, and ``skip``
+    drops them and waits for the next grid point.
+    """
+
+    def __init__(
+        self,
+        tasks: list[ScheduledTask],
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.clock = clock
+        self.sleep = sleep
+        self._heap: list[tuple[float, int, ScheduledTask]] = []
+        start = clock()
+        wall_now = wall_clock()
+        for index, task in enumerate(tasks):
+            delay = 0.0 if task.last_run is None else max(0.0, task.last_run + task.frequency - wall_now)
+            heapq.heappush(self._heap, (start + delay, index, task))
+
+    def next_deadline(self) -> float | None:
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float | None = None) -> list[ScheduledTask]:
+        now = self.clock() if now is None else now
+        due: list[ScheduledTask] = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, index, task = heapq.heappop(self._heap)
+            missed = int((now - deadline) // task.frequency)
+            if task.catch_up == "run_all":
+                due.extend([task] * (missed + 1))
+            elif task.catch_up == "coalesce" or missed == 0:
+                due.append(task)
+            heapq.heappush(self._heap, (deadline + (missed + 1) * task.frequency, index, task))
+        return due
+
+    def wait(self) -> list[ScheduledTask]:
+        while self._heap:
+            delay = self._heap[0][0] - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+            due = self.pop_due()
+            if due:
+                return due
+        return []
@@ -13,7 +13,17 @@ def create_sensor(config: ClientConfig) -> Sensor:
     if config.sensor_type == "sensor_hat":
         from umd_client.sensors.sensor_hat import SensorHatSensor
 
-        return SensorHatSensor()
+        if config.hardware == "simulated":
+            from umd_client.sensors.i2c import I2CBus
+            from umd_client.simulator import SimulatedSMBus
+
+            return SensorHatSensor(
+                bus=I2CBus(SimulatedSMBus()),
+                imu_rate=config.imu_rate,
+                imu_window=config.imu_window,
+                imu_fifo=config.imu_fifo,
+            )
+        return SensorHatSensor(imu_rate=config.imu_rate, imu_window=config.imu_window, imu_fifo=config.imu_fifo)
     if config.sensor_type == "sn3003":
         from umd_client.sensors.sn3003 import SN3003Sensor
 
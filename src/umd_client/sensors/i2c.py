@@ -0,0 +1,74 @@
+import threading
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from typing import Any
+
+
+@dataclass
+class DeviceStats:
+    transactions: int = 0
+    read_bytes: int = 0
+    written_bytes: int = 0
+
+
+def open_smbus(number: int = 1) -> Any:
+    try:
+        import smbus
+    except ImportError as exc:
+        raise RuntimeError("Sensor HAT support requires the smbus package.") from exc
+    return smbus.SMBus(number)
+
+
+class I2CBus:
+    """One SMBus shared by every driver on it.
+
+    Exposes the ``smbus`` calls the drivers use, serialized by ``lock`` so
+    drivers can run on different threads. Drivers that need several
+    transfers to happen back to back, such as a register bank switch followed
+    by a read, hold ``lock`` around them; it is reentrant. Every transfer is
+    counted per device address.
+    """
+
+    def __init__(self, bus: int | Any = 1) -> None:
+        self._bus = open_smbus(bus) if isinstance(bus, int) else bus
+        self.lock = threading.RLock()
+        self.devices: dict[int, DeviceStats] = {}
+
+    def read_byte_data(self, address: int, register: int) -> int:
+        with self.lock:
+            value = self._bus.read_byte_data(address, register)
+            self._count(address, read=1, written=1)
+        return value
+
+    def write_byte_data(self, address: int, register: int, value: int) -> None:
+        with self.lock:
+            self._bus.write_byte_data(address, register, value)
+            self._count(address, read=0, written=2)
+
+    def read_i2c_block_data(self, address: int, register: int, length: int) -> list[int]:
+        with self.lock:
+            data = self._bus.read_i2c_block_data(address, register, length)
+            self._count(address, read=length, written=1)
+        return data
+
+    def write_i2c_block_data(self, address: int, register: int, data: Sequence[int]) -> None:
+        with self.lock:
+            self._bus.write_i2c_block_data(address, register, list(data))
+            self._count(address, read=0, written=1 + len(data))
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self.lock:
+            return {f"0x{address:02x}": asdict(stats) for address, stats in sorted(self.devices.items())}
+
+    def close(self) -> None:
+        close = getattr(self._bus, "close", None)
+        if close is not None:
+            close()
+
+    def _count(self, address: int, read: int, written: int) -> None:
+        stats = self.devices.get(address)
+        if stats is None:
+            stats = self.devices[address] = DeviceStats()
+        stats.transactions += 1
+        stats.read_bytes += read
+        stats.written_bytes += written
@@ -0,0 +1,198 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MotionSnapshot:
+    """Latest fused orientation and shake statistics over the window.
+
+    ``motion`` has the layout of ``ICM20948.getdata``: roll, pitch and yaw in
+    degrees, then raw accelerometer, gyroscope and magnetometer axes. Shake
+    values are gyroscope magnitudes in raw counts, like the ``shake`` field.
+    """
+
+    timestamp: float
+    motion: tuple[float, ...]
+    shake_rms: float
+    shake_peak: float
+    crossing_rate: float
+    samples: int
+    rate: float
+
+
+class ShakeWindow:
+    """Sliding-window RMS, peak and zero-crossing rate of the gyroscope.
+
+    Every statistic is updated incrementally, so adding a sample costs the
+    same regardless of the window length. The zero-crossing rate counts sign
+    changes per second, averaged over the three axes.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self._samples: deque[tuple[float, int, int]] = deque()
+        self._peaks: deque[tuple[float, int]] = deque()
+        self._squares = 0
+        self._crossings = 0
+        self._signs = [0, 0, 0]
+
+    def add(self, timestamp: float, gyroscope: Sequence[int]) -> None:
+        crossings = 0
+        for axis, value in enumerate(gyroscope):
+            sign = (value > 0) - (value < 0)
+            if sign:
+                crossings += self._signs[axis] == -sign
+                self._signs[axis] = sign
+        square = sum(int(value) * int(value) for value in gyroscope)
+        self._samples.append((timestamp, square, crossings))
+        self._squares += square
+        self._crossings += crossings
+        while self._peaks and self._peaks[-1][1] <= square:
+            self._peaks.pop()
+        self._peaks.append((timestamp, square))
+
+        cutoff = timestamp - self.window
+        while self._samples[0][0] <= cutoff:
+            _, old_square, old_crossings = self._samples.popleft()
+            self._squares -= old_square
+            self._crossings -= old_crossings
+        while self._peaks[0][0] <= cutoff:
+            self._peaks.popleft()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def rms(self) -> float:
+        return math.sqrt(self._squares / len(self._samples)) if self._samples else 0.0
+
+    def peak(self) -> float:
+        return math.sqrt(self._peaks[0][1]) if self._peaks else 0.0
+
+    def span(self) -> float:
+        return self._samples[-1][0] - self._samples[0][0] if len(self._samples) > 1 else 0.0
+
+    def crossing_rate(self) -> float:
+        span = self.span()
+        return self._crossings / span / 3 if span else 0.0
+
+
+class IMUService:
+    """Sample the ICM20948 at a fixed rate on a background thread.
+
+    Each sample runs one step of the driver's Mahony fusion with the time that
+    actually passed since the previous one, so orientation converges between
+    uploads instead of advancing one fixed step per reading. ``read`` returns
+    the latest ``MotionSnapshot`` without touching the bus. If a sample is
+    late the schedule restarts from now rather than bursting to catch up.
+
+    With ``fifo`` the chip samples at ``rate`` on its own clock into its
+    FIFO, and the thread only wakes to drain it, twice per FIFO fill time.
+    """
+
+    def __init__(
+        self,
+        icm: Any,
+        rate: float = 100.0,
+        window: float = 10.0,
+        fifo: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.icm = icm
+        self.rate = rate
+        self.fifo = fifo
+        self.clock = clock
+        self.shake = ShakeWindow(window)
+        self._snapshot: MotionSnapshot | None = None
+        self._last_sample: float | None = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def read(self, timeout: float | None = None) -> MotionSnapshot | None:
+        """Latest snapshot, waiting up to ``timeout`` seconds for the first one."""
+        if self._snapshot is None and timeout:
+            self._ready.wait(timeout)
+        return self._snapshot
+
+    def step(self) -> MotionSnapshot:
+        now = self.clock()
+        dt = 1.0 / self.rate if self._last_sample is None else now - self._last_sample
+        self._last_sample = now
+        motion = self.icm.getdata(halfT=dt / 2)
+        self.shake.add(now, motion[6:9])
+        return self._publish(now, motion)
+
+    def drain(self) -> MotionSnapshot | None:
+        """Fuse every sample buffered in the FIFO since the last drain."""
+        now = self.clock()
+        overflows = self.icm.fifo_overflows
+        rows = self.icm.getfifo()
+        if self.icm.fifo_overflows != overflows:
+            logger.warning("IMU FIFO filled up before it was drained; samples were dropped")
+        if not rows:
+            return self._snapshot
+        # Samples are spaced by the chip's clock and end now, but never overlap the previous drain.
+        start = now - len(rows) / self.rate
+        if self._last_sample is not None:
+            start = max(start, self._last_sample)
+        for index, motion in enumerate(rows, start=1):
+            self.shake.add(start + index / self.rate, motion[6:9])
+        self._last_sample = start + len(rows) / self.rate
+        return self._publish(self._last_sample, rows[-1])
+
+    def _publish(self, now: float, motion: Sequence[float]) -> MotionSnapshot:
+        span = self.shake.span()
+        self._snapshot = MotionSnapshot(
+            timestamp=now,
+            motion=tuple(motion),
+            shake_rms=self.shake.rms(),
+            shake_peak=self.shake.peak(),
+            crossing_rate=self.shake.crossing_rate(),
+            samples=len(self.shake),
+            rate=(len(self.shake) - 1) / span if span else 0.0,
+        )
+        self._ready.set()
+        return self._snapshot
+
+    def start(self) -> None:
+        if self._thread is None:
+            if self.fifo:
+                self.rate = self.icm.SetSampleRate(self.rate)
+                self.icm.StartFIFO()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="umd-imu", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        sample = self.drain if self.fifo else self.step
+        period = self.icm.fifo_capacity / self.rate / 2 if self.fifo else 1.0 / self.rate
+        deadline = self.clock()
+        while not self._stop.is_set():
+            try:
+                sample()
+            except Exception:
+                logger.exception("Error occurred while sampling the IMU")
+                self._last_sample = None
+                self._stop.wait(1.0)
+                deadline = self.clock()
+                continue
+            deadline += period
+            delay = deadline - self.clock()
+            if delay < 0:
+                deadline -= delay
+                delay = 0.0
+            self._stop.wait(delay)
@@ -1,7 +1,8 @@
 # coding: utf-8
-import smbus
 import time
 
+from umd_client.sensors.i2c import I2CBus
+
 I2C_ADDR = 0x76
 
 digT = []
@@ -12,8 +13,8 @@ t_fine = 0.0
 
 
 class BME280:
-    def __init__(self, address=I2C_ADDR):
-        self.i2c = smbus.SMBus(1)
+    def __init__(self, address=I2C_ADDR, bus=None):
+        self.i2c = I2CBus() if bus is None else bus
         self.address = address
 
         self.calib = []
@@ -37,11 +38,12 @@ class BME280:
         self.i2c.write_byte_data(self.address, reg_address, data)
 
     def get_calib_param(self):
-        for i in range(0x88, 0x88 + 24):
-            self.calib.append(self.i2c.read_byte_data(self.address, i))
+        # Start over so calibrating again (or a second instance) does not append to stale values.
+        self.calib = []
+        del digT[:], digP[:], digH[:]
+        self.calib.extend(self.i2c.read_i2c_block_data(self.address, 0x88, 24))
         self.calib.append(self.i2c.read_byte_data(self.address, 0xA1))
-        for i in range(0xE1, 0xE1 + 7):
-            self.calib.append(self.i2c.read_byte_data(self.address, i))
+        self.calib.extend(self.i2c.read_i2c_block_data(self.address, 0xE1, 7))
 
         digT.append((self.calib[1] << 8) | self.calib[0])
         digT.append((self.calib[3] << 8) | self.calib[2])
@@ -75,15 +77,15 @@ class BME280:
                 digH[i] = (-digH[i] ^ 0xFFFF) + 1
 
     def readData(self):
-        data = []
-        for i in range(0xF7, 0xF7 + 8):
-            data.append(self.i2c.read_byte_data(self.address, i))
+        # press_msb..hum_lsb in one burst, which also keeps the three values from the same measurement
+        data = self.i2c.read_i2c_block_data(self.address, 0xF7, 8)
         pres_raw = (data[0] << 12) | (data[1] << 4) | (data[2] >> 4)
         temp_raw = (data[3] << 12) | (data[4] << 4) | (data[5] >> 4)
         hum_raw = (data[6] << 8) | data[7]
 
-        pressure = self.compensate_P(pres_raw)
+        # compensate_T updates t_fine, which the pressure and humidity formulas depend on
         temperature = self.compensate_T(temp_raw)
+        pressure = self.compensate_P(pres_raw)
         var_h = self.compensate_H(hum_raw)
         # print "pressure : %7.2f hPa" % (pressure/100)
         # print "temp : %-6.2f ℃" % (temperature)
@@ -1,8 +1,10 @@
 #!/usr/bin/python
 # -*- coding:utf-8 -*-
 import time
-import smbus
 import math
+import struct
+
+from umd_client.sensors.i2c import I2CBus
 
 Gyro = [0, 0, 0]
 Accel = [0, 0, 0]
@@ -11,9 +13,6 @@ pitch = 0.0
 roll = 0.0
 yaw = 0.0
 pu8data = [0, 0, 0, 0, 0, 0, 0, 0]
-U8tempX = [0, 0, 0, 0, 0, 0, 0, 0, 0]
-U8tempY = [0, 0, 0, 0, 0, 0, 0, 0, 0]
-U8tempZ = [0, 0, 0, 0, 0, 0, 0, 0, 0]
 GyroOffset = [0, 0, 0]
 Ki = 1.0
 Kp = 4.50
@@ -57,6 +56,17 @@ REG_ADD_GYRO_YOUT_L = 0x36
 REG_ADD_GYRO_ZOUT_H = 0x37
 REG_ADD_GYRO_ZOUT_L = 0x38
 REG_ADD_EXT_SENS_DATA_00 = 0x3B
+REG_ADD_FIFO_EN_1 = 0x66
+REG_VAL_BIT_SLV_0_FIFO_EN = 0x01
+REG_ADD_FIFO_EN_2 = 0x67
+REG_VAL_BIT_ACCEL_FIFO_EN = 0x10
+REG_VAL_BIT_GYRO_FIFO_EN = 0x0E  # x, y and z
+REG_ADD_FIFO_RST = 0x68
+REG_VAL_FIFO_RST_ALL = 0x1F
+REG_ADD_FIFO_MODE = 0x69
+REG_VAL_FIFO_MODE_SNAPSHOT = 0x01  # stop writing when full instead of overwriting
+REG_ADD_FIFO_COUNTH = 0x70
+REG_ADD_FIFO_R_W = 0x72
 REG_ADD_REG_BANK_SEL = 0x7F
 REG_VAL_REG_BANK_0 = 0x00
 REG_VAL_REG_BANK_1 = 0x10
@@ -75,6 +85,7 @@ REG_VAL_BIT_GYRO_FS_500DPS = 0x02  # bit[2:1]
 REG_VAL_BIT_GYRO_FS_1000DPS = 0x04  # bit[2:1]
 REG_VAL_BIT_GYRO_FS_2000DPS = 0x06  # bit[2:1]
 REG_VAL_BIT_GYRO_DLPF = 0x01  # bit[0]
+REG_ADD_ACCEL_SMPLRT_DIV_1 = 0x10
 REG_ADD_ACCEL_SMPLRT_DIV_2 = 0x11
 REG_ADD_ACCEL_CONFIG = 0x14
 REG_VAL_BIT_ACCEL_DLPCFG_2 = 0x10  # bit[5:3]
@@ -105,7 +116,8 @@ REG_ADD_MAG_WIA1 = 0x00
 REG_VAL_MAG_WIA1 = 0x48
 REG_ADD_MAG_WIA2 = 0x01
 REG_VAL_MAG_WIA2 = 0x09
-REG_ADD_MAG_ST2 = 0x10
+REG_ADD_MAG_ST1 = 0x10
+REG_ADD_MAG_ST2 = 0x18
 REG_ADD_MAG_DATA = 0x11
 REG_ADD_MAG_CNTL2 = 0x31
 REG_VAL_MAG_MODE_PD = 0x00
@@ -118,12 +130,24 @@ REG_VAL_MAG_MODE_ST = 0x10
 # define ICM-20948 MAG Register  end
 
 MAG_DATA_LEN = 6
+MAG_STREAM_LEN = 9  # ST1, HXL..HZH, TMPS, ST2; reading through ST2 releases the next sample
+MAG_BIT_HOFL = 0x08  # ST2 magnetic sensor overflow
+MOTION_DATA_LEN = 23  # accel, gyro, temperature and the streamed magnetometer block from EXT_SENS_DATA_00
+INTERNAL_SAMPLE_RATE = 1125.0  # Hz, divided by 1 + SMPLRT_DIV
+FIFO_SIZE = 512
+FIFO_BURST_LEN = 32  # SMBus block transfer limit
+FIFO_PACKET_FORMAT = ">6hB6s2B"  # accel, gyro, then ST1, HXL..HZH, TMPS, ST2 from slave 0
+FIFO_PACKET_LEN = struct.calcsize(FIFO_PACKET_FORMAT)
 
 
 class ICM20948(object):
-    def __init__(self, address=I2C_ADD_ICM20948):
+    fifo_capacity = FIFO_SIZE // FIFO_PACKET_LEN
+
+    def __init__(self, address=I2C_ADD_ICM20948, bus=None):
         self._address = address
-        self._bus = smbus.SMBus(1)
+        self._bus = I2CBus() if bus is None else bus
+        self.sample_rate = INTERNAL_SAMPLE_RATE / (1 + 0x07)
+        self.fifo_overflows = 0
         bRet = self.icm20948Check()  # Initialization of the device multiple times after power on will result in a return error
         time.sleep(0.5)  # We can skip this detection by delaying it by 500 milliseconds
         # user bank 0 register
@@ -143,73 +167,122 @@ class ICM20948(object):
         self.GyroOffset()
         self.MagCheck()
         self.WriteSecondary(I2C_ADD_ICM20948_AK09916 | I2C_ADD_ICM20948_AK09916_WRITE, REG_ADD_MAG_CNTL2, REG_VAL_MAG_MODE_20HZ)
+        self.StartMagStream()
+
+    def StartMagStream(self):
+        """Let the I2C master copy each magnetometer sample into EXT_SENS_DATA on its own.
+
+        The magnetometer then reads as part of the main register block instead
+        of through a secondary transaction per value.
+        """
+        with self._bus.lock:
+            self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_3)
+            self._write_byte(REG_ADD_I2C_SLV1_CTRL, 0x00)  # stop repeating the mode write
+            self._write_byte(REG_ADD_I2C_SLV0_ADDR, I2C_ADD_ICM20948_AK09916 | I2C_ADD_ICM20948_AK09916_READ)
+            self._write_byte(REG_ADD_I2C_SLV0_REG, REG_ADD_MAG_ST1)
+            self._write_byte(REG_ADD_I2C_SLV0_CTRL, REG_VAL_BIT_SLV0_EN | MAG_STREAM_LEN)
+            self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_0)
+            self._write_byte(REG_ADD_USER_CTRL, self._read_byte(REG_ADD_USER_CTRL) | REG_VAL_BIT_I2C_MST_EN)
+
+    def SetSampleRate(self, rate):
+        """Program the gyroscope and accelerometer dividers for ``rate`` Hz; returns the rate actually used."""
+        divider = min(max(round(INTERNAL_SAMPLE_RATE / rate) - 1, 0), 0xFF)
+        with self._bus.lock:
+            self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_2)
+            self._write_byte(REG_ADD_GYRO_SMPLRT_DIV, divider)
+            self._write_byte(REG_ADD_ACCEL_SMPLRT_DIV_1, 0x00)
+            self._write_byte(REG_ADD_ACCEL_SMPLRT_DIV_2, divider)
+            self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_0)
+        self.sample_rate = INTERNAL_SAMPLE_RATE / (1 + divider)
+        return self.sample_rate
+
+    def StartFIFO(self):
+        """Buffer every accelerometer, gyroscope and streamed magnetometer sample in the FIFO.
+
+        Call after ``StartMagStream``. Snapshot mode keeps packets aligned when
+        the FIFO fills up; ``ReadFIFO`` then resets it and counts an overflow.
+        """
+        with self._bus.lock:
+            self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_0)
+            self._write_byte(REG_ADD_FIFO_EN_1, REG_VAL_BIT_SLV_0_FIFO_EN)
+            self._write_byte(REG_ADD_FIFO_EN_2, REG_VAL_BIT_ACCEL_FIFO_EN | REG_VAL_BIT_GYRO_FIFO_EN)
+            self._write_byte(REG_ADD_FIFO_MODE, REG_VAL_FIFO_MODE_SNAPSHOT)
+            self._reset_fifo()
+            self._write_byte(REG_ADD_USER_CTRL, self._read_byte(REG_ADD_USER_CTRL) | REG_VAL_BIT_FIFO_EN)
+
+    def ReadFIFO(self):
+        """Drain the whole packets in the FIFO.
+
+        Returns ``(accel, gyro, mag)`` tuples, oldest first, decoded like
+        ``MotionRead``. The bytes are read in ``FIFO_BURST_LEN`` bursts and
+        unpacked together.
+        """
+        with self._bus.lock:
+            self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_0)
+            count = struct.unpack(">H", bytes(self._read_block(REG_ADD_FIFO_COUNTH, 2)))[0] & 0x1FFF
+            length = count - count % FIFO_PACKET_LEN
+            data = bytearray()
+            while len(data) < length:
+                data += bytes(self._read_block(REG_ADD_FIFO_R_W, min(FIFO_BURST_LEN, length - len(data))))
+            if count + FIFO_PACKET_LEN > FIFO_SIZE:
+                # Full: samples were dropped, and a partial packet may follow the last whole one.
+                self._reset_fifo()
+                self.fifo_overflows += 1
+
+        samples = []
+        mag = tuple(Mag)
+        for ax, ay, az, gx, gy, gz, _, mag_data, _, st2 in struct.iter_unpack(FIFO_PACKET_FORMAT, data):
+            if not st2 & MAG_BIT_HOFL:
+                x, y, z = struct.unpack("<3h", mag_data)
+                mag = (x, -y, -z)
+            gyro = (gx - GyroOffset[0], gy - GyroOffset[1], gz - GyroOffset[2])
+            samples.append(((ax, ay, az), gyro, mag))
+        return samples
+
+    def _reset_fifo(self):
+        self._write_byte(REG_ADD_FIFO_RST, REG_VAL_FIFO_RST_ALL)
+        self._write_byte(REG_ADD_FIFO_RST, 0x00)
 
     def Gyro_Accel_Read(self):
-        self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_0)
-        data = self._read_block(REG_ADD_ACCEL_XOUT_H, 12)
-        self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_2)
-        Accel[0] = (data[0] << 8) | data[1]
-        Accel[1] = (data[2] << 8) | data[3]
-        Accel[2] = (data[4] << 8) | data[5]
-        Gyro[0] = ((data[6] << 8) | data[7]) - GyroOffset[0]
-        Gyro[1] = ((data[8] << 8) | data[9]) - GyroOffset[1]
-        Gyro[2] = ((data[10] << 8) | data[11]) - GyroOffset[2]
-        if Accel[0] >= 32767:  # Solve the problem that Python shift will not overflow
-            Accel[0] = Accel[0] - 65535
-        elif Accel[0] <= -32767:
-            Accel[0] = Accel[0] + 65535
-        if Accel[1] >= 32767:
-            Accel[1] = Accel[1] - 65535
-        elif Accel[1] <= -32767:
-            Accel[1] = Accel[1] + 65535
-        if Accel[2] >= 32767:
-            Accel[2] = Accel[2] - 65535
-        elif Accel[2] <= -32767:
-            Accel[2] = Accel[2] + 65535
-        if Gyro[0] >= 32767:
-            Gyro[0] = Gyro[0] - 65535
-        elif Gyro[0] <= -32767:
-            Gyro[0] = Gyro[0] + 65535
-        if Gyro[1] >= 32767:
-            Gyro[1] = Gyro[1] - 65535
-        elif Gyro[1] <= -32767:
-            Gyro[1] = Gyro[1] + 65535
-        if Gyro[2] >= 32767:
-            Gyro[2] = Gyro[2] - 65535
-        elif Gyro[2] <= -32767:
-            Gyro[2] = Gyro[2] + 65535
+        with self._bus.lock:
+            self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_0)
+            data = self._read_block(REG_ADD_ACCEL_XOUT_H, 12)
+        self._decode_accel_gyro(data)
 
     def MagRead(self):
-        counter = 20
-        while counter > 0:
-            time.sleep(0.01)
-            self.icm20948ReadSecondary(I2C_ADD_ICM20948_AK09916 | I2C_ADD_ICM20948_AK09916_READ, REG_ADD_MAG_ST2, 1)
-            if (pu8data[0] & 0x01) != 0:
-                break
-            counter -= 1
-        if counter != 0:
-            for i in range(0, 8):
-                self.icm20948ReadSecondary(I2C_ADD_ICM20948_AK09916 | I2C_ADD_ICM20948_AK09916_READ, REG_ADD_MAG_DATA, MAG_DATA_LEN)
-                U8tempX[i] = (pu8data[1] << 8) | pu8data[0]
-                U8tempY[i] = (pu8data[3] << 8) | pu8data[2]
-                U8tempZ[i] = (pu8data[5] << 8) | pu8data[4]
-            Mag[0] = (U8tempX[0] + U8tempX[1] + U8tempX[2] + U8tempX[3] + U8tempX[4] + U8tempX[5] + U8tempX[6] + U8tempX[7]) / 8
-            Mag[1] = -(U8tempY[0] + U8tempY[1] + U8tempY[2] + U8tempY[3] + U8tempY[4] + U8tempY[5] + U8tempY[6] + U8tempY[7]) / 8
-            Mag[2] = -(U8tempZ[0] + U8tempZ[1] + U8tempZ[2] + U8tempZ[3] + U8tempZ[4] + U8tempZ[5] + U8tempZ[6] + U8tempZ[7]) / 8
-        if Mag[0] >= 32767:  # Solve the problem that Python shift will not overflow
-            Mag[0] = Mag[0] - 65535
-        elif Mag[0] <= -32767:
-            Mag[0] = Mag[0] + 65535
-        if Mag[1] >= 32767:
-            Mag[1] = Mag[1] - 65535
-        elif Mag[1] <= -32767:
-            Mag[1] = Mag[1] + 65535
-        if Mag[2] >= 32767:
-            Mag[2] = Mag[2] - 65535
-        elif Mag[2] <= -32767:
-            Mag[2] = Mag[2] + 65535
+        with self._bus.lock:
+            self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_0)
+            data = self._read_block(REG_ADD_EXT_SENS_DATA_00, MAG_STREAM_LEN)
+        self._decode_mag(data)
+
+    def MotionRead(self):
+        """Accelerometer, gyroscope and magnetometer in one block read."""
+        with self._bus.lock:
+            self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_0)
+            data = self._read_block(REG_ADD_ACCEL_XOUT_H, MOTION_DATA_LEN)
+        self._decode_accel_gyro(data[:12])
+        self._decode_mag(data[REG_ADD_EXT_SENS_DATA_00 - REG_ADD_ACCEL_XOUT_H :])
+
+    def _decode_accel_gyro(self, data):
+        values = struct.unpack(">6h", bytes(data))
+        Accel[0:3] = values[0:3]
+        Gyro[0] = values[3] - GyroOffset[0]
+        Gyro[1] = values[4] - GyroOffset[1]
+        Gyro[2] = values[5] - GyroOffset[2]
+
+    def _decode_mag(self, data):
+        if data[MAG_STREAM_LEN - 1] & MAG_BIT_HOFL:
+            return
+        x, y, z = struct.unpack("<3h", bytes(data[1 : 1 + MAG_DATA_LEN]))
+        Mag[0] = x
+        Mag[1] = -y
+        Mag[2] = -z
 
     def icm20948ReadSecondary(self, u8I2CAddr, u8RegAddr, u8Len):
+        with self._bus.lock:
+            self._read_secondary(u8I2CAddr, u8RegAddr, u8Len)
+
+    def _read_secondary(self, u8I2CAddr, u8RegAddr, u8Len):
         u8Temp = 0
         self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_3)  # swtich bank3
         self._write_byte(REG_ADD_I2C_SLV0_ADDR, u8I2CAddr)
@@ -225,8 +298,7 @@ class ICM20948(object):
         u8Temp &= ~REG_VAL_BIT_I2C_MST_EN
         self._write_byte(REG_ADD_USER_CTRL, u8Temp)
 
-        for i in range(0, u8Len):
-            pu8data[i] = self._read_byte(REG_ADD_EXT_SENS_DATA_00 + i)
+        pu8data[0:u8Len] = self._read_block(REG_ADD_EXT_SENS_DATA_00, u8Len)
 
         self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_3)  # swtich bank3
 
@@ -237,6 +309,10 @@ class ICM20948(object):
         self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_0)  # swtich bank0
 
     def WriteSecondary(self, u8I2CAddr, u8RegAddr, u8data):
+        with self._bus.lock:
+            self._write_secondary(u8I2CAddr, u8RegAddr, u8data)
+
+    def _write_secondary(self, u8I2CAddr, u8RegAddr, u8data):
         u8Temp = 0
         self._write_byte(REG_ADD_REG_BANK_SEL, REG_VAL_REG_BANK_3)  # swtich bank3
         self._write_byte(REG_ADD_I2C_SLV1_ADDR, u8I2CAddr)
@@ -282,21 +358,19 @@ class ICM20948(object):
         return self._bus.read_i2c_block_data(self._address, reg, length)
 
     def _read_u16(self, cmd):
-        LSB = self._bus.read_byte_data(self._address, cmd)
-        MSB = self._bus.read_byte_data(self._address, cmd + 1)
+        LSB, MSB = self._bus.read_i2c_block_data(self._address, cmd, 2)
         return (MSB << 8) + LSB
 
     def _write_byte(self, cmd, val):
         self._bus.write_byte_data(self._address, cmd, val)
         time.sleep(0.0001)
 
-    def imuAHRSupdata(self, gx, gy, gz, ax, ay, az, mx, my, mz):
+    def imuAHRSupdata(self, gx, gy, gz, ax, ay, az, mx, my, mz, halfT=0.024):
         norm = 0.0
         hx = hy = hz = bx = bz = 0.0
         vx = vy = vz = wx = wy = wz = 0.0
         exInt = eyInt = ezInt = 0.0
         ex = ey = ez = 0.0
-        halfT = 0.024
         global q0
         global q1
         global q2
@@ -387,13 +461,24 @@ class ICM20948(object):
         MotionVal[8] = Mag[2]
         return MotionVal
 
-    def getdata(self):
-        self.Gyro_Accel_Read()
-        self.MagRead()
-
+    def getdata(self, halfT=0.024):
+        """Read the sensors and advance the fusion by one step; ``halfT`` is half the time since the last step."""
+        self.MotionRead()
+        return self._fuse(halfT)
+
+    def getfifo(self):
+        """Fuse every sample buffered since the last call; returns one ``getdata`` row per sample, oldest first."""
+        rows = []
+        for accel, gyro, mag in self.ReadFIFO():
+            Accel[0:3] = accel
+            Gyro[0:3] = gyro
+            Mag[0:3] = mag
+            rows.append(self._fuse(0.5 / self.sample_rate))
+        return rows
+
+    def _fuse(self, halfT):
         MotionVal = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
         MotionVal = self.CalAvgValue()
-        time.sleep(0.1)
         self.imuAHRSupdata(
             MotionVal[0] * 0.0175,
             MotionVal[1] * 0.0175,
@@ -404,6 +489,7 @@ class ICM20948(object):
             MotionVal[6],
             MotionVal[7],
             MotionVal[8],
+            halfT=halfT,
         )
 
         pitch = math.asin(-2 * q1 * q3 + 2 * q0 * q2) * 57.3
@@ -1,5 +1,6 @@
 import time
-import smbus
+
+from umd_client.sensors.i2c import I2CBus
 
 ADDR = 0x53
 
@@ -39,8 +40,8 @@ GAIN_18 = 0x4
 
 
 class LTR390:
-    def __init__(self, address=ADDR):
-        self.i2c = smbus.SMBus(1)
+    def __init__(self, address=ADDR, bus=None):
+        self.i2c = I2CBus() if bus is None else bus
         self.address = address
         self.ID = self.Read_Byte(LTR390_PART_ID)
         # print("ID = %#x" %self.ID)
@@ -61,9 +62,7 @@ class LTR390:
 
     def UVS(self):
         # self.Write_Byte(LTR390_MAIN_CTRL, 0x0A) #  UVS in Active Mode
-        Data1 = self.Read_Byte(LTR390_UVSDATA)
-        Data2 = self.Read_Byte(LTR390_UVSDATA + 1)
-        Data3 = self.Read_Byte(LTR390_UVSDATA + 2)
+        Data1, Data2, Data3 = self.i2c.read_i2c_block_data(self.address, LTR390_UVSDATA, 3)
         uv = (Data3 << 16) | (Data2 << 8) | Data1
         # UVS = Data3*65536+Data2*256+Data1
         # print("UVS = ", UVS)
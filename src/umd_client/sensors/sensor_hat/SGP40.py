@@ -2,7 +2,8 @@
 # -*- coding:utf-8 -*-
 
 import time
-import smbus
+
+from umd_client.sensors.i2c import I2CBus
 
 # import ctypes
 
@@ -40,12 +41,14 @@ WITHOUT_HUM_COMP = [0x26, 0x0F, 0x80, 0x00, 0xA2, 0x66, 0x66, 0x93]  # default T
 WITH_HUM_COMP = [0x26, 0x0F, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]  # Manual input
 
 ADDR = 0x59
+MEASURE_RAW_DELAY = 0.5  # seconds between the measure command and reading the result
 
 
 class SGP40:
-    def __init__(self, address=ADDR):
-        self.i2c = smbus.SMBus(1)
+    def __init__(self, address=ADDR, bus=None):
+        self.i2c = I2CBus() if bus is None else bus
         self.address = address
+        self._ready_at = 0.0
 
         # feature set 0x3240/0x3220
         self.write(SGP40_CMD_FEATURE_SET)
@@ -84,6 +87,11 @@ class SGP40:
         return (int(Rbuf[0]) << 8) | Rbuf[1]
 
     def measureRaw(self, temperature, humidity):
+        self.startMeasureRaw(temperature, humidity)
+        return self.readMeasureRaw()
+
+    def startMeasureRaw(self, temperature, humidity):
+        """Send a compensated measurement command; the result is collected by readMeasureRaw."""
         # 2*humi + CRC
         # paramh = struct.pack(">H", math.ceil(humidity * 0xffff / 100))
         h = int(humidity * 0xFFFF / 100)
@@ -96,14 +104,15 @@ class SGP40:
         paramt = (t >> 8, t & 0xFF)
         crct = self.__crc(paramt[0], paramt[1])
 
-        WITH_HUM_COMP[2:3] = paramh
-        WITH_HUM_COMP[4] = int(crch)
-        WITH_HUM_COMP[5:6] = paramt
-        WITH_HUM_COMP[7] = int(crct)
-        # print(WITH_HUM_COMP)
-        self.write_block(WITH_HUM_COMP)
+        command = WITH_HUM_COMP[:2] + [*paramh, int(crch), *paramt, int(crct)]
+        self.write_block(command)
+        self._ready_at = time.monotonic() + MEASURE_RAW_DELAY
 
-        time.sleep(0.5)
+    def readMeasureRaw(self):
+        """Wait for the conversion started by startMeasureRaw to finish and return it."""
+        delay = self._ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
         Rbuf = self.Read()
         # print(Rbuf)
         return (int(Rbuf[0]) << 8) | Rbuf[1]
@@ -3,7 +3,8 @@
 
 import sys
 import time
-import smbus
+
+from umd_client.sensors.i2c import I2CBus
 
 ADDR = 0x29
 
@@ -84,8 +85,8 @@ INI_PIN = 23
 
 
 class TSL2591:
-    def __init__(self, address=ADDR):
-        self.i2c = smbus.SMBus(1)
+    def __init__(self, address=ADDR, bus=None):
+        self.i2c = I2CBus() if bus is None else bus
         self.address = address
 
         self.ID = self.Read_Byte(ID_REGISTER)
@@ -119,10 +120,8 @@ class TSL2591:
         self.i2c.write_byte_data(self.address, Addr, val & 0xFF)
 
     def Read_2Channel(self):
-        CH0L = self.Read_Byte(CHAN0_LOW)
-        CH0H = self.Read_Byte(CHAN0_LOW + 1)
-        CH1L = self.Read_Byte(CHAN0_LOW + 2)
-        CH1H = self.Read_Byte(CHAN0_LOW + 3)
+        # The command bit auto-increments the register address, so both channels come in one burst.
+        CH0L, CH0H, CH1L, CH1H = self.i2c.read_i2c_block_data(self.address, COMMAND_BIT | CHAN0_LOW, 4)
         full = (CH0H << 8) | CH0L
         ir = (CH1H << 8) | CH1L
         return full, ir
@@ -1,43 +1,66 @@
+import logging
 import math
 import time
 
+from umd_client.sensors.i2c import I2CBus
+from umd_client.sensors.imu import IMUService, MotionSnapshot
 from umd_client.sensors.types import Reading
 
+logger = logging.getLogger(__name__)
+
 CORE_FIELDS = ["time", "temperature", "humidity", "pressure", "lux", "uv", "shake"]
 
 
-def build_reading(raw_data, timestamp: int | None = None) -> Reading:
+def build_reading(raw_data, timestamp: int | None = None, motion: MotionSnapshot | None = None) -> Reading:
+    """Map a ``Sensor_HAT.read`` result to the uploaded fields.
+
+    Without ``motion``, ``shake`` is the magnitude of the one gyroscope sample in
+    ``raw_data``. With a snapshot from the IMU service it is the RMS over the
+    service's window, and ``shake_peak`` and ``shake_crossing_rate`` are added.
+    """
     timestamp = int(time.time()) if timestamp is None else timestamp
     gyroscope = raw_data[12:15]
     shake = math.sqrt(pow(gyroscope[0], 2) + pow(gyroscope[1], 2) + pow(gyroscope[2], 2))
-    return Reading(
-        timestamp=timestamp,
-        data={
-            "time": timestamp,
-            "temperature": raw_data[0],
-            "humidity": raw_data[1],
-            "pressure": raw_data[2],
-            "lux": raw_data[3],
-            "uv": raw_data[4],
-            "shake": shake,
-        },
-    )
+    data = {
+        "time": timestamp,
+        "temperature": raw_data[0],
+        "humidity": raw_data[1],
+        "pressure": raw_data[2],
+        "lux": raw_data[3],
+        "uv": raw_data[4],
+        "shake": shake,
+    }
+    if motion is not None:
+        data["shake"] = round(motion.shake_rms, 2)
+        data["shake_peak"] = round(motion.shake_peak, 2)
+        data["shake_crossing_rate"] = round(motion.crossing_rate, 2)
+    return Reading(timestamp=timestamp, data=data)
 
 
 class Sensor_HAT:
-    def __init__(self) -> None:
+    imu: IMUService | None = None
+    motion: MotionSnapshot | None = None
+
+    def __init__(
+        self, bus=None, imu_rate: float | None = None, imu_window: float = 10.0, imu_fifo: bool = True
+    ) -> None:
         from umd_client.sensors.sensor_hat.BME280 import BME280  # Atmospheric Pressure/Temperature and humidity
         from umd_client.sensors.sensor_hat.ICM20948 import ICM20948  # Gyroscope/Acceleration/Magnetometer
         from umd_client.sensors.sensor_hat.LTR390 import LTR390  # UV
         from umd_client.sensors.sensor_hat.SGP40 import SGP40  # Gas
         from umd_client.sensors.sensor_hat.TSL2591 import TSL2591  # LIGHT
 
-        self.icm = ICM20948()
-        self.bme = BME280()
+        self.bus = I2CBus() if bus is None else bus
+        self.icm = ICM20948(bus=self.bus)
+        self.bme = BME280(bus=self.bus)
         self.bme.get_calib_param()
-        self.uv = LTR390()
-        self.light = TSL2591()
-        self.sgp = SGP40()
+        self.uv = LTR390(bus=self.bus)
+        self.light = TSL2591(bus=self.bus)
+        self.sgp = SGP40(bus=self.bus)
+        self.latency = 0.0
+        if imu_rate is not None:
+            self.imu = IMUService(self.icm, rate=imu_rate, window=imu_window, fifo=imu_fifo)
+            self.imu.start()
 
     def information(self):
         print("TSL2591 Light I2C address:0X29")
@@ -47,16 +70,27 @@ class Sensor_HAT:
         print("bme280 T&H I2C address:0X76")
 
     def read(self):
+        """Read every chip once.
+
+        The SGP40 conversion is the longest wait, so it is started as soon as
+        the BME280 has supplied temperature and humidity for its compensation;
+        the IMU and light sensors are read while it runs and the gas value is
+        collected last. ``latency`` holds the wall time of the last read.
+        With an IMU service running, motion comes from its latest snapshot
+        (kept in ``motion``) instead of a read of the ICM20948.
+        """
+        started = time.perf_counter()
         bme = self.bme.readData()
-        icm = self.icm.getdata()
-        bme = self.bme.readData()
-        icm = self.icm.getdata()
         self.pressure = round(bme[0], 2)
         self.temp = round(bme[1], 2)
         self.hum = round(bme[2], 2)
+        self.sgp.startMeasureRaw(int(self.temp), int(self.hum))
+        icm = self.icm.getdata() if self.imu is None else self._motion()
         self.lux = round(self.light.Lux(), 2)
         self.uvs = self.uv.UVS()
-        self.gas = round(self.sgp.measureRaw(int(self.temp), int(self.hum)), 2)
+        self.gas = round(self.sgp.readMeasureRaw(), 2)
+        self.latency = time.perf_counter() - started
+        logger.debug("Sensor HAT read took %.3f seconds", self.latency)
         self.roll, self.pitch, self.yaw = round(icm[0], 2), round(icm[1], 2), round(icm[2], 2)
         self.acceleration = (round(icm[3]), round(icm[4]), round(icm[5]))
         self.gyroscope = (round(icm[6]), round(icm[7]), round(icm[8]))
@@ -69,6 +103,16 @@ class Sensor_HAT:
         )
         return data
 
+    def close(self) -> None:
+        if self.imu is not None:
+            self.imu.stop(timeout=1)
+
+    def _motion(self):
+        self.motion = self.imu.read(timeout=1.0)
+        if self.motion is None:
+            raise RuntimeError("IMU service has not produced a sample yet")
+        return list(self.motion.motion)
+
     def packed_data(self):
         timestamp = int(time.time())
         return build_reading(
@@ -91,8 +135,17 @@ class Sensor_HAT:
 
 
 class SensorHatSensor:
-    def __init__(self) -> None:
-        self.sensor = Sensor_HAT()
+    def __init__(
+        self,
+        bus: I2CBus | None = None,
+        imu_rate: float | None = None,
+        imu_window: float = 10.0,
+        imu_fifo: bool = True,
+    ) -> None:
+        self.sensor = Sensor_HAT(bus=bus, imu_rate=imu_rate, imu_window=imu_window, imu_fifo=imu_fifo)
 
     def read(self) -> Reading:
-        return build_reading(self.sensor.read())
+        return build_reading(self.sensor.read(), motion=self.sensor.motion)
+
+    def close(self) -> None:
+        self.sensor.close()
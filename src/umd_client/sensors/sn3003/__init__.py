@@ -1,13 +1,15 @@
-import datetime
-import os
 import time
 import tomllib
 from collections import deque
 from importlib import resources
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 
 from umd_client.sensors.types import Reading
+from umd_client.storage.archive import ArchiveWriter
+from umd_client.storage.ringfile import RingFile
+
+LATEST_MEAN_FILENAME = "latest_mean.ring"
 
 
 class SN3003FSXCSN01:
@@ -31,10 +33,13 @@ class SN3003FSXCSN01:
                 self.config = tomllib.load(f)
 
         self.code: dict[str, Any] = self.config["SN3003FSXCSN01"]
+        self.archive_options: dict[str, Any] = dict(self.config.get("archive", {}))
         self.names = ["time"] + list(self.config["SN3003FSXCSN01"]["names"])
         self.funcs = ["wind_speed", "wind_angle", "noise", "pm2dot5", "pm10", "pressure", "rain"]
         self.mem_data = deque(maxlen=60)
         self.trans_data = 0.0
+        self.latest_mean: RingFile | None = None
+        self.archive: ArchiveWriter | None = None
 
         self.port = serial.Serial(
             port,
@@ -87,9 +92,10 @@ class SN3003FSXCSN01:
         self.mem_data.append(sensor_data)
 
     def save(self, path: str | Path, storage_size: int) -> None:
-        """Save raw readings and rolling mean CSV files."""
-        now = datetime.datetime.now()
-        year, month, day = str(now.year), str(now.month), str(now.day)
+        """Archive new raw readings to the daily CSV and append the rolling mean to ``latest_mean.ring``.
+
+        The archive's flush and fsync policy comes from the ``[archive]`` table of the sensor configuration.
+        """
         timestamp = int(time.time())
         data_transposition = list(zip(*list(self.mem_data), strict=False))
         del data_transposition[0]
@@ -100,31 +106,46 @@ class SN3003FSXCSN01:
         self.trans_data = mean_result
 
         base_path = Path(path)
-        everyday = base_path / year / month / f"{day}.csv"
-        latest_mean = base_path / "latest_mean.csv"
-
-        os.makedirs(base_path / year / month, exist_ok=True)
-
-        if not everyday.exists():
-            everyday.write_text(",".join(self.names) + "\n", encoding="utf-8")
-        if not latest_mean.exists():
-            latest_mean.write_text(",".join(self.names) + "\n", encoding="utf-8")
-
-        with everyday.open("a", encoding="utf-8") as f:
-            for data in list(self.mem_data):
-                f.write(",".join(map(str, data)) + "\n")
-
-        with latest_mean.open("r+", encoding="utf-8") as f:
-            f.seek(0)
-            rows = f.readlines()
-            titles = [rows[0]]
-            if len(rows) > storage_size + 1:
-                rows = titles + rows[-storage_size:] + [",".join(map(str, mean_result)) + "\n"]
-            else:
-                rows = rows + [",".join(map(str, mean_result)) + "\n"]
-            f.seek(0)
-            f.truncate()
-            f.writelines(rows)
+        if self.archive is None or self.archive.base_path != base_path:
+            if self.archive is not None:
+                self.archive.close()
+            self.archive = ArchiveWriter(base_path, self.names, **self.archive_options)
+        # mem_data overlaps the previous save; the writer only appends rows it has not written yet.
+        self.archive.write_rows(self.mem_data)
+
+        latest_mean = base_path / LATEST_MEAN_FILENAME
+        ring = self.latest_mean
+        if ring is None or ring.path != latest_mean or ring.capacity != storage_size:
+            if ring is not None:
+                ring.close()
+            self.latest_mean = RingFile(latest_mean, self.names, storage_size)
+        self.latest_mean.append(mean_result)
+
+    def write_latest_mean_csv(self, out: TextIO) -> int:
+        """Write the rolling-mean history kept by ``save`` as CSV."""
+        if self.latest_mean is None:
+            return 0
+        return self.latest_mean.write_csv(out)
+
+    def close(self) -> None:
+        """Flush the archive and ring file and release the serial port."""
+        if self.archive is not None:
+            self.archive.close()
+        if self.latest_mean is not None:
+            self.latest_mean.close()
+        self.port.close()
+
+
+def export_latest_mean_csv(base_path: str | Path, out: TextIO) -> int:
+    """Write the rolling-mean history that ``save`` kept under ``base_path`` as CSV.
+
+    Opens the ring read-only, so it works while a running client owns the sensor.
+    """
+    ring = RingFile.open_readonly(Path(base_path) / LATEST_MEAN_FILENAME)
+    try:
+        return ring.write_csv(out)
+    finally:
+        ring.close()
 
 
 class SN3003Sensor:
@@ -135,3 +156,6 @@ class SN3003Sensor:
         self.sensor.update_mem()
         values = list(self.sensor.mem_data[-1])
         return Reading(timestamp=values[0], data=dict(zip(self.sensor.names, values, strict=False)))
+
+    def close(self) -> None:
+        self.sensor.close()
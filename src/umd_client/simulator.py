@@ -0,0 +1,548 @@
+"""Simulated Sensor HAT and e-Paper hardware.
+
+Register-level models of the chips on the Sensor HAT behind an SMBus-shaped
+``SimulatedSMBus``, and an e-Paper panel with the ``epdconfig`` interface, so
+the unmodified drivers run without a Raspberry Pi. Readings follow smooth,
+deterministic curves of elapsed time, and conversions take as long as on the
+real parts: reading the SGP40 early fails like a NACK, and the light sensors
+only latch a new value once per integration period.
+
+Selected with ``hardware = "simulated"`` in the configuration or by setting
+``UMD_HARDWARE=simulated`` in the environment.
+"""
+
+import math
+import os
+import struct
+import time
+from collections import deque
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+
+HARDWARE_ENV = "UMD_HARDWARE"
+HARDWARE_BACKENDS = ("auto", "simulated")
+
+Clock = Callable[[], float]
+
+
+def simulation_enabled() -> bool:
+    return os.environ.get(HARDWARE_ENV, "").lower() == "simulated"
+
+
+def _wave(elapsed: float, mean: float, amplitude: float, period: float, phase: float = 0.0) -> float:
+    return mean + amplitude * math.sin(2 * math.pi * elapsed / period + phase)
+
+
+@dataclass
+class Environment:
+    """Deterministic weather and motion as a function of seconds since ``start``."""
+
+    start: float = 0.0
+
+    def temperature(self, now: float) -> float:
+        return _wave(now - self.start, 22.0, 3.0, 600.0)
+
+    def humidity(self, now: float) -> float:
+        return _wave(now - self.start, 55.0, 10.0, 900.0)
+
+    def pressure(self, now: float) -> float:
+        return _wave(now - self.start, 1013.0, 2.0, 1800.0)
+
+    def lux(self, now: float) -> float:
+        return _wave(now - self.start, 800.0, 400.0, 300.0)
+
+    def uv_index(self, now: float) -> float:
+        return _wave(now - self.start, 3.0, 2.0, 1200.0)
+
+    def gas(self, now: float) -> float:
+        return _wave(now - self.start, 30000.0, 1000.0, 450.0)
+
+    def acceleration(self, now: float) -> tuple[float, float, float]:
+        """In g."""
+        elapsed = now - self.start
+        return _wave(elapsed, 0.0, 0.02, 0.77), _wave(elapsed, 0.0, 0.02, 0.77, math.pi / 2), 1.0
+
+    def rotation(self, now: float) -> tuple[float, float, float]:
+        """In degrees per second."""
+        elapsed = now - self.start
+        return _wave(elapsed, 0.0, 0.5, 0.48), _wave(elapsed, 0.0, 0.3, 0.27), _wave(elapsed, 0.0, 0.2, 0.91, 1.0)
+
+    def magnetic_field(self, now: float) -> tuple[float, float, float]:
+        """In microtesla."""
+        elapsed = now - self.start
+        return _wave(elapsed, 25.0, 1.0, 60.0), _wave(elapsed, -5.0, 1.0, 60.0, 1.0), 40.0
+
+
+class RegisterDevice:
+    """A chip with 256 byte-wide registers and an auto-incrementing address pointer."""
+
+    def __init__(self, environment: Environment, clock: Clock) -> None:
+        self.environment = environment
+        self.clock = clock
+        self.registers = bytearray(256)
+
+    def read(self, register: int, length: int) -> list[int]:
+        return list(self.registers[register : register + length])
+
+    def write(self, register: int, data: Sequence[int]) -> None:
+        self.registers[register : register + len(data)] = bytes(data)
+
+
+def _invert(func: Callable[[int], float], target: float, high: int) -> int:
+    """Smallest raw value in ``[0, high]`` whose output reaches ``target``; ``func`` must be monotonic."""
+    low = 0
+    increasing = func(high) >= func(low)
+    while low < high:
+        middle = (low + high) // 2
+        if (func(middle) < target) == increasing:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class BME280Model(RegisterDevice):
+    # dig_T1..T3, dig_P1..P9, dig_H1..H6: typical factory trimming values
+    CALIBRATION_T = (27504, 26435, 50)
+    CALIBRATION_P = (36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000)
+    CALIBRATION_H = (75, 362, 0, 313, 50, 30)
+
+    def __init__(self, environment: Environment, clock: Clock) -> None:
+        super().__init__(environment, clock)
+        self.registers[0xD0] = 0x60
+        self.registers[0x88:0xA0] = struct.pack("<HhhHhhhhhhhh", *self.CALIBRATION_T, *self.CALIBRATION_P)
+        h1, h2, h3, h4, h5, h6 = self.CALIBRATION_H
+        self.registers[0xA1] = h1
+        self.registers[0xE1:0xE8] = struct.pack(
+            "<hBBBBb", h2, h3, (h4 >> 4) & 0xFF, (h4 & 0x0F) | ((h5 & 0x0F) << 4), (h5 >> 4) & 0xFF, h6
+        )
+
+    def read(self, register: int, length: int) -> list[int]:
+        if register + length > 0xF7:
+            self._measure()
+        return super().read(register, length)
+
+    def _measure(self) -> None:
+        now = self.clock()
+        adc_t = _invert(lambda raw: self._t_fine(raw) / 5120.0, self.environment.temperature(now), (1 << 20) - 1)
+        t_fine = self._t_fine(adc_t)
+        adc_p = _invert(lambda raw: self._pressure(raw, t_fine), self.environment.pressure(now), (1 << 20) - 1)
+        adc_h = _invert(lambda raw: self._humidity(raw, t_fine), self.environment.humidity(now), 0xFFFF)
+        # 20-bit pressure and temperature are left-aligned in three bytes each
+        self.registers[0xF7:0xFF] = (
+            (adc_p << 4).to_bytes(3, "big") + (adc_t << 4).to_bytes(3, "big") + struct.pack(">H", adc_h)
+        )
+
+    def _t_fine(self, adc_t: int) -> float:
+        t1, t2, t3 = self.CALIBRATION_T
+        v1 = (adc_t / 16384.0 - t1 / 1024.0) * t2
+        v2 = (adc_t / 131072.0 - t1 / 8192.0) ** 2 * t3
+        return v1 + v2
+
+    def _pressure(self, adc_p: int, t_fine: float) -> float:
+        p1, p2, p3, p4, p5, p6, p7, p8, p9 = self.CALIBRATION_P
+        v1 = t_fine / 2.0 - 64000.0
+        v2 = (v1 / 4.0) ** 2 / 2048 * p6 + v1 * p5 * 2.0
+        v2 = v2 / 4.0 + p4 * 65536.0
+        v1 = ((p3 * ((v1 / 4.0) ** 2 / 8192)) / 8 + p2 * v1 / 2.0) / 262144
+        v1 = (32768 + v1) * p1 / 32768
+        pressure = ((1048576 - adc_p) - v2 / 4096) * 3125
+        pressure = pressure * 2.0 / v1 if pressure < 0x80000000 else pressure / v1 * 2
+        v1 = p9 * ((pressure / 8.0) ** 2 / 8192.0) / 4096
+        v2 = pressure / 4.0 * p8 / 8192.0
+        return (pressure + (v1 + v2 + p7) / 16.0) / 100
+
+    def _humidity(self, adc_h: int, t_fine: float) -> float:
+        h1, h2, h3, h4, h5, h6 = self.CALIBRATION_H
+        var_h = t_fine - 76800.0
+        var_h = (adc_h - (h4 * 64.0 + h5 / 16384.0 * var_h)) * (
+            h2 / 65536.0 * (1.0 + h6 / 67108864.0 * var_h * (1.0 + h3 / 67108864.0 * var_h))
+        )
+        var_h = var_h * (1.0 - h1 * var_h / 524288.0)
+        return min(max(var_h, 0.0), 100.0)
+
+
+class AK09916Model(RegisterDevice):
+    """Magnetometer behind the ICM20948's auxiliary I2C master."""
+
+    def __init__(self, environment: Environment, clock: Clock) -> None:
+        super().__init__(environment, clock)
+        self.registers[0x00:0x02] = bytes([0x48, 0x09])
+
+    def read(self, register: int, length: int) -> list[int]:
+        if self.registers[0x31]:
+            field = self.environment.magnetic_field(self.clock())
+            # 0.15 uT per LSB; ST1 data ready, ST2 no overflow
+            self.registers[0x10:0x19] = bytes([0x01]) + struct.pack("<3h", *(round(v / 0.15) for v in field)) + bytes(2)
+        return super().read(register, length)
+
+
+class ICM20948Model:
+    """Four 128-register user banks, with the AK09916 reached through I2C slaves 0 and 1.
+
+    The FIFO is filled at the rate set by the gyroscope divider whenever it
+    is read, and stops taking packets once full, as in snapshot mode.
+    """
+
+    BANK_SELECT = 0x7F
+    USER_CTRL = 0x03
+    PWR_MGMT_1 = 0x06
+    I2C_MST_EN = 0x20
+    FIFO_EN = 0x40
+    ACCEL_XOUT_H = 0x2D
+    EXT_SENS_DATA_00 = 0x3B
+    FIFO_EN_1 = 0x66
+    FIFO_EN_2 = 0x67
+    FIFO_RST = 0x68
+    FIFO_COUNTH = 0x70
+    FIFO_R_W = 0x72
+    FIFO_SIZE = 512
+
+    def __init__(self, environment: Environment, clock: Clock) -> None:
+        self.environment = environment
+        self.clock = clock
+        self.magnetometer = AK09916Model(environment, clock)
+        self._reset()
+
+    def _reset(self) -> None:
+        self.banks = [bytearray(128) for _ in range(4)]
+        self.banks[0][0x00] = 0xEA
+        self.banks[0][self.PWR_MGMT_1] = 0x41
+        self.bank = 0
+        self._reset_fifo()
+
+    def _reset_fifo(self) -> None:
+        self.fifo = bytearray()
+        self.fifo_started = self.clock()
+        self.fifo_produced = 0
+
+    def read(self, register: int, length: int) -> list[int]:
+        if self.bank == 0 and register == self.FIFO_COUNTH:
+            self._fill_fifo()
+            return list(struct.pack(">H", len(self.fifo))[:length])
+        if self.bank == 0 and register == self.FIFO_R_W:
+            # FIFO_R_W does not auto-increment: a burst pops consecutive bytes
+            self._fill_fifo()
+            data = self.fifo[:length]
+            del self.fifo[:length]
+            return list(data) + [0] * (length - len(data))
+        if self.bank == 0 and register < self.EXT_SENS_DATA_00 + 24 and register + length > self.ACCEL_XOUT_H:
+            self._sample()
+        return list(self.banks[self.bank][register : register + length])
+
+    def write(self, register: int, data: Sequence[int]) -> None:
+        for offset, value in enumerate(data):
+            self._write_byte(register + offset, value)
+
+    def _write_byte(self, register: int, value: int) -> None:
+        if register == self.BANK_SELECT:
+            self.bank = (value >> 4) & 0x03
+            for bank in self.banks:
+                bank[self.BANK_SELECT] = value
+            return
+        if self.bank == 0 and register == self.PWR_MGMT_1 and value & 0x80:
+            self._reset()
+            return
+        if self.bank == 0 and register == self.USER_CTRL and value & self.FIFO_EN and not self._fifo_enabled():
+            self._reset_fifo()
+        self.banks[self.bank][register] = value
+        if self.bank == 0 and register == self.USER_CTRL and value & self.I2C_MST_EN:
+            self._run_slaves()
+        if self.bank == 0 and register == self.FIFO_RST and value & 0x1F:
+            self._reset_fifo()
+
+    def _fifo_enabled(self) -> bool:
+        return bool(self.banks[0][self.USER_CTRL] & self.FIFO_EN)
+
+    def _motion(self, now: float) -> bytes:
+        # +-2 g and +-1000 dps full scale, as configured by the driver
+        accel = [round(g * 16384) for g in self.environment.acceleration(now)]
+        gyro = [round(dps * 32.8) for dps in self.environment.rotation(now)]
+        return struct.pack(">6h", *accel, *gyro)
+
+    def _sample(self) -> None:
+        self.banks[0][self.ACCEL_XOUT_H : self.EXT_SENS_DATA_00] = self._motion(self.clock()) + bytes(2)
+        if self.banks[0][self.USER_CTRL] & self.I2C_MST_EN:
+            self._run_slaves()
+
+    def _fill_fifo(self) -> None:
+        if not self._fifo_enabled():
+            return
+        rate = 1125.0 / (1 + self.banks[2][0x00])
+        due = int((self.clock() - self.fifo_started) * rate)
+        # Packets that would not fit are dropped anyway, so never generate more than a FIFO's worth.
+        for index in range(max(self.fifo_produced, due - self.FIFO_SIZE), due):
+            packet = self._fifo_packet(self.fifo_started + index / rate)
+            if len(self.fifo) + len(packet) <= self.FIFO_SIZE:
+                self.fifo += packet
+        self.fifo_produced = due
+
+    def _fifo_packet(self, now: float) -> bytes:
+        motion = self._motion(now)
+        enabled = self.banks[0][self.FIFO_EN_2]
+        packet = (motion[:6] if enabled & 0x10 else b"") + (motion[6:] if enabled & 0x0E == 0x0E else b"")
+        if enabled & 0x01:
+            packet += bytes(2)
+        if self.banks[0][self.FIFO_EN_1] & 0x01:
+            self._run_slaves()
+            packet += bytes(self.banks[0][self.EXT_SENS_DATA_00 : self.EXT_SENS_DATA_00 + (self.banks[3][0x05] & 0x0F)])
+        return packet
+
+    def _run_slaves(self) -> None:
+        bank3 = self.banks[3]
+        for base in (0x03, 0x07):
+            address, register, control = bank3[base], bank3[base + 1], bank3[base + 2]
+            if not control & 0x80 or address & 0x7F != 0x0C:
+                continue
+            if address & 0x80:
+                length = control & 0x0F
+                self.banks[0][self.EXT_SENS_DATA_00 : self.EXT_SENS_DATA_00 + length] = bytes(
+                    self.magnetometer.read(register, length)
+                )
+            else:
+                self.magnetometer.write(register, [bank3[base + 3]])
+
+
+class TSL2591Model(RegisterDevice):
+    COMMAND_REGISTER = 0x1F
+    SPECIAL_FUNCTION = 0xE0
+    GAINS = {0x00: 1.0, 0x10: 25.0, 0x20: 428.0, 0x30: 9876.0}
+
+    def __init__(self, environment: Environment, clock: Clock) -> None:
+        super().__init__(environment, clock)
+        self.registers[0x12] = 0x50
+        self.enabled_at: float | None = None
+
+    def write(self, register: int, data: Sequence[int]) -> None:
+        if register & self.SPECIAL_FUNCTION == self.SPECIAL_FUNCTION:
+            self.registers[0x13] &= ~0x10 & 0xFF  # clear the ALS interrupt
+            return
+        register &= self.COMMAND_REGISTER
+        super().write(register, data)
+        if register == 0x00:
+            self.enabled_at = self.clock() if data[0] & 0x03 == 0x03 else None
+
+    def read(self, register: int, length: int) -> list[int]:
+        self._integrate()
+        return super().read(register & self.COMMAND_REGISTER, length)
+
+    def _integrate(self) -> None:
+        if self.enabled_at is None:
+            return
+        control = self.registers[0x01]
+        integration = ((control & 0x07) + 1) * 0.1
+        cycles = int((self.clock() - self.enabled_at) / integration)
+        if cycles == 0:
+            return
+        # Counts from the last completed integration, inverting the driver's lux formula with IR at 25% of full.
+        lux = self.environment.lux(self.enabled_at + cycles * integration)
+        counts_per_lux = integration * 1000 * self.GAINS[control & 0x30] / 408.0
+        full = min(round(lux * counts_per_lux / 0.5625), 0xFFFF)
+        self.registers[0x13] |= 0x01
+        self.registers[0x14:0x18] = struct.pack("<HH", full, full // 4)
+
+
+class LTR390Model(RegisterDevice):
+    RATES = {0: 0.025, 1: 0.05, 2: 0.1, 3: 0.2, 4: 0.5, 5: 1.0, 6: 2.0, 7: 2.0}
+    INTEGRATION = {0: 0.4, 1: 0.2, 2: 0.1, 3: 0.05, 4: 0.025, 5: 0.0125}
+    GAINS = {0: 1, 1: 3, 2: 6, 3: 9, 4: 18}
+
+    def __init__(self, environment: Environment, clock: Clock) -> None:
+        super().__init__(environment, clock)
+        self.registers[0x06] = 0xB2
+        self.registers[0x04] = 0x22
+        self.registers[0x05] = 0x01
+        self.enabled_at: float | None = None
+
+    def write(self, register: int, data: Sequence[int]) -> None:
+        super().write(register, data)
+        if register == 0x00:
+            self.enabled_at = self.clock() if data[0] & 0x02 else None
+
+    def read(self, register: int, length: int) -> list[int]:
+        self._measure()
+        return super().read(register, length)
+
+    def _measure(self) -> None:
+        if self.enabled_at is None:
+            return
+        rate = self.registers[0x04]
+        integration = self.INTEGRATION.get((rate >> 4) & 0x07, 0.1)
+        period = max(self.RATES[rate & 0x07], integration)
+        cycles = int((self.clock() - self.enabled_at) / period)
+        if cycles == 0:
+            return
+        # 2300 counts per UV index at gain 18 and 400 ms integration
+        gain = self.GAINS.get(self.registers[0x05] & 0x07, 3)
+        sensitivity = 2300 * gain / 18 * integration / 0.4
+        counts = min(round(self.environment.uv_index(self.enabled_at + cycles * period) * sensitivity), 0xFFFFF)
+        self.registers[0x07] |= 0x08
+        self.registers[0x10:0x13] = counts.to_bytes(3, "little")
+
+
+def sensirion_crc(msb: int, lsb: int) -> int:
+    crc = 0xFF
+    for byte in (msb, lsb):
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+class SGP40Model:
+    """Command-based gas sensor; results can be read only once the command's execution time has passed."""
+
+    COMMANDS = {
+        0x202F: 0.001,  # feature set
+        0x280E: 0.320,  # self test
+        0x260F: 0.030,  # measure raw
+    }
+
+    def __init__(self, environment: Environment, clock: Clock) -> None:
+        self.environment = environment
+        self.clock = clock
+        self.response: list[int] | None = None
+        self.ready_at = 0.0
+
+    def write(self, register: int, data: Sequence[int]) -> None:
+        command = (register << 8) | data[0]
+        delay = self.COMMANDS.get(command)
+        if delay is None:
+            self.response = None
+            return
+        if command == 0x202F:
+            value = 0x3240
+        elif command == 0x280E:
+            value = 0xD400
+        else:
+            value = round(self.environment.gas(self.clock()))
+        self.response = [value >> 8, value & 0xFF, sensirion_crc(value >> 8, value & 0xFF)]
+        self.ready_at = self.clock() + delay
+
+    def read(self, register: int, length: int) -> list[int]:
+        if self.response is None or self.clock() < self.ready_at:
+            raise OSError(121, "Remote I/O error")
+        response, self.response = self.response, None
+        return response[:length]
+
+
+def default_devices(environment: Environment, clock: Clock) -> dict[int, object]:
+    return {
+        0x76: BME280Model(environment, clock),
+        0x68: ICM20948Model(environment, clock),
+        0x29: TSL2591Model(environment, clock),
+        0x53: LTR390Model(environment, clock),
+        0x59: SGP40Model(environment, clock),
+    }
+
+
+class SimulatedSMBus:
+    """Drop-in for ``smbus.SMBus`` that routes transfers to register models by address."""
+
+    def __init__(
+        self,
+        devices: Mapping[int, object] | None = None,
+        environment: Environment | None = None,
+        clock: Clock = time.monotonic,
+    ) -> None:
+        environment = Environment(start=clock()) if environment is None else environment
+        self.devices = dict(default_devices(environment, clock) if devices is None else devices)
+
+    def read_byte_data(self, address: int, register: int) -> int:
+        return self._device(address).read(register, 1)[0]
+
+    def write_byte_data(self, address: int, register: int, value: int) -> None:
+        self._device(address).write(register, [value])
+
+    def read_i2c_block_data(self, address: int, register: int, length: int) -> list[int]:
+        return self._device(address).read(register, length)
+
+    def write_i2c_block_data(self, address: int, register: int, data: Sequence[int]) -> None:
+        self._device(address).write(register, list(data))
+
+    def close(self) -> None:
+        pass
+
+    def _device(self, address: int):
+        device = self.devices.get(address)
+        if device is None:
+            raise OSError(121, "Remote I/O error")
+        return device
+
+
+class SimulatedPanel:
+    """Virtual 2.13" black/red e-Paper panel with the ``epdconfig`` interface.
+
+    Decodes the SPI command stream into black and red frame buffers, and
+    holds BUSY high for ``refresh_time`` seconds after a display update.
+    ``frames`` keeps the last ``max_frames`` refreshes; ``refreshes`` counts all.
+    """
+
+    RST_PIN = 17
+    DC_PIN = 25
+    CS_PIN = 8
+    BUSY_PIN = 24
+    PWR_PIN = 18
+    MOSI_PIN = 10
+    SCLK_PIN = 11
+
+    WRITE_BLACK = 0x24
+    WRITE_RED = 0x26
+    MASTER_ACTIVATION = 0x20
+    DEEP_SLEEP = 0x10
+
+    def __init__(self, refresh_time: float = 1.0, max_frames: int = 8, clock: Clock = time.monotonic) -> None:
+        self.refresh_time = refresh_time
+        self.clock = clock
+        self.pins: dict[int, int] = {}
+        self.command: int | None = None
+        self.ram = {self.WRITE_BLACK: bytearray(), self.WRITE_RED: bytearray()}
+        self.frames: deque[tuple[bytes, bytes]] = deque(maxlen=max_frames)
+        self.refreshes = 0
+        self.busy_until = 0.0
+        self.asleep = False
+        self.spi_bytes = 0
+
+    def digital_write(self, pin: int, value: int) -> None:
+        self.pins[pin] = 1 if value else 0
+        if pin == self.RST_PIN and not value:
+            self.asleep = False
+
+    def digital_read(self, pin: int) -> int:
+        if pin == self.BUSY_PIN:
+            return 1 if self.clock() < self.busy_until else 0
+        return self.pins.get(pin, 0)
+
+    def delay_ms(self, delaytime: float) -> None:
+        time.sleep(delaytime / 1000.0)
+
+    def spi_writebyte(self, data: Sequence[int]) -> None:
+        self._transfer(data)
+
+    def spi_writebyte2(self, data: Sequence[int]) -> None:
+        self._transfer(data)
+
+    def module_init(self, cleanup: bool = False) -> int:
+        self.pins[self.PWR_PIN] = 1
+        return 0
+
+    def module_exit(self, cleanup: bool = False) -> None:
+        for pin in (self.RST_PIN, self.DC_PIN, self.PWR_PIN):
+            self.pins[pin] = 0
+
+    def _transfer(self, data: Sequence[int]) -> None:
+        self.spi_bytes += len(data)
+        if self.asleep:
+            return
+        if not self.pins.get(self.DC_PIN):
+            self.command = data[-1]
+            if self.command in self.ram:
+                self.ram[self.command] = bytearray()
+            elif self.command == self.MASTER_ACTIVATION:
+                self.frames.append((bytes(self.ram[self.WRITE_BLACK]), bytes(self.ram[self.WRITE_RED])))
+                self.refreshes += 1
+                self.busy_until = self.clock() + self.refresh_time
+            elif self.command == self.DEEP_SLEEP:
+                self.asleep = True
+        elif self.command in self.ram:
+            self.ram[self.command].extend(data)
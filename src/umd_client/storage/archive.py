@@ -0,0 +1,128 @@
+import csv
+import datetime
+import io
+import os
+import time
+from collections.abc import Callable, Iterable, Sequence
+from pathlib import Path
+from typing import TextIO
+
+FSYNC_POLICIES = ("never", "rotate", "flush")
+
+
+def archive_path(base_path: str | Path, timestamp: float) -> Path:
+    """``base_path/YYYY/M/D.csv`` for the local day containing ``timestamp``."""
+    return day_path(base_path, datetime.date.fromtimestamp(timestamp))
+
+
+def day_path(base_path: str | Path, day: datetime.date) -> Path:
+    return Path(base_path) / str(day.year) / str(day.month) / f"{day.day}.csv"
+
+
+class ArchiveWriter:
+    """Append rows to daily CSV archives, each row exactly once.
+
+    The current day's file stays open and rows are buffered in memory until
+    ``flush_rows`` rows are pending or ``flush_interval`` seconds have passed.
+    A row whose timestamp (first column) is not newer than the last row
+    written is skipped, so callers can hand over overlapping windows; after a
+    restart the last timestamp is read back from the day's file. Files rotate
+    at local midnight; rows are checked before rotating, so a window that
+    straddles midnight does not reopen the previous day's file to skip rows
+    it already holds, and each day's file is closed once. ``fsync`` controls durability versus SD-card wear:
+    ``"never"`` leaves syncing to the OS, ``"rotate"`` syncs a day's file when
+    it is closed and ``"flush"`` syncs on every flush.
+    """
+
+    def __init__(
+        self,
+        base_path: str | Path,
+        fields: Sequence[str],
+        flush_rows: int = 60,
+        flush_interval: float = 300.0,
+        fsync: str = "rotate",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}")
+        self.base_path = Path(base_path)
+        self.fields = list(fields)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.clock = clock
+        self.path: Path | None = None
+        self.last_timestamp: float | None = None
+        self._file: TextIO | None = None
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = 0
+        self._last_flush = clock()
+
+    def write(self, row: Sequence) -> bool:
+        """Queue one row; returns False if it was already written."""
+        timestamp = row[0]
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+        path = archive_path(self.base_path, timestamp)
+        if path != self.path:
+            self._rotate(path)
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+        self._writer.writerow(row)
+        self.last_timestamp = timestamp
+        self._pending += 1
+        if self._pending >= self.flush_rows or self.clock() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return True
+
+    def write_rows(self, rows: Iterable[Sequence]) -> int:
+        return sum(self.write(row) for row in rows)
+
+    def flush(self) -> None:
+        self._last_flush = self.clock()
+        if self._file is None or not self._pending:
+            return
+        self._file.write(self._buffer.getvalue())
+        self._file.flush()
+        if self.fsync == "flush":
+            os.fsync(self._file.fileno())
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._pending = 0
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self.flush()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self.path = None
+
+    def _rotate(self, path: Path) -> None:
+        self.close()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        exists = path.exists() and path.stat().st_size > 0
+        # Rows arrive in time order, so the newest row from an earlier day still bounds what is new.
+        last = _last_timestamp(path) if exists else None
+        if last is not None and (self.last_timestamp is None or last > self.last_timestamp):
+            self.last_timestamp = last
+        self._file = path.open("a", encoding="utf-8", newline="")
+        if not exists:
+            self._file.write(",".join(self.fields) + "\n")
+        self.path = path
+
+
+def _last_timestamp(path: Path) -> float | None:
+    with path.open("rb") as f:
+        f.seek(max(0, f.seek(0, os.SEEK_END) - 4096))
+        lines = f.read().splitlines()
+    for line in reversed(lines):
+        first = line.split(b",", 1)[0]
+        try:
+            return float(first)
+        except ValueError:
+            continue
+    return None
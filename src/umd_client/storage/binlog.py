@@ -0,0 +1,187 @@
+import calendar
+import json
+import logging
+import math
+import mmap
+import struct
+import time
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from umd_client.sensors.types import Reading
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"UMDBLOG1"
+_HEADER_SIZE = struct.Struct("<I")
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError("numpy is required to read the binary log. Install umd-client[binlog].") from exc
+    return numpy
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        return float(value)
+    return math.nan
+
+
+def _segment_day(timestamp: float) -> str:
+    return time.strftime("%Y%m%d", time.gmtime(timestamp))
+
+
+def _day_start(day: str) -> int:
+    return calendar.timegm(time.strptime(day, "%Y%m%d"))
+
+
+def encode_header(fields: Sequence[str]) -> bytes:
+    """Magic, header length and a JSON schema, padded so records start 8-byte aligned."""
+    schema = json.dumps({"version": 1, "fields": list(fields), "record": f"<{len(fields)}d"}).encode()
+    padding = -(len(MAGIC) + _HEADER_SIZE.size + len(schema)) % 8
+    schema += b" " * padding
+    return MAGIC + _HEADER_SIZE.pack(len(schema)) + schema
+
+
+def read_header(data: bytes | mmap.mmap) -> tuple[list[str], int]:
+    """Return the segment's field names and the offset of its first record."""
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a binary log segment")
+    (size,) = _HEADER_SIZE.unpack_from(data, len(MAGIC))
+    start = len(MAGIC) + _HEADER_SIZE.size
+    schema = json.loads(bytes(data[start : start + size]))
+    return schema["fields"], start + size
+
+
+class BinLog:
+    """Append-only log of raw samples in daily segment files.
+
+    Each segment (``YYYYMMDD-NN.bin``, UTC days) starts with a small header
+    describing its fields, followed by fixed-width little-endian float64
+    records, ``time`` first. Missing or non-numeric values are stored as NaN.
+    A new part is started for the day when the field set changes, including
+    when a reading brings a field the current part does not have. With an
+    explicit ``fields`` list the schema is fixed and other fields are dropped
+    with a warning. Readers map segments with ``mmap`` and view them through
+    numpy without copying.
+    """
+
+    def __init__(self, directory: str | Path, fields: Sequence[str] | None = None, flush_every: int = 64) -> None:
+        self.directory = Path(directory)
+        self.fields = None if fields is None else ["time", *(name for name in fields if name != "time")]
+        self.fixed_fields = fields is not None
+        self.flush_every = flush_every
+        self._file: BinaryIO | None = None
+        self._day: str | None = None
+        self._record: struct.Struct | None = None
+        self._unflushed = 0
+        self._dropped: set[str] = set()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def append(self, reading: Reading) -> None:
+        if self.fields is None:
+            self.fields = ["time", *(name for name in reading.data if name != "time")]
+        new = [name for name in reading.data if name != "time" and name not in self.fields]
+        day = _segment_day(reading.timestamp)
+        if new and not self.fixed_fields:
+            self.fields = [*self.fields, *new]
+            self._open_segment(day)
+        elif day != self._day:
+            self._open_segment(day)
+        if new and self.fixed_fields and not self._dropped.issuperset(new):
+            self._dropped.update(new)
+            logger.warning("Binary log drops fields outside its schema: %s", ", ".join(new))
+        values = [reading.timestamp, *(_number(reading.data.get(name)) for name in self.fields[1:])]
+        self._file.write(self._record.pack(*values))
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+        self._unflushed = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._day = None
+
+    def _open_segment(self, day: str) -> None:
+        self.close()
+        header = encode_header(self.fields)
+        parts = sorted(self.directory.glob(f"{day}-*.bin"))
+        if parts and _starts_with(parts[-1], header):
+            path = parts[-1]
+            self._file = path.open("r+b")
+            # Drop a record torn by a crash so the file stays record-aligned.
+            size = path.stat().st_size
+            self._file.truncate(size - (size - len(header)) % (8 * len(self.fields)))
+            self._file.seek(0, 2)
+        else:
+            self._file = (self.directory / f"{day}-{len(parts):02d}.bin").open("wb")
+            self._file.write(header)
+        self._day = day
+        self._record = struct.Struct(f"<{len(self.fields)}d")
+
+    def segments(self, start: float | None = None, end: float | None = None) -> Iterator[Any]:
+        """Yield a numpy structured array view of each segment's records with ``start <= time < end``."""
+        numpy = _require_numpy()
+        self.flush()
+        for path in sorted(self.directory.glob("*-*.bin")):
+            day_start = _day_start(path.name[:8])
+            if (end is not None and day_start >= end) or (start is not None and day_start + 86400 <= start):
+                continue
+            records = read_segment(path)
+            times = records["time"]
+            lo = 0 if start is None else numpy.searchsorted(times, start, side="left")
+            hi = len(records) if end is None else numpy.searchsorted(times, end, side="left")
+            if hi > lo:
+                yield records[lo:hi]
+
+    def read(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> dict[str, Any]:
+        """Columns for ``start <= time < end`` as numpy arrays, concatenated across segments."""
+        numpy = _require_numpy()
+        parts = list(self.segments(start, end))
+        names = ["time", *(name for name in fields if name != "time")] if fields is not None else None
+        if names is None:
+            names = list(dict.fromkeys(name for part in parts for name in part.dtype.names))
+        return {
+            name: numpy.concatenate(
+                [part[name] if name in part.dtype.names else numpy.full(len(part), numpy.nan) for part in parts]
+            )
+            if parts
+            else numpy.empty(0)
+            for name in names
+        }
+
+
+def _starts_with(path: Path, header: bytes) -> bool:
+    with path.open("rb") as f:
+        return f.read(len(header)) == header
+
+
+def read_segment(path: str | Path) -> Any:
+    """Map one segment and return its records as a zero-copy numpy structured array."""
+    numpy = _require_numpy()
+    with Path(path).open("rb") as f:
+        if not f.read(1):
+            # Created but the header never reached the disk.
+            return numpy.empty(0, dtype=[("time", "<f8")])
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    fields, offset = read_header(mapped)
+    dtype = numpy.dtype([(name, "<f8") for name in fields])
+    count = (len(mapped) - offset) // dtype.itemsize
+    if not count:
+        return numpy.empty(0, dtype=dtype)
+    return numpy.frombuffer(mapped, dtype=dtype, count=count, offset=offset)
@@ -0,0 +1,246 @@
+import csv
+import datetime
+import gzip
+import importlib.util
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TextIO
+
+from umd_client.storage.archive import day_path
+from umd_client.storage.quota import QuotaManager
+
+logger = logging.getLogger(__name__)
+
+CODECS = ("gzip", "zstd")
+MANIFEST_NAME = "archive-manifest.json"
+_DAY_FILE = re.compile(r"(\d{4})/(\d{1,2})/(\d{1,2})\.csv(\.gz|\.zst)?$")
+
+
+def _require_zstandard():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError("zstd compression requires the zstandard package.") from exc
+    return zstandard
+
+
+def default_codec() -> str:
+    return "zstd" if importlib.util.find_spec("zstandard") is not None else "gzip"
+
+
+def open_archive(path: str | Path) -> TextIO:
+    """Open a daily archive for reading text, decompressing ``.gz`` and ``.zst`` transparently."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    if path.suffix == ".zst":
+        reader = _require_zstandard().ZstdDecompressor().stream_reader(path.open("rb"), closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8", newline="")
+    return path.open(encoding="utf-8", newline="")
+
+
+def archive_day(path: Path, base_path: Path) -> datetime.date | None:
+    match = _DAY_FILE.search(path.relative_to(base_path).as_posix())
+    if match is None:
+        return None
+    return datetime.date(int(match[1]), int(match[2]), int(match[3]))
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    start: float | None
+    end: float | None
+    rows: int
+    bytes: int
+    codec: str
+
+
+class Manifest:
+    """Index of compacted archives: time range, row count and size per file.
+
+    Stored as JSON next to the archives and replaced atomically, so readers
+    never see a partial update.
+    """
+
+    def __init__(self, base_path: str | Path) -> None:
+        self.path = Path(base_path) / MANIFEST_NAME
+        self.entries: dict[str, ManifestEntry] = {}
+        if self.path.exists():
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+            self.entries = {name: ManifestEntry(**entry) for name, entry in raw["files"].items()}
+
+    def add(self, name: str, entry: ManifestEntry) -> None:
+        self.entries[name] = entry
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(
+            json.dumps({"files": {name: asdict(entry) for name, entry in sorted(self.entries.items())}}, indent=1),
+            encoding="utf-8",
+        )
+        os.replace(temporary, self.path)
+
+    def overlapping(self, start: float, end: float) -> list[str]:
+        return sorted(
+            name
+            for name, entry in self.entries.items()
+            if entry.start is not None and entry.start < end and entry.end >= start
+        )
+
+
+def compact_file(path: Path, codec: str) -> tuple[Path, ManifestEntry]:
+    """Compress one closed daily CSV next to itself and delete the original.
+
+    The compressed file keeps the original's modification time so it still
+    ages by day for quota eviction.
+    """
+    start = end = None
+    rows = 0
+    with path.open(encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            try:
+                timestamp = float(row[0])
+            except (IndexError, ValueError):
+                continue
+            start = timestamp if start is None else min(start, timestamp)
+            end = timestamp if end is None else max(end, timestamp)
+            rows += 1
+
+    target = path.with_name(path.name + (".gz" if codec == "gzip" else ".zst"))
+    temporary = target.with_name(target.name + ".tmp")
+    with path.open("rb") as src, temporary.open("wb") as raw:
+        if codec == "gzip":
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) as dst:
+                shutil.copyfileobj(src, dst)
+        else:
+            with _require_zstandard().ZstdCompressor(level=10).stream_writer(raw, closefd=False) as dst:
+                shutil.copyfileobj(src, dst)
+        raw.flush()
+        os.fsync(raw.fileno())
+    original = path.stat()
+    os.utime(temporary, ns=(original.st_atime_ns, original.st_mtime_ns))
+    os.replace(temporary, target)
+    path.unlink()
+    return target, ManifestEntry(start=start, end=end, rows=rows, bytes=target.stat().st_size, codec=codec)
+
+
+class Compactor:
+    """Compress closed daily archives under ``base_path`` in a low-priority thread.
+
+    Every ``interval`` seconds, each ``YYYY/M/D.csv`` whose local day ended
+    more than ``grace`` seconds ago is compressed and recorded in the
+    manifest. The grace period leaves time for a writer still holding the
+    previous day's file to flush it and rotate.
+    """
+
+    def __init__(
+        self,
+        base_path: str | Path,
+        codec: str = "auto",
+        interval: float = 3600.0,
+        grace: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+        quota: QuotaManager | None = None,
+    ) -> None:
+        codec = default_codec() if codec == "auto" else codec
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of auto, {', '.join(CODECS)}")
+        if codec == "zstd":
+            _require_zstandard()
+        self.base_path = Path(base_path)
+        self.codec = codec
+        self.interval = interval
+        self.grace = grace
+        self.clock = clock
+        self.quota = quota
+        self.manifest = Manifest(self.base_path)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def closed_days(self) -> list[Path]:
+        today = datetime.date.fromtimestamp(self.clock() - self.grace)
+        closed = []
+        for path in self.base_path.glob("[0-9][0-9][0-9][0-9]/*/*.csv"):
+            day = archive_day(path, self.base_path)
+            if day is not None and day < today:
+                closed.append(path)
+        return sorted(closed, key=lambda path: archive_day(path, self.base_path))
+
+    def run_once(self) -> int:
+        compacted = 0
+        for path in self.closed_days():
+            if self._stop.is_set():
+                break
+            target, entry = compact_file(path, self.codec)
+            self.manifest.add(target.relative_to(self.base_path).as_posix(), entry)
+            if self.quota is not None:
+                self.quota.forget(path)
+                self.quota.record(target)
+            compacted += 1
+        if compacted:
+            logger.info("Compacted %s daily archives with %s", compacted, self.codec)
+        return compacted
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="umd-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        try:
+            # Linux applies the niceness to this thread only.
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Error occurred while compacting archives")
+            self._stop.wait(self.interval)
+
+
+def read_range(base_path: str | Path, start: float, end: float) -> Iterator[dict[str, str]]:
+    """Archived rows with ``start <= time < end`` from compressed and open days alike.
+
+    Compacted files are found through the manifest and days not compacted yet
+    by their path, so no directory walk is needed.
+    """
+    base_path = Path(base_path)
+    files = {
+        archive_day(base_path / name, base_path): base_path / name
+        for name in Manifest(base_path).overlapping(start, end)
+    }
+    day = datetime.date.fromtimestamp(start)
+    last = datetime.date.fromtimestamp(end)
+    while day <= last:
+        path = day_path(base_path, day)
+        if day not in files and path.exists():
+            files[day] = path
+        day += datetime.timedelta(days=1)
+
+    for day in sorted(files):
+        if not files[day].exists():
+            # Evicted by the storage quota after it was compacted.
+            continue
+        with open_archive(files[day]) as f:
+            for row in csv.DictReader(f):
+                try:
+                    timestamp = float(row["time"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if start <= timestamp < end:
+                    yield row
@@ -0,0 +1,86 @@
+import csv
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+from typing import Any, TextIO
+
+from umd_client.storage.query import open_history, resolve_fields, scan
+
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise RuntimeError("pyarrow is required for Parquet and Arrow export. Install umd-client[export].") from exc
+    return pyarrow
+
+
+def export(
+    path: str | Path,
+    output: str | Path | TextIO,
+    start: int,
+    end: int,
+    fields: Sequence[str] | None = None,
+    format: str = "csv",
+    chunk_size: int = 50_000,
+) -> int:
+    """Write stored readings in ``[start, end)`` to ``output`` and return the row count.
+
+    Rows are read and written ``chunk_size`` at a time, so memory use does not
+    depend on the length of the range. Parquet gets one row group per chunk and
+    Arrow is written as an IPC file with one record batch per chunk.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    conn = open_history(path)
+    try:
+        fields = resolve_fields(conn, fields)
+        chunks = scan(conn, fields, start, end, chunk_size=chunk_size)
+        if format == "csv":
+            if isinstance(output, str | Path):
+                with Path(output).open("w", newline="", encoding="utf-8") as out:
+                    return write_csv_chunks(chunks, fields, out)
+            return write_csv_chunks(chunks, fields, output)
+        return write_arrow_chunks(chunks, fields, output, format)
+    finally:
+        conn.close()
+
+
+def write_csv_chunks(chunks: Iterable[list[tuple]], fields: Sequence[str], out: TextIO) -> int:
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(["time", *fields])
+    written = 0
+    for chunk in chunks:
+        writer.writerows(chunk)
+        written += len(chunk)
+    return written
+
+
+def write_arrow_chunks(chunks: Iterable[list[tuple]], fields: Sequence[str], output: Any, format: str) -> int:
+    pyarrow = _require_pyarrow()
+    output = str(output) if isinstance(output, Path) else output
+    schema = pyarrow.schema([("time", pyarrow.int64()), *((field, pyarrow.float64()) for field in fields)])
+    if format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(output, schema)
+    else:
+        writer = pyarrow.ipc.new_file(output, schema)
+    written = 0
+    try:
+        for batch in _record_batches(pyarrow, schema, chunks):
+            writer.write_batch(batch)
+            written += batch.num_rows
+    finally:
+        writer.close()
+    return written
+
+
+def _record_batches(pyarrow, schema, chunks: Iterable[list[tuple]]) -> Iterator[Any]:
+    for chunk in chunks:
+        columns = list(zip(*chunk, strict=True))
+        yield pyarrow.record_batch(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema, strict=True)],
+            schema=schema,
+        )
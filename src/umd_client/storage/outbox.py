@@ -0,0 +1,79 @@
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class OutboxEntry:
+    id: int
+    created: float
+    body: bytes
+    attempts: int
+
+
+class Outbox:
+    """Durable FIFO of encoded payloads waiting to be uploaded.
+
+    Entries live in a SQLite database in WAL mode and are removed only by
+    ``delete``, so a payload survives crashes and network outages until the
+    server has acknowledged it. At most ``max_entries`` are kept; the oldest
+    are dropped first.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int, clock=time.time) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created REAL NOT NULL,
+                body BLOB NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def put(self, body: bytes) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("INSERT INTO outbox (created, body) VALUES (?, ?)", (self.clock(), body))
+            dropped = self._conn.execute(
+                "DELETE FROM outbox WHERE id <= (SELECT id FROM outbox ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        if dropped:
+            logger.warning("Outbox full, dropped %s oldest payloads", dropped)
+        return cursor.lastrowid
+
+    def peek(self, limit: int = 1) -> list[OutboxEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, created, body, attempts FROM outbox ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [OutboxEntry(id=row[0], created=row[1], body=bytes(row[2]), attempts=row[3]) for row in rows]
+
+    def delete(self, ids: list[int]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(entry_id,) for entry_id in ids])
+
+    def record_attempt(self, ids: list[int]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE outbox SET attempts = attempts + 1 WHERE id = ?", [(entry_id,) for entry_id in ids])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,197 @@
+import csv
+import heapq
+import json
+import sqlite3
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import groupby, islice
+from pathlib import Path
+from typing import Any, TextIO
+
+from umd_client.storage.sqlite import column_name
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+Row = dict[str, Any]
+Point = tuple[int, float]
+
+
+def open_history(path: str | Path) -> sqlite3.Connection:
+    """Open the history read-only, so queries never block or disturb the running client."""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"No reading history at {path}")
+    return sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+
+
+def history_fields(conn: sqlite3.Connection) -> list[str]:
+    return [row[1] for row in conn.execute("PRAGMA table_info(readings)") if row[1] != "time"]
+
+
+def resolve_fields(conn: sqlite3.Connection, fields: Sequence[str] | None) -> list[str]:
+    available = history_fields(conn)
+    if fields is None:
+        return available
+    columns = [column_name(field) for field in fields]
+    unknown = [field for field, column in zip(fields, columns, strict=True) if column not in available]
+    if unknown:
+        raise ValueError(f"Unknown field(s) {', '.join(unknown)}; stored fields are {', '.join(available)}")
+    return columns
+
+
+def query_fields(path: str | Path, fields: Sequence[str] | None = None) -> list[str]:
+    """Column names ``query`` will return for ``fields``; raises ValueError for unknown fields."""
+    conn = open_history(path)
+    try:
+        return resolve_fields(conn, fields)
+    finally:
+        conn.close()
+
+
+def scan(
+    conn: sqlite3.Connection,
+    fields: Sequence[str],
+    start: int,
+    end: int,
+    chunk_size: int = 5000,
+) -> Iterator[list[tuple]]:
+    """Yield ``(time, *fields)`` rows with ``start <= time < end`` in chunks.
+
+    ``time`` is the table's integer primary key, so each chunk is an index range
+    seek that resumes after the last row of the previous chunk (keyset
+    pagination). No read transaction is held between chunks.
+    """
+    columns = ", ".join(["time", *(f'"{field}"' for field in fields)])
+    statement = f"SELECT {columns} FROM readings WHERE time >= ? AND time < ? ORDER BY time LIMIT ?"
+    while start < end:
+        rows = conn.execute(statement, (start, end, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield rows
+        start = rows[-1][0] + 1
+
+
+def series(conn: sqlite3.Connection, field: str, start: int, end: int) -> Iterator[Point]:
+    for chunk in scan(conn, [field], start, end):
+        for time, value in chunk:
+            if value is not None:
+                yield time, value
+
+
+def count(conn: sqlite3.Connection, field: str, start: int, end: int) -> int:
+    return conn.execute(
+        f'SELECT COUNT("{field}") FROM readings WHERE time >= ? AND time < ?',
+        (start, end),
+    ).fetchone()[0]
+
+
+def query(
+    path: str | Path,
+    start: int,
+    end: int,
+    fields: Sequence[str] | None = None,
+    points: int | None = None,
+    method: str = "lttb",
+) -> Iterator[Row]:
+    """Stream stored readings in ``[start, end)`` as ``{"time": ..., field: value}`` rows.
+
+    With ``points`` each field is reduced to about that many points, either with
+    Largest-Triangle-Three-Buckets or with the min and max of each time bucket.
+    Downsampled fields are chosen independently, so a row only carries the
+    fields that kept a point at that time.
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}")
+    conn = open_history(path)
+    try:
+        fields = resolve_fields(conn, fields)
+        if points is None:
+            for chunk in scan(conn, fields, start, end):
+                for row in chunk:
+                    yield dict(zip(["time", *fields], row, strict=True))
+            return
+
+        streams = []
+        for field in fields:
+            if method == "lttb":
+                reduced = lttb(series(conn, field, start, end), count(conn, field, start, end), points)
+            else:
+                reduced = min_max(series(conn, field, start, end), start, end, points)
+            streams.append(_labelled(field, reduced))
+        for time, group in groupby(heapq.merge(*streams), key=lambda item: item[0]):
+            row = {"time": time}
+            row.update((field, value) for _, field, value in group)
+            yield row
+    finally:
+        conn.close()
+
+
+def _labelled(field: str, points: Iterable[Point]) -> Iterator[tuple[int, str, float]]:
+    for time, value in points:
+        yield time, field, value
+
+
+def lttb(points: Iterable[Point], total: int, threshold: int) -> Iterator[Point]:
+    """Largest-Triangle-Three-Buckets over a stream of ``total`` time-ordered points.
+
+    Only the current and the next bucket are held in memory.
+    """
+    iterator = iter(points)
+    if threshold >= total or threshold < 3:
+        yield from iterator
+        return
+
+    every = (total - 2) / (threshold - 2)
+
+    def bucket(index: int) -> list[Point]:
+        lo = int(index * every) + 1
+        hi = min(int((index + 1) * every) + 1, total - 1)
+        return list(islice(iterator, hi - lo))
+
+    selected = next(iterator)
+    yield selected
+    current = bucket(0)
+    for index in range(threshold - 2):
+        following = bucket(index + 1) if index + 1 < threshold - 2 else list(islice(iterator, 1))
+        if current:
+            # Rows deleted since ``total`` was counted can leave the last buckets short.
+            target = following or current[-1:]
+            average = (sum(point[0] for point in target) / len(target), sum(point[1] for point in target) / len(target))
+            selected = max(current, key=lambda point, a=selected, c=average: _triangle_area(a, point, c))
+            yield selected
+        current = following
+    yield from current
+
+
+def _triangle_area(a: tuple[float, float], b: tuple[float, float], c: tuple[float, float]) -> float:
+    return abs((a[0] - c[0]) * (b[1] - a[1]) - (a[0] - b[0]) * (c[1] - a[1]))
+
+
+def min_max(points: Iterable[Point], start: int, end: int, threshold: int) -> Iterator[Point]:
+    """Keep the minimum and maximum point of each of ``threshold // 2`` equal time buckets."""
+    width = max(1, -(-(end - start) // max(1, threshold // 2)))
+    for _, group in groupby(points, key=lambda point: (point[0] - start) // width):
+        low = high = None
+        for point in group:
+            if low is None or point[1] < low[1]:
+                low = point
+            if high is None or point[1] > high[1]:
+                high = point
+        yield from sorted({low, high})
+
+
+def write_ndjson(rows: Iterable[Row], out: TextIO) -> int:
+    written = 0
+    for row in rows:
+        out.write(json.dumps(row, ensure_ascii=True) + "\n")
+        written += 1
+    return written
+
+
+def write_csv(rows: Iterable[Row], fields: Sequence[str], out: TextIO) -> int:
+    writer = csv.DictWriter(out, fieldnames=["time", *fields], restval="", lineterminator="\n")
+    writer.writeheader()
+    written = 0
+    for row in rows:
+        writer.writerow(row)
+        written += 1
+    return written
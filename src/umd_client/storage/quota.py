@@ -0,0 +1,194 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import Any
+
+from umd_client.storage.sqlite import HISTORY_FILENAME
+
+logger = logging.getLogger(__name__)
+
+QUOTA_CATEGORIES = ("photos", "archives", "binlog", "outbox", "history", "other")
+# SQLite files cannot be trimmed by deleting files; their row limits bound them instead.
+EVICTABLE_CATEGORIES = ("photos", "archives", "binlog")
+
+
+def classify(relative: str | Path) -> str:
+    """Quota category of a path relative to ``data_path``."""
+    top = Path(relative).parts[0]
+    if top == "photo":
+        return "photos"
+    if top == "binlog":
+        return "binlog"
+    if len(top) == 4 and top.isdigit():
+        return "archives"
+    if top.startswith("outbox.sqlite3"):
+        return "outbox"
+    if top.startswith(HISTORY_FILENAME):
+        return "history"
+    return "other"
+
+
+class QuotaManager:
+    """Per-category byte budgets for everything under ``data_path``.
+
+    Sizes are kept in an in-memory index built by one directory walk at start
+    and updated by ``record``/``forget`` as writers create and remove files,
+    so checking a budget never stats the whole tree. Files that only grow by
+    appends are always the newest of their category, which ``enforce``
+    re-stats before comparing against the budget; a full rescan every
+    ``rescan_interval`` seconds picks up anything written without ``record``.
+    Over budget, the oldest files (by modification time) are deleted first,
+    always keeping the newest file of a category because it may still be open.
+    """
+
+    def __init__(
+        self,
+        base_path: str | Path,
+        budgets: Mapping[str, int],
+        interval: float = 60.0,
+        rescan_interval: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        for category in budgets:
+            if category not in EVICTABLE_CATEGORIES:
+                raise ValueError(f"quota category must be one of {', '.join(EVICTABLE_CATEGORIES)}")
+        self.base_path = Path(base_path)
+        self.budgets = dict(budgets)
+        self.interval = interval
+        self.rescan_interval = rescan_interval
+        self.clock = clock
+        self.evicted_files = dict.fromkeys(QUOTA_CATEGORIES, 0)
+        self.evicted_bytes = dict.fromkeys(QUOTA_CATEGORIES, 0)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.rescan()
+
+    def rescan(self) -> None:
+        files: dict[str, dict[Path, tuple[int, float]]] = {category: {} for category in QUOTA_CATEGORIES}
+        for root, _, names in os.walk(self.base_path):
+            for name in names:
+                path = Path(root) / name
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files[classify(path.relative_to(self.base_path))][path] = (stat.st_size, stat.st_mtime)
+        with self._lock:
+            self._files = files
+            self._usage = {category: sum(size for size, _ in entries.values()) for category, entries in files.items()}
+            self._queues = {
+                category: [(mtime, path) for path, (_, mtime) in entries.items()] for category, entries in files.items()
+            }
+            for queue in self._queues.values():
+                heapq.heapify(queue)
+            self._last_rescan = self.clock()
+
+    def record(self, path: str | Path) -> None:
+        """Add or refresh one file after it was written."""
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            self.forget(path)
+            return
+        category = classify(path.relative_to(self.base_path))
+        with self._lock:
+            entries = self._files[category]
+            previous = entries.get(path)
+            self._usage[category] += stat.st_size - (0 if previous is None else previous[0])
+            entries[path] = (stat.st_size, stat.st_mtime)
+            if previous is None or previous[1] != stat.st_mtime:
+                heapq.heappush(self._queues[category], (stat.st_mtime, path))
+
+    def forget(self, path: str | Path) -> None:
+        """Drop a file that was removed outside the manager."""
+        path = Path(path)
+        category = classify(path.relative_to(self.base_path))
+        with self._lock:
+            previous = self._files[category].pop(path, None)
+            if previous is not None:
+                self._usage[category] -= previous[0]
+
+    def usage(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                category: {
+                    "bytes": self._usage[category],
+                    "files": len(self._files[category]),
+                    "budget": self.budgets.get(category),
+                    "evicted_files": self.evicted_files[category],
+                    "evicted_bytes": self.evicted_bytes[category],
+                }
+                for category in QUOTA_CATEGORIES
+            }
+
+    def enforce(self) -> int:
+        """Delete the oldest files of every category over its budget; returns the number deleted."""
+        evicted = 0
+        for category, budget in self.budgets.items():
+            newest = self._newest(category)
+            if newest is not None:
+                self.record(newest)
+            while True:
+                with self._lock:
+                    if self._usage[category] <= budget or len(self._files[category]) <= 1:
+                        break
+                    path, size = self._pop_oldest(category)
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                except OSError:
+                    logger.exception("Could not evict %s", path)
+                    continue
+                with self._lock:
+                    self.evicted_files[category] += 1
+                    self.evicted_bytes[category] += size
+                evicted += 1
+        if evicted:
+            logger.info("Evicted %s files to stay within storage quotas", evicted)
+        return evicted
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="umd-quota", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("Storage usage: %s", {category: usage["bytes"] for category, usage in self.usage().items()})
+
+    def _newest(self, category: str) -> Path | None:
+        with self._lock:
+            entries = self._files[category]
+            return max(entries, key=lambda path: entries[path][1], default=None)
+
+    def _pop_oldest(self, category: str) -> tuple[Path, int]:
+        # Called with the lock held. Entries superseded by a newer record are skipped.
+        entries = self._files[category]
+        queue = self._queues[category]
+        while True:
+            mtime, path = heapq.heappop(queue)
+            entry = entries.get(path)
+            if entry is not None and entry[1] == mtime:
+                del entries[path]
+                self._usage[category] -= entry[0]
+                return path, entry[0]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.clock() - self._last_rescan >= self.rescan_interval:
+                    self.rescan()
+                self.enforce()
+            except Exception:
+                logger.exception("Error occurred while enforcing storage quotas")
+            self._stop.wait(self.interval)
@@ -0,0 +1,135 @@
+import csv
+import json
+import logging
+import struct
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import BinaryIO, TextIO
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"UMDRING1"
+# capacity, head (next slot to write), count, schema length
+_STATE = struct.Struct("<QQQI")
+
+
+class RingFile:
+    """Fixed-size history of numeric rows with O(1) appends.
+
+    The file holds ``capacity`` fixed-width float64 slots after a small header
+    that records the field names, the next slot to write and the number of
+    rows stored. An append writes one slot and rewrites the header counters;
+    once full, the oldest row is overwritten. Opening an existing file with a
+    different capacity keeps its newest rows. A file with a different field
+    list, or one that is not a ring file, is renamed to
+    ``<name>.<YYYYmmddHHMMSS>`` and a new ring is started in its place.
+    ``open_readonly`` reads an existing ring without knowing its layout.
+    """
+
+    def __init__(self, path: str | Path, fields: Sequence[str], capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.path = Path(path)
+        self.readonly = False
+        self._layout(fields, capacity)
+        self.head = 0
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self._open()
+
+    @classmethod
+    def open_readonly(cls, path: str | Path) -> "RingFile":
+        """Open an existing ring with the fields and capacity recorded in its header."""
+        path = Path(path)
+        f = path.open("rb")
+        try:
+            header = f.read(len(MAGIC) + _STATE.size)
+            if len(header) < len(MAGIC) + _STATE.size or header[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a ring file")
+            capacity, head, count, schema_length = _STATE.unpack_from(header, len(MAGIC))
+            fields = json.loads(f.read(schema_length))["fields"]
+        except BaseException:
+            f.close()
+            raise
+        ring = cls.__new__(cls)
+        ring.path = path
+        ring.readonly = True
+        ring._layout(fields, capacity)
+        ring.head, ring.count = head, count
+        ring._file = f
+        return ring
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, row: Sequence[float]) -> None:
+        if self.readonly:
+            raise ValueError(f"{self.path} is open read-only")
+        self._file.seek(self._data_offset + self.head * self._record.size)
+        self._file.write(self._record.pack(*row))
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._write_state()
+        self._file.flush()
+
+    def rows(self) -> list[list[float]]:
+        """Stored rows, oldest first."""
+        self._file.seek(self._data_offset)
+        data = self._file.read(self.capacity * self._record.size)
+        return _ordered_rows(data, self._record, self.capacity, self.head, self.count)
+
+    def write_csv(self, out: TextIO) -> int:
+        """Write the stored rows as CSV with a header, ``time`` as an integer."""
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(self.fields)
+        rows = self.rows()
+        for row in rows:
+            if self.fields and self.fields[0] == "time":
+                row[0] = int(row[0])
+            writer.writerow(row)
+        return len(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _layout(self, fields: Sequence[str], capacity: int) -> None:
+        self.fields = list(fields)
+        self.capacity = capacity
+        self._record = struct.Struct(f"<{len(self.fields)}d")
+        schema = json.dumps({"fields": self.fields}).encode()
+        self._schema = schema + b" " * (-(len(MAGIC) + _STATE.size + len(schema)) % 8)
+        self._data_offset = len(MAGIC) + _STATE.size + len(self._schema)
+
+    def _open(self) -> BinaryIO:
+        existing: list[list[float]] = []
+        if self.path.exists():
+            data = self.path.read_bytes()
+            if data[: len(MAGIC)] == MAGIC and data[len(MAGIC) + _STATE.size : self._data_offset] == self._schema:
+                capacity, head, count, _ = _STATE.unpack_from(data, len(MAGIC))
+                if capacity == self.capacity:
+                    self.head, self.count = head, count
+                    return self.path.open("r+b")
+                existing = _ordered_rows(data[self._data_offset :], self._record, capacity, head, count)
+                existing = existing[-self.capacity :]
+            elif data:
+                aside = self.path.with_name(f"{self.path.name}.{time.strftime('%Y%m%d%H%M%S')}")
+                self.path.replace(aside)
+                logger.warning("%s does not hold the fields %s; moved it to %s", self.path, self.fields, aside)
+
+        f = self.path.open("w+b")
+        f.write(MAGIC + _STATE.pack(self.capacity, 0, 0, len(self._schema)) + self._schema)
+        f.truncate(self._data_offset + self.capacity * self._record.size)
+        self._file = f
+        for row in existing:
+            self.append(row)
+        return f
+
+    def _write_state(self) -> None:
+        self._file.seek(len(MAGIC))
+        self._file.write(_STATE.pack(self.capacity, self.head, self.count, len(self._schema)))
+
+
+def _ordered_rows(data: bytes, record: struct.Struct, capacity: int, head: int, count: int) -> list[list[float]]:
+    first = (head - count) % capacity
+    return [list(record.unpack_from(data, (first + index) % capacity * record.size)) for index in range(count)]
@@ -1,54 +1,400 @@
+import logging
+import re
 import sqlite3
+import threading
 import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
 
+from umd_client.sensors.types import Reading
 
-class Database:
-    def __init__(self, database_name) -> None:
-        self.database_name = database_name
-
-    def init(self):
-        self.conn = sqlite3.connect(self.database_name)
-        self.c = self.conn.cursor()
-        self.c.execute(
-            '''CREATE TABLE RECORD
-                (TIME INT PRIMARY KEY NOT NULL,
-                TEMPERATURE FLOAT,
-                HUMIDITY FLOAT,
-                PRESSURE FLOAT,
-                LUX FLOAT,
-                UV FLOAT,
-                GAS FLOAT,
-                ROLL FLOAT,
-                PITCH FLOAT,
-                YAW FLOAT,
-                ACCELERATION_X FLOAT,
-                ACCELERATION_Y FLOAT,
-                ACCELERATION_Z FLOAT,
-                GYROSCOPE_X FLOAT,
-                GYROSCOPE_Y FLOAT,
-                GYROSCOPE_Z FLOAT,
-                MAGNETIC_X FLOAT,
-                MAGNETIC_Y FLOAT,
-                MAGNETIC_Z FLOAT
-                );'''
+logger = logging.getLogger(__name__)
+
+_COLUMN_RE = re.compile(r"[^a-z0-9_]")
+
+HISTORY_FILENAME = "readings.sqlite3"
+
+# Rollup bucket widths in seconds, finest first. Buckets are aligned to the Unix
+# epoch, so day buckets are UTC days.
+ROLLUP_RESOLUTIONS = (60, 3600, 86400)
+# Seconds each rollup resolution is kept; None keeps it forever.
+ROLLUP_RETENTION = {60: 7 * 86400, 3600: 2 * 365 * 86400, 86400: None}
+
+
+@dataclass
+class Aggregate:
+    start: int
+    count: int
+    sum: float
+    min: float
+    max: float
+    last: float
+    last_time: int
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count
+
+    def merge(self, other: "Aggregate") -> "Aggregate":
+        later = other if other.last_time >= self.last_time else self
+        return Aggregate(
+            start=min(self.start, other.start),
+            count=self.count + other.count,
+            sum=self.sum + other.sum,
+            min=min(self.min, other.min),
+            max=max(self.max, other.max),
+            last=later.last,
+            last_time=later.last_time,
         )
-        self.conn.commit()
-        self.conn.close()
-
-    def insert(self, data):
-        self.conn = sqlite3.connect(self.database_name)
-        self.c = self.conn.cursor()
-        values = ','.join([str(d) for d in data])
-        command = f'''INSERT INTO RECORD (TIME,TEMPERATURE,HUMIDITY,PRESSURE,LUX,UV,GAS,ROLL,PITCH,YAW, \
-            ACCELERATION_X,ACCELERATION_Y,ACCELERATION_Z,GYROSCOPE_X,GYROSCOPE_Y,GYROSCOPE_Z,MAGNETIC_X,MAGNETIC_Y,MAGNETIC_Z) \
-        VALUES ({int(time.time())},{values})'''
-        self.c.execute(command)
-        self.conn.commit()
-        self.conn.close()
-
-    def exec(self, cmd):
-        self.conn = sqlite3.connect(self.database_name)
-        self.c = self.conn.cursor()
-        self.c.execute(cmd)
-        self.conn.commit()
-        self.conn.close()
+
+
+def column_name(field: str) -> str:
+    """Map a reading field to a safe SQL column name."""
+    name = _COLUMN_RE.sub("_", field.strip().lower())
+    if not name or name[0].isdigit():
+        name = f"f_{name}"
+    return name
+
+
+def _number(value) -> float | None:
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        return value
+    return None
+
+
+class Database:
+    """Time-series store for readings.
+
+    One connection stays open in WAL mode. ``insert`` only buffers the row; the
+    buffer is written with ``executemany`` in a single transaction once
+    ``flush_interval`` seconds have passed since the last commit (group commit),
+    so a crash loses at most one interval of history. The ``readings`` table
+    has one row per timestamp, keeping the first reading stored for it, and
+    gains a REAL column the first time a field is seen.
+
+    Each flush also folds the new rows into ``rollup_60``, ``rollup_3600`` and
+    ``rollup_86400`` (count, sum, min, max and last value per field and bucket)
+    in the same transaction, so ``aggregate`` can answer long ranges from a
+    few coarse buckets instead of scanning raw rows.
+
+    Raw rows are kept as a ring buffer of at most ``max_rows`` rows and
+    ``max_age`` seconds (measured from the newest reading); rollups follow
+    ``rollup_retention``. Expired rows are deleted off the write path: after
+    ``start`` a background thread wakes after each flush, or every
+    ``prune_interval`` seconds, and deletes at most ``prune_batch`` rows per
+    table per transaction, releasing the lock between batches so inserts and
+    queries are not held up. The file is shrunk with incremental vacuum.
+    Without the thread, call ``prune_expired`` to clean up.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        flush_interval: float = 0.0,
+        max_pending: int = 1000,
+        max_rows: int | None = None,
+        max_age: int | None = None,
+        rollup_retention: Mapping[int, int | None] = ROLLUP_RETENTION,
+        prune_batch: int = 1000,
+        prune_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.rollup_retention = dict(rollup_retention)
+        self.prune_batch = prune_batch
+        self.prune_interval = prune_interval
+        self.clock = clock
+        self.pending: list[tuple[int, dict[str, float | None]]] = []
+        self.last_flush = clock()
+        self._lock = threading.RLock()
+        self._prune_wanted = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # Only takes effect when the database file is created.
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.init()
+
+    def init(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS readings (time INTEGER PRIMARY KEY)")
+            for resolution in ROLLUP_RESOLUTIONS:
+                self._conn.execute(
+                    f"""CREATE TABLE IF NOT EXISTS rollup_{resolution} (
+                        bucket INTEGER NOT NULL,
+                        field TEXT NOT NULL,
+                        count INTEGER NOT NULL,
+                        sum REAL NOT NULL,
+                        min REAL NOT NULL,
+                        max REAL NOT NULL,
+                        last REAL NOT NULL,
+                        last_time INTEGER NOT NULL,
+                        PRIMARY KEY (bucket, field)
+                    ) WITHOUT ROWID"""
+                )
+            self.columns = {row[1] for row in self._conn.execute("PRAGMA table_info(readings)")}
+            self.newest = self._conn.execute("SELECT MAX(time) FROM readings").fetchone()[0]
+
+    def insert(self, reading: Reading) -> None:
+        row = {column_name(name): _number(value) for name, value in reading.data.items()}
+        row.pop("time", None)
+        with self._lock:
+            self.pending.append((reading.timestamp, row))
+            if len(self.pending) >= self.max_pending or self.clock() - self.last_flush >= self.flush_interval:
+                self.flush()
+
+    def insert_many(self, readings: Iterable[Reading]) -> None:
+        for reading in readings:
+            self.insert(reading)
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self.pending = self.pending, []
+            self.last_flush = self.clock()
+            pending = self._new_rows(pending)
+            if not pending:
+                return 0
+            groups: dict[tuple[str, ...], list[tuple]] = {}
+            for timestamp, row in pending:
+                groups.setdefault(tuple(row), []).append((timestamp, *row.values()))
+            with self._conn:
+                for columns, rows in groups.items():
+                    self._add_columns(columns)
+                    names = ", ".join(["time", *(f'"{column}"' for column in columns)])
+                    placeholders = ", ".join("?" * (len(columns) + 1))
+                    self._conn.executemany(f"INSERT OR IGNORE INTO readings ({names}) VALUES ({placeholders})", rows)
+                self._update_rollups(pending)
+            newest = max(timestamp for timestamp, _ in pending)
+            self.newest = newest if self.newest is None else max(self.newest, newest)
+        self._prune_wanted.set()
+        return len(pending)
+
+    def _new_rows(
+        self, pending: list[tuple[int, dict[str, float | None]]]
+    ) -> list[tuple[int, dict[str, float | None]]]:
+        """Drop rows whose timestamp is already stored or repeated in ``pending``.
+
+        The first reading for a timestamp wins, so a replayed reading is not
+        counted into the rollups a second time.
+        """
+        seen: set[int] = set()
+        if self.newest is not None:
+            # Only timestamps up to the newest stored one can already exist.
+            older = sorted({timestamp for timestamp, _ in pending if timestamp <= self.newest})
+            for index in range(0, len(older), 500):
+                chunk = older[index : index + 500]
+                seen.update(
+                    row[0]
+                    for row in self._conn.execute(
+                        f"SELECT time FROM readings WHERE time IN ({', '.join('?' * len(chunk))})", chunk
+                    )
+                )
+        rows = []
+        for timestamp, row in pending:
+            if timestamp not in seen:
+                seen.add(timestamp)
+                rows.append((timestamp, row))
+        return rows
+
+    def prune_expired(self) -> int:
+        """Delete every expired row, ``prune_batch`` rows per table per transaction."""
+        deleted = 0
+        while not self._stop.is_set():
+            batch = self.prune()
+            deleted += batch
+            if not batch:
+                break
+        return deleted
+
+    def prune(self, limit: int | None = None) -> int:
+        """Delete up to ``limit`` expired rows from each table, oldest first."""
+        limit = self.prune_batch if limit is None else limit
+        deleted = 0
+        with self._lock:
+            if self.newest is None:
+                return 0
+            with self._conn:
+                cutoff = self._raw_cutoff()
+                if cutoff is not None:
+                    deleted += self._conn.execute(
+                        "DELETE FROM readings WHERE time IN "
+                        "(SELECT time FROM readings WHERE time < ? ORDER BY time LIMIT ?)",
+                        (cutoff, limit),
+                    ).rowcount
+                for resolution, retention in self.rollup_retention.items():
+                    if retention is None:
+                        continue
+                    deleted += self._conn.execute(
+                        f"DELETE FROM rollup_{resolution} WHERE bucket IN "
+                        f"(SELECT DISTINCT bucket FROM rollup_{resolution} WHERE bucket < ? ORDER BY bucket LIMIT ?)",
+                        (self.newest - retention, limit),
+                    ).rowcount
+            if deleted:
+                self._conn.execute("PRAGMA incremental_vacuum").fetchall()
+        return deleted
+
+    def _raw_cutoff(self) -> int | None:
+        cutoffs = []
+        if self.max_age is not None:
+            cutoffs.append(self.newest - self.max_age)
+        if self.max_rows is not None:
+            row = self._conn.execute(
+                "SELECT time FROM readings ORDER BY time DESC LIMIT 1 OFFSET ?", (self.max_rows - 1,)
+            ).fetchone()
+            if row is not None:
+                cutoffs.append(row[0])
+        return max(cutoffs, default=None)
+
+    def _update_rollups(self, pending: list[tuple[int, dict[str, float | None]]]) -> None:
+        for resolution in ROLLUP_RESOLUTIONS:
+            # [count, sum, min, max, last, last_time] per (bucket, field); pending is in arrival order.
+            buckets: dict[tuple[int, str], list] = {}
+            for timestamp, row in pending:
+                bucket = timestamp - timestamp % resolution
+                for field, value in row.items():
+                    if value is None:
+                        continue
+                    state = buckets.get((bucket, field))
+                    if state is None:
+                        buckets[bucket, field] = [1, value, value, value, value, timestamp]
+                        continue
+                    state[0] += 1
+                    state[1] += value
+                    if value < state[2]:
+                        state[2] = value
+                    if value > state[3]:
+                        state[3] = value
+                    if timestamp >= state[5]:
+                        state[4], state[5] = value, timestamp
+            self._conn.executemany(
+                f"""INSERT INTO rollup_{resolution} (bucket, field, count, sum, min, max, last, last_time)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (bucket, field) DO UPDATE SET
+                        count = count + excluded.count,
+                        sum = sum + excluded.sum,
+                        min = MIN(min, excluded.min),
+                        max = MAX(max, excluded.max),
+                        last = CASE WHEN excluded.last_time >= last_time THEN excluded.last ELSE last END,
+                        last_time = MAX(last_time, excluded.last_time)""",
+                [(bucket, field, *state) for (bucket, field), state in buckets.items()],
+            )
+
+    def _add_columns(self, columns: Iterable[str]) -> None:
+        for column in columns:
+            if column not in self.columns:
+                self._conn.execute(f'ALTER TABLE readings ADD COLUMN "{column}" REAL')
+                self.columns.add(column)
+
+    def readings(self, start: int | None = None, end: int | None = None) -> list[Reading]:
+        """Stored readings with ``start <= time < end``, oldest first; empty fields are left out."""
+        self.flush()
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM readings WHERE time >= ? AND time < ? ORDER BY time",
+                (-(2**63) if start is None else start, 2**63 - 1 if end is None else end),
+            )
+            names = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        return [
+            Reading(
+                timestamp=row[0],
+                data={name: value for name, value in zip(names, row, strict=True) if value is not None},
+            )
+            for row in rows
+        ]
+
+    def aggregate(self, field: str, start: int, end: int) -> Aggregate | None:
+        """Combine every value of ``field`` with ``start <= time < end``.
+
+        The range is split into the coarsest whole rollup buckets that fit, with
+        finer buckets, and finally raw rows, only for the partial edges.
+        """
+        self.flush()
+        column = column_name(field)
+        result = None
+        with self._lock:
+            for resolution, lo, hi in _cover(start, end, ROLLUP_RESOLUTIONS[::-1]):
+                if resolution is None:
+                    aggregates = self._raw_aggregates(column, lo, hi)
+                else:
+                    aggregates = self.rollups(field, resolution, lo, hi)
+                for aggregate in aggregates:
+                    result = aggregate if result is None else result.merge(aggregate)
+        return result
+
+    def rollups(self, field: str, resolution: int, start: int, end: int) -> list[Aggregate]:
+        """Rollup buckets of ``field`` at ``resolution`` seconds starting in ``[start, end)``."""
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {', '.join(map(str, ROLLUP_RESOLUTIONS))}")
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT bucket, count, sum, min, max, last, last_time FROM rollup_{resolution}
+                    WHERE field = ? AND bucket >= ? AND bucket < ? ORDER BY bucket""",
+                (column_name(field), start, end),
+            ).fetchall()
+        return [Aggregate(*row) for row in rows]
+
+    def _raw_aggregates(self, column: str, start: int, end: int) -> list[Aggregate]:
+        if column not in self.columns:
+            return []
+        rows = self._conn.execute(
+            f'SELECT time, "{column}" FROM readings WHERE time >= ? AND time < ? AND "{column}" IS NOT NULL',
+            (start, end),
+        ).fetchall()
+        return [Aggregate(time, 1, value, value, value, value, time) for time, value in rows]
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="umd-prune", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        self._prune_wanted.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._prune_wanted.wait(self.prune_interval)
+            self._prune_wanted.clear()
+            try:
+                self.prune_expired()
+            except Exception:
+                logger.exception("Error occurred while pruning the history")
+
+    def close(self) -> None:
+        self.stop()
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+def _cover(start: int, end: int, resolutions: tuple[int, ...]) -> list[tuple[int | None, int, int]]:
+    """Split ``[start, end)`` into whole buckets of the coarsest resolution first; ``None`` marks raw rows."""
+    if start >= end:
+        return []
+    if not resolutions:
+        return [(None, start, end)]
+    resolution, finer = resolutions[0], resolutions[1:]
+    first = -(-start // resolution) * resolution
+    last = end // resolution * resolution
+    if first >= last:
+        return _cover(start, end, finer)
+    return [*_cover(start, first, finer), (resolution, first, last), *_cover(last, end, finer)]
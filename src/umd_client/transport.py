@@ -1,14 +1,25 @@
+import gzip
+import http.client
+import io
 import json
+import logging
+import socket
+import ssl
+import threading
 import time
 import urllib.error
+import urllib.parse
 import urllib.request
 from collections.abc import Callable
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Any
 
 Payload = dict[str, Any]
 UrlOpen = Callable[[urllib.request.Request, int], Any]
 
+logger = logging.getLogger(__name__)
+
 
 def build_payload(
     station_name: str,
@@ -33,6 +44,51 @@ def build_payload(
     }
 
 
+_HOLD_FIELDS = ("hold1", "hold2", "hold3")
+_dumps = json.JSONEncoder(ensure_ascii=True, allow_nan=True, separators=(",", ":")).encode
+
+
+class PayloadEncoder:
+    """Compact payload encoder compiled once per station and field schema.
+
+    ``id``, ``key``, the field names and the ``hold`` placeholders are rendered
+    into a format string up front, so encoding a reading only formats its values.
+    The output is byte-for-byte ``encode_payload(build_payload(...), indent=None)``.
+    """
+
+    def __init__(self, station_name: str, station_key: str, value_names: list[str]) -> None:
+        _check_required_string("station_name", station_name)
+        _check_required_string("key", station_key)
+        self.value_names = tuple(value_names)
+        if len(set(self.value_names)) != len(self.value_names) or set(self.value_names) & set(_HOLD_FIELDS):
+            raise ValueError("value_names must be unique and must not use the hold fields")
+
+        head = '{"id":' + _literal(station_name) + ',"timestamp":%s,"key":' + _literal(station_key) + ',"data":{'
+        fields = [_literal(name) + ":%s" for name in self.value_names]
+        tail = ",".join(_literal(name) + ":null" for name in _HOLD_FIELDS) + "}}"
+        # One format per value count, because build_payload drops names that have no value.
+        self._formats = [head + ",".join(fields[:count] + [tail]) for count in range(len(fields) + 1)]
+
+    def encode(self, values: list[Any], timestamp: int | None = None) -> bytes:
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        values = values[: len(self.value_names)]
+        return (self._formats[len(values)] % (_encode_value(timestamp), *map(_encode_value, values))).encode("ascii")
+
+
+def _literal(value: str) -> str:
+    return _dumps(value).replace("%", "%%")
+
+
+def _encode_value(value: Any) -> str:
+    value_type = type(value)
+    # ``value - value`` is NaN for NaN and infinities, which json spells differently from repr.
+    if value_type is float and value - value == 0:
+        return float.__repr__(value)
+    if value_type is int:
+        return int.__repr__(value)
+    return _dumps(value)
+
+
 def send_payload(
     server: str,
     payload: Payload,
@@ -41,24 +97,63 @@ def send_payload(
     opener: UrlOpen = urllib.request.urlopen,
 ) -> bool:
     transmit_data = encode_payload(payload)
-    sent = True
+    sent = post_body(server, transmit_data, timeout=timeout, opener=opener)
+    write_latest(latest_path, transmit_data)
+    return sent
+
+
+def post_batch(
+    server: str,
+    bodies: list[bytes],
+    timeout: int = 5,
+    opener: UrlOpen = urllib.request.urlopen,
+) -> bool:
+    """POST several encoded payloads as one gzip-compressed JSON array."""
+    return post_body(
+        server,
+        gzip.compress(encode_batch(bodies), mtime=0),
+        timeout=timeout,
+        opener=opener,
+        headers={"Content-Encoding": "gzip"},
+    )
 
+
+def post_body(
+    server: str,
+    body: bytes,
+    timeout: int = 5,
+    opener: UrlOpen = urllib.request.urlopen,
+    headers: dict[str, str] | None = None,
+) -> bool:
+    """POST an encoded body and report whether the server answered with a 2xx status."""
+    request = urllib.request.Request(
+        url=server,
+        data=body,
+        headers={"Content-Type": "application/json", **(headers or {})},
+    )
     try:
-        request = urllib.request.Request(
-            url=server,
-            data=transmit_data,
-            headers={"Content-Type": "application/json"},
-        )
-        opener(request, timeout)
+        response = opener(request, timeout)
     except urllib.error.URLError as e:
-        sent = False
-        print(f"Request failed: {e.reason}")
+        logger.warning("Request failed: %s", e.reason)
+        return False
+    except (OSError, http.client.HTTPException) as e:
+        logger.warning("Request failed: %s", e)
+        return False
 
+    status = getattr(response, "status", 200)
+    if hasattr(response, "close"):
+        response.close()
+    if not 200 <= status < 300:
+        logger.warning("Request failed: server answered %s", status)
+        return False
+    return True
+
+
+def write_latest(latest_path: str | Path, body: bytes) -> None:
     latest = Path(latest_path)
     if latest.parent != Path("."):
         latest.parent.mkdir(parents=True, exist_ok=True)
-    latest.write_bytes(transmit_data)
-    return sent
+    latest.write_bytes(body)
 
 
 def send_to(key: str, name: str, server: str, value_name: list[str], value: list[Any]) -> bool:
@@ -66,8 +161,252 @@ def send_to(key: str, name: str, server: str, value_name: list[str], value: list
     return send_payload(server=server, payload=payload)
 
 
-def encode_payload(payload: Payload) -> bytes:
-    return json.dumps(payload, ensure_ascii=True, allow_nan=True, indent=4).encode("utf-8")
+def encode_payload(payload: Payload, indent: int | None = 4) -> bytes:
+    separators = None if indent is not None else (",", ":")
+    return json.dumps(payload, ensure_ascii=True, allow_nan=True, indent=indent, separators=separators).encode("utf-8")
+
+
+def encode_batch(bodies: list[bytes]) -> bytes:
+    return b"[" + b",".join(bodies) + b"]"
+
+
+class CircuitBreaker:
+    """Stop sending to a server that keeps failing.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``allow`` answers False without touching the network. Once the reset timeout
+    has passed a single half-open probe is let through: success closes the
+    breaker, failure reopens it with the timeout doubled up to ``max_reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        max_reset_timeout: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.short_circuited = 0
+        self.transitions = 0
+        self._timeout = reset_timeout
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() >= self._open_until:
+                self._transition(self.HALF_OPEN)
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._timeout = self.reset_timeout
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                self._timeout = min(self.max_reset_timeout, self._timeout * 2)
+                self._open()
+            elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self._open_until - self.clock())
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_in": round(self.retry_in(), 1),
+            "short_circuited": self.short_circuited,
+            "transitions": self.transitions,
+        }
+
+    def _open(self) -> None:
+        self._open_until = self.clock() + self._timeout
+        self._transition(self.OPEN)
+
+    def _transition(self, state: str) -> None:
+        logger.log(
+            logging.WARNING if state == self.OPEN else logging.INFO,
+            "Circuit breaker %s -> %s after %s consecutive failures%s",
+            self.state,
+            state,
+            self.failures,
+            f", next probe in {self._timeout:.0f} seconds" if state == self.OPEN else "",
+        )
+        self.state = state
+        self.transitions += 1
+
+
+@dataclass
+class ConnectionStats:
+    requests: int = 0
+    connections: int = 0
+    reused: int = 0
+    reconnects: int = 0
+    dns_lookups: int = 0
+    tls_resumed: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class KeepAliveClient:
+    """``urlopen``-compatible opener that keeps one persistent connection per host.
+
+    The resolved address and the TLS session are cached per host, so a reconnect
+    skips DNS and resumes TLS. A request that fails on a reused connection (the
+    server dropped it while idle) is retried once on a fresh one. Pass an instance
+    wherever an ``opener`` is accepted.
+    """
+
+    def __init__(self, context: ssl.SSLContext | None = None, resolve=socket.getaddrinfo) -> None:
+        self.context = ssl.create_default_context() if context is None else context
+        self.resolve = resolve
+        self.stats = ConnectionStats()
+        self._connections: dict[tuple[str, str, int], http.client.HTTPConnection] = {}
+        self._addresses: dict[tuple[str, int], tuple[int, Any]] = {}
+        self._tls_sessions: dict[tuple[str, int], ssl.SSLSession] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, request: urllib.request.Request, timeout: float) -> http.client.HTTPResponse:
+        url = urllib.parse.urlsplit(request.full_url)
+        if url.scheme not in {"http", "https"} or not url.hostname:
+            raise urllib.error.URLError(f"unsupported URL: {request.full_url}")
+        port = url.port or (443 if url.scheme == "https" else 80)
+        key = (url.scheme, url.hostname, port)
+        path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        headers = dict(request.header_items())
+
+        with self._lock:
+            self.stats.requests += 1
+            retried = False
+            while True:
+                reused = False
+                try:
+                    connection, reused = self._connection(key, timeout)
+                    connection.request(request.get_method(), path, body=request.data, headers=headers)
+                    response = connection.getresponse()
+                    body = response.read()
+                except (OSError, http.client.HTTPException) as exc:
+                    self._discard(key)
+                    if reused and not retried:
+                        retried = True
+                        self.stats.reconnects += 1
+                        continue
+                    self._addresses.pop(key[1:], None)
+                    raise urllib.error.URLError(exc) from exc
+
+                if isinstance(connection.sock, ssl.SSLSocket):
+                    self._tls_sessions[key[1:]] = connection.sock.session
+                if response.will_close:
+                    self._discard(key)
+                if response.status >= 400:
+                    raise urllib.error.HTTPError(
+                        request.full_url, response.status, response.reason, response.headers, io.BytesIO(body)
+                    )
+                return response
+
+    def close(self) -> None:
+        with self._lock:
+            for key in list(self._connections):
+                self._discard(key)
+
+    def _connection(self, key: tuple[str, str, int], timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        connection = self._connections.get(key)
+        if connection is not None and connection.sock is not None:
+            connection.sock.settimeout(timeout)
+            self.stats.reused += 1
+            return connection, True
+
+        scheme, host, port = key
+        address = self._addresses.get((host, port))
+        if address is None:
+            family, _, _, _, sockaddr = self.resolve(host, port, type=socket.SOCK_STREAM)[0]
+            address = self._addresses[(host, port)] = (family, sockaddr)
+            self.stats.dns_lookups += 1
+        if scheme == "https":
+            connection = _HTTPSConnection(host, port, timeout, address, self.context, self._tls_sessions.get((host, port)))
+        else:
+            connection = _HTTPConnection(host, port, timeout, address)
+        connection.connect()
+        if isinstance(connection.sock, ssl.SSLSocket) and connection.sock.session_reused:
+            self.stats.tls_resumed += 1
+        self.stats.connections += 1
+        self._connections[key] = connection
+        return connection, False
+
+    def _discard(self, key: tuple[str, str, int]) -> None:
+        connection = self._connections.pop(key, None)
+        if connection is not None:
+            connection.close()
+
+
+def _open_socket(address: tuple[int, Any], timeout: float) -> socket.socket:
+    family, sockaddr = address
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(sockaddr)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class _HTTPConnection(http.client.HTTPConnection):
+    def __init__(self, host: str, port: int, timeout: float, address: tuple[int, Any]) -> None:
+        super().__init__(host, port, timeout=timeout)
+        self._address = address
+
+    def connect(self) -> None:
+        self.sock = _open_socket(self._address, self.timeout)
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float,
+        address: tuple[int, Any],
+        context: ssl.SSLContext,
+        session: ssl.SSLSession | None,
+    ) -> None:
+        super().__init__(host, port, timeout=timeout, context=context)
+        self._address = address
+        self._session = session
+
+    def connect(self) -> None:
+        sock = _open_socket(self._address, self.timeout)
+        try:
+            self.sock = self._context.wrap_socket(sock, server_hostname=self.host, session=self._session)
+        except OSError:
+            sock.close()
+            raise
 
 
 def _check_required_string(name: str, value: str) -> None:
@@ -0,0 +1,248 @@
+import logging
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from umd_client.config import ClientConfig
+from umd_client.deadband import DeadbandFilter
+from umd_client.sensors.types import Reading
+from umd_client.storage.outbox import Outbox
+from umd_client.transport import (
+    CircuitBreaker,
+    KeepAliveClient,
+    PayloadEncoder,
+    UrlOpen,
+    post_batch,
+    post_body,
+    write_latest,
+)
+
+logger = logging.getLogger("umd_client")
+
+
+class OutboxDrainer:
+    """Background thread that uploads outbox entries oldest-first.
+
+    Entries are sent ``batch_size`` at a time; a partial batch waits until its
+    oldest entry is ``batch_max_age`` seconds old. Entries are deleted only after
+    ``send`` reports success. After a failure the drainer backs off exponentially
+    (with jitter) before trying again.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        send: Callable[[list[bytes]], bool],
+        breaker: CircuitBreaker | None = None,
+        batch_size: int = 1,
+        batch_max_age: float = 0.0,
+        base_delay: float = 5.0,
+        max_delay: float = 900.0,
+        idle_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+        jitter: Callable[[], float] = random.random,
+    ) -> None:
+        self.outbox = outbox
+        self.send = send
+        self.breaker = breaker
+        self.batch_size = batch_size
+        self.batch_max_age = batch_max_age
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idle_interval = idle_interval
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.jitter = jitter
+        self.failures = 0
+        self.retry_at = 0.0
+        self.batch_due_in: float | None = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def backoff(self, failures: int) -> float:
+        # Clamp the exponent so a long outage cannot overflow the float.
+        delay = min(self.max_delay, self.base_delay * 2 ** min(failures - 1, 32))
+        return delay / 2 + delay / 2 * self.jitter()
+
+    def drain_once(self) -> int:
+        sent = 0
+        self.batch_due_in = None
+        while not self._stop.is_set() and self.clock() >= self.retry_at:
+            entries = self.outbox.peek(limit=self.batch_size)
+            if not entries:
+                break
+            age = self.wall_clock() - entries[0].created
+            if len(entries) < self.batch_size and age < self.batch_max_age:
+                self.batch_due_in = self.batch_max_age - age
+                break
+            ids = [entry.id for entry in entries]
+            if not self.send([entry.body for entry in entries]):
+                self.outbox.record_attempt(ids)
+                self.failures += 1
+                delay = self.backoff(self.failures)
+                if self.breaker is not None:
+                    delay = max(delay, self.breaker.retry_in())
+                self.retry_at = self.clock() + delay
+                logger.info("Upload failed, %s payloads queued, retrying in %.1f seconds", len(self.outbox), delay)
+                break
+            self.outbox.delete(ids)
+            self.failures = 0
+            sent += len(ids)
+        return sent
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="umd-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.drain_once()
+            except Exception:
+                logger.exception("Error occurred while draining the outbox")
+            delays = [self.idle_interval, self.retry_at - self.clock()]
+            if self.batch_due_in is not None:
+                delays.append(self.batch_due_in)
+            self._wake.wait(min(delay for delay in delays if delay > 0))
+            self._wake.clear()
+
+
+class Uplink:
+    """Send readings to the server, directly or through the durable outbox.
+
+    With a deadband filter, readings that have not moved outside any deadband are
+    dropped before encoding until the heartbeat expires. Every send goes through a
+    circuit breaker. While it is open, sends fail fast
+    and payloads wait in the outbox or, without one, in a bounded memory queue
+    that is flushed ahead of the next reading.
+    """
+
+    def __init__(
+        self,
+        config: ClientConfig,
+        outbox: Outbox | None = None,
+        opener: UrlOpen = urllib.request.urlopen,
+        latest_path: str | Path = "latest_data.json",
+        breaker: CircuitBreaker | None = None,
+        deadband: DeadbandFilter | None = None,
+    ) -> None:
+        self.config = config
+        self.outbox = outbox
+        self.opener = opener
+        self.latest_path = latest_path
+        self.breaker = CircuitBreaker() if breaker is None else breaker
+        self.deadband = deadband
+        self.pending: deque[bytes] = deque(maxlen=config.storage_size)
+        self._encoders: dict[tuple[str, ...], PayloadEncoder] = {}
+        self.drainer = None
+        if outbox is not None:
+            self.drainer = OutboxDrainer(
+                outbox,
+                self.send_bodies,
+                breaker=self.breaker,
+                batch_size=config.batch_size,
+                batch_max_age=config.batch_max_age,
+            )
+
+    def publish(self, reading: Reading) -> bool:
+        """Send or queue one reading; returns False only when a send failed."""
+        if self.deadband is not None and not self.deadband.should_send(reading):
+            return True
+        body = self.encode(reading)
+        write_latest(self.latest_path, body)
+        if self.outbox is None:
+            self.pending.append(body)
+            return self.flush_pending()
+
+        self.outbox.put(body)
+        self.drainer.wake()
+        return True
+
+    def flush_pending(self) -> bool:
+        while self.pending:
+            if not self.send_bodies([self.pending[0]]):
+                return False
+            self.pending.popleft()
+        return True
+
+    def encode(self, reading: Reading) -> bytes:
+        value_names = tuple(reading.value_names)
+        encoder = self._encoders.get(value_names)
+        if encoder is None:
+            encoder = PayloadEncoder(self.config.station_name, self.config.station_key, reading.value_names)
+            self._encoders[value_names] = encoder
+        return encoder.encode(reading.values)
+
+    def send_bodies(self, bodies: list[bytes]) -> bool:
+        if not self.breaker.allow():
+            return False
+        sent = False
+        # Settle the breaker however the send ends, or a half-open probe that raises leaves it stuck.
+        try:
+            if self.config.batch_size == 1 and len(bodies) == 1:
+                sent = post_body(self.config.server, bodies[0], opener=self.opener)
+            else:
+                sent = post_batch(self.config.server, bodies, opener=self.opener)
+        finally:
+            if sent:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+        return sent
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "breaker": self.breaker.status(),
+            "queued": len(self.pending) if self.outbox is None else len(self.outbox),
+            "suppressed": 0 if self.deadband is None else self.deadband.suppressed,
+            "connections": self.connection_stats(),
+        }
+
+    def start(self) -> None:
+        if self.drainer is not None:
+            self.drainer.start()
+
+    def connection_stats(self) -> dict[str, int] | None:
+        stats = getattr(self.opener, "stats", None)
+        return None if stats is None else stats.as_dict()
+
+    def close(self) -> None:
+        if self.drainer is not None:
+            self.drainer.stop(timeout=10)
+        if self.outbox is not None:
+            self.outbox.close()
+        if isinstance(self.opener, KeepAliveClient):
+            logger.info("HTTP connection statistics: %s", self.connection_stats())
+            self.opener.close()
+
+
+def build_uplink(config: ClientConfig, latest_path: str | Path = "latest_data.json") -> Uplink:
+    outbox = None
+    if config.outbox_enabled:
+        outbox = Outbox(config.data_path / "outbox.sqlite3", max_entries=config.storage_size)
+    opener = KeepAliveClient() if config.http_keep_alive else urllib.request.urlopen
+    breaker = CircuitBreaker(
+        failure_threshold=config.breaker_failure_threshold,
+        reset_timeout=config.breaker_reset_timeout,
+        max_reset_timeout=config.breaker_max_reset_timeout,
+    )
+    deadband = DeadbandFilter(config.deadbands, config.heartbeat_interval) if config.deadbands else None
+    return Uplink(config, outbox=outbox, opener=opener, latest_path=latest_path, breaker=breaker, deadband=deadband)
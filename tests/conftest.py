@@ -0,0 +1,19 @@
+import pytest
+
+
+class FakeClock:
+    """Monotonic clock for tests: ``now`` only moves when a test sets it or calls ``sleep``."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
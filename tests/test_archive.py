@@ -0,0 +1,54 @@
+import time
+
+from umd_client.storage import archive
+from umd_client.storage.archive import ArchiveWriter, archive_path
+
+
+def local(*date_time):
+    return int(time.mktime((*date_time, 0, 0, -1)))
+
+
+def test_archive_writes_overlapping_windows_once_and_buffers(tmp_path):
+    writer = ArchiveWriter(tmp_path, ["time", "uv"], flush_rows=100)
+    start = local(2024, 3, 1, 12, 0, 0)
+
+    assert writer.write_rows([start + t, t] for t in range(3)) == 3
+    assert writer.write_rows([start + t, t] for t in range(1, 5)) == 2
+    path = archive_path(tmp_path, start)
+    assert len(path.read_text().splitlines()) <= 1
+
+    writer.close()
+    assert path.read_text().splitlines() == ["time,uv"] + [f"{start + t},{t}" for t in range(5)]
+
+
+def test_archive_rotates_at_local_midnight_and_resumes_after_restart(tmp_path):
+    before = local(2024, 3, 1, 23, 59, 59)
+    after = local(2024, 3, 2, 0, 0, 0)
+    writer = ArchiveWriter(tmp_path, ["time", "uv"], flush_rows=1)
+    writer.write([before, 1])
+    writer.write([after, 2])
+    writer.close()
+
+    restarted = ArchiveWriter(tmp_path, ["time", "uv"], flush_rows=1)
+    assert restarted.write([after, 2]) is False
+    assert restarted.write([after + 1, 3]) is True
+    restarted.close()
+
+    assert (tmp_path / "2024" / "3" / "1.csv").read_text() == f"time,uv\n{before},1\n"
+    assert (tmp_path / "2024" / "3" / "2.csv").read_text() == f"time,uv\n{after},2\n{after + 1},3\n"
+
+
+def test_windows_straddling_midnight_close_the_previous_day_once(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(archive.os, "fsync", synced.append)
+    midnight = local(2024, 3, 2, 0, 0, 0)
+    writer = ArchiveWriter(tmp_path, ["time", "uv"], flush_rows=100)
+
+    for end in range(midnight, midnight + 5):
+        writer.write_rows([t, t - midnight] for t in range(end - 3, end + 1))
+
+    assert len(synced) == 1
+    assert writer.path == archive_path(tmp_path, midnight)
+    writer.close()
+    assert len((tmp_path / "2024" / "3" / "1.csv").read_text().splitlines()) == 4
+    assert len((tmp_path / "2024" / "3" / "2.csv").read_text().splitlines()) == 6
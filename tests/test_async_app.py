@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+from umd_client import async_app
+from umd_client.async_app import RuntimeState, TaskRunner, serve
+from umd_client.config import ClientConfig
+from umd_client.scheduler import ScheduledTask
+from umd_client.sensors.types import Reading
+
+
+class FakeSensor:
+    def __init__(self):
+        self.reads = 0
+
+    def read(self):
+        self.reads += 1
+        return Reading(timestamp=self.reads, data={"time": self.reads, "temperature": 20.0})
+
+
+def test_task_runner_times_out_and_skips_while_busy():
+    release = threading.Event()
+    runner = TaskRunner("camera", timeout=0.05)
+
+    async def scenario():
+        first = await runner.run(release.wait)
+        second = await runner.run(lambda: "ran")
+        release.set()
+        await asyncio.sleep(0.05)
+        third = await runner.run(lambda: "ran")
+        return first, second, third
+
+    try:
+        assert asyncio.run(scenario()) == (None, None, "ran")
+    finally:
+        runner.shutdown()
+
+
+def test_task_runner_times_the_call_not_the_wait_in_the_queue():
+    runner = TaskRunner("upload", timeout=0.15, skip_if_busy=False)
+    done = []
+
+    async def scenario():
+        await asyncio.gather(runner.run(time.sleep, 0.1), runner.run(time.sleep, 0.1), runner.run(done.append, "ran"))
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        runner.shutdown()
+
+    assert done == ["ran"]
+
+
+def test_task_runner_shutdown_drains_queued_calls():
+    runner = TaskRunner("history", timeout=1, skip_if_busy=False)
+    done = []
+
+    async def scenario():
+        calls = [asyncio.ensure_future(runner.run(time.sleep, 0.1)), asyncio.ensure_future(runner.run(done.append, 1))]
+        await asyncio.sleep(0.01)
+        runner.shutdown(timeout=1)
+        for call in calls:
+            call.cancel()
+
+    asyncio.run(scenario())
+
+    assert done == [1]
+
+
+def test_slow_display_does_not_delay_uploads(monkeypatch):
+    uploads = []
+    monkeypatch.setattr(async_app, "publish_reading", lambda uplink, reading: uploads.append(reading))
+    monkeypatch.setattr(async_app, "refresh_display", lambda reading, config, panel: time.sleep(1.5))
+    config = ClientConfig(station_name="station-a", station_key="secret", server="https://example.test", display_timeout=1)
+    tasks = [ScheduledTask("upload", frequency=1), ScheduledTask("display", frequency=1)]
+    sensor = FakeSensor()
+
+    async def scenario():
+        try:
+            await asyncio.wait_for(serve(config, sensor, tasks=tasks, state=RuntimeState()), timeout=2.5)
+        except TimeoutError:
+            pass
+
+    asyncio.run(scenario())
+
+    assert sensor.reads >= 3
+    assert len(uploads) >= 3
+
+
+def test_failed_read_keeps_the_last_good_reading(monkeypatch):
+    monkeypatch.setattr(async_app, "publish_reading", lambda uplink, reading: None)
+    config = ClientConfig(station_name="station-a", station_key="secret", server="https://example.test")
+    state = RuntimeState(latest_reading=Reading(timestamp=1, data={"temperature": 20.0}))
+
+    class BrokenSensor:
+        def read(self):
+            raise OSError("bus error")
+
+    async def scenario():
+        try:
+            await asyncio.wait_for(
+                serve(config, BrokenSensor(), tasks=[ScheduledTask("upload", frequency=1)], state=state), timeout=0.5
+            )
+        except TimeoutError:
+            pass
+
+    asyncio.run(scenario())
+
+    assert state.latest_reading.timestamp == 1
@@ -0,0 +1,90 @@
+import pytest
+
+from umd_client.sampler import Sampler
+from umd_client.sensors.types import Reading
+from umd_client.storage.binlog import BinLog, encode_header, read_header, read_segment
+
+numpy = pytest.importorskip("numpy")
+
+DAY = 1_700_006_400  # 2023-11-15T00:00:00Z
+
+
+def test_binlog_writes_daily_segments_with_a_schema_header(tmp_path):
+    binlog = BinLog(tmp_path)
+    for offset in [0, 2, 86400 - 1, 86400, 86402]:
+        binlog.append(Reading(timestamp=DAY + offset, data={"time": DAY + offset, "temperature": offset / 2, "uv": None}))
+    binlog.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["20231115-00.bin", "20231116-00.bin"]
+    fields, offset = read_header((tmp_path / "20231115-00.bin").read_bytes())
+    assert fields == ["time", "temperature", "uv"]
+    assert offset % 8 == 0
+
+    columns = BinLog(tmp_path).read(start=DAY + 1, end=DAY + 86401)
+    assert columns["time"].tolist() == [DAY + 2, DAY + 86399, DAY + 86400]
+    assert columns["temperature"].tolist() == [1.0, 43199.5, 43200.0]
+    assert numpy.isnan(columns["uv"]).all()
+
+
+def test_binlog_drops_torn_records_and_starts_a_new_part_on_schema_change(tmp_path):
+    binlog = BinLog(tmp_path)
+    binlog.append(Reading(timestamp=DAY, data={"temperature": 1.0}))
+    binlog.close()
+    with (tmp_path / "20231115-00.bin").open("ab") as f:
+        f.write(b"\x00\x01\x02")
+
+    binlog = BinLog(tmp_path)
+    binlog.append(Reading(timestamp=DAY + 1, data={"temperature": 2.0}))
+    binlog.close()
+    other = BinLog(tmp_path)
+    other.append(Reading(timestamp=DAY + 2, data={"pressure": 1013.0}))
+
+    assert other.read(fields=["temperature"])["temperature"].tolist()[:2] == [1.0, 2.0]
+    assert other.read(fields=["pressure"])["pressure"].tolist()[2] == 1013.0
+    assert len(list(tmp_path.iterdir())) == 2
+    other.close()
+
+
+def test_binlog_starts_a_new_part_when_a_reading_brings_new_fields(tmp_path, caplog):
+    binlog = BinLog(tmp_path)
+    binlog.append(Reading(timestamp=DAY, data={"temperature": 1.0}))
+    binlog.append(Reading(timestamp=DAY + 1, data={"temperature": 2.0, "uv": 3.0}))
+    binlog.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["20231115-00.bin", "20231115-01.bin"]
+    columns = BinLog(tmp_path).read()
+    assert columns["temperature"].tolist() == [1.0, 2.0]
+    assert columns["uv"][1] == 3.0
+
+    fixed = BinLog(tmp_path / "fixed", fields=["temperature"])
+    fixed.append(Reading(timestamp=DAY, data={"temperature": 1.0, "uv": 3.0}))
+    fixed.close()
+    assert "uv" in caplog.text
+    assert list(fixed.read()) == ["time", "temperature"]
+
+
+def test_read_segment_returns_no_records_for_empty_and_header_only_files(tmp_path):
+    (tmp_path / "20231115-00.bin").write_bytes(b"")
+    (tmp_path / "20231116-00.bin").write_bytes(encode_header(["time", "uv"]))
+
+    assert len(read_segment(tmp_path / "20231115-00.bin")) == 0
+    assert read_segment(tmp_path / "20231116-00.bin").dtype.names == ("time", "uv")
+    assert BinLog(tmp_path).read(fields=["uv"])["uv"].tolist() == []
+
+
+def test_sampler_appends_raw_samples_to_the_binlog(tmp_path):
+    class Sensor:
+        def __init__(self):
+            self.timestamp = DAY
+
+        def read(self):
+            self.timestamp += 1
+            return Reading(timestamp=self.timestamp, data={"temperature": 20.0})
+
+    sampler = Sampler(Sensor(), binlog=BinLog(tmp_path))
+    for _ in range(3):
+        sampler.sample()
+    sampler.read()
+    sampler.close()
+
+    assert BinLog(tmp_path).read()["time"].tolist() == [DAY + 1, DAY + 2, DAY + 3]
@@ -49,3 +49,43 @@ def test_capture_config_uses_data_path_photo_directory(tmp_path):
     config = CaptureConfig(data_path=tmp_path)
 
     assert config.photo_dir == tmp_path / "photo"
+
+
+def test_capture_photo_with_photo_quota_records_instead_of_pruning(tmp_path):
+    from umd_client.camera.ov5647 import capture_photo
+    from umd_client.storage.quota import QuotaManager
+
+    (tmp_path / "photo").mkdir()
+    (tmp_path / "photo" / "earlier.jpg").write_text("old", encoding="utf-8")
+    quota = QuotaManager(tmp_path, {"photos": 1024})
+
+    def runner(command, check):
+        with open(command[-1], "w", encoding="utf-8") as f:
+            f.write("new")
+
+    output = capture_photo(tmp_path, LocationConfig(timezone="UTC"), timestamp=12 * 60 * 60, runner=runner, quota=quota)
+
+    assert (tmp_path / "photo" / "earlier.jpg").exists()
+    assert quota.usage()["photos"] == {"bytes": 6, "files": 2, "budget": 1024, "evicted_files": 0, "evicted_bytes": 0}
+    assert output.exists()
+
+
+def test_capture_photo_keeps_the_same_time_on_different_days(tmp_path):
+    from umd_client.camera.ov5647 import capture_photo
+    from umd_client.storage.quota import QuotaManager
+
+    quota = QuotaManager(tmp_path, {"photos": 1024})
+
+    def runner(command, check):
+        with open(command[-1], "w", encoding="utf-8") as f:
+            f.write("new")
+
+    outputs = [
+        capture_photo(
+            tmp_path, LocationConfig(timezone="UTC"), timestamp=day * 86400 + 43200, runner=runner, quota=quota
+        )
+        for day in range(3)
+    ]
+
+    assert [path.name for path in outputs] == ["19700101-120000.jpg", "19700102-120000.jpg", "19700103-120000.jpg"]
+    assert quota.usage()["photos"]["files"] == 3
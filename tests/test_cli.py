@@ -39,3 +39,21 @@ def test_debug_command_help_imports_without_hardware_dependencies():
 
         assert result.returncode == 0
         assert "--config" in result.stdout
+
+
+def test_loadtest_help_imports_without_hardware_dependencies():
+    project_root = Path(__file__).resolve().parents[1]
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(project_root / "src")
+
+    result = subprocess.run(
+        [sys.executable, "-m", "umd_client", "loadtest", "--help"],
+        check=False,
+        cwd=project_root,
+        env=env,
+        text=True,
+        capture_output=True,
+    )
+
+    assert result.returncode == 0
+    assert "--stations" in result.stdout
@@ -0,0 +1,55 @@
+import gzip
+import json
+import time
+
+from umd_client.storage.archive import ArchiveWriter
+from umd_client.storage.compactor import MANIFEST_NAME, Compactor, read_range
+
+
+def local(*date_time):
+    return int(time.mktime((*date_time, 0, 0, -1)))
+
+
+def write_days(base, starts):
+    writer = ArchiveWriter(base, ["time", "uv"], flush_rows=1)
+    for start in starts:
+        writer.write_rows([start + t * 60, t] for t in range(10))
+    writer.close()
+
+
+def test_compactor_compresses_closed_days_only_and_records_manifest(tmp_path):
+    first, second, today = local(2024, 3, 1, 12, 0, 0), local(2024, 3, 2, 12, 0, 0), local(2024, 3, 3, 12, 0, 0)
+    write_days(tmp_path, [first, second, today])
+    compactor = Compactor(tmp_path, codec="gzip", clock=lambda: today, grace=0)
+
+    assert compactor.run_once() == 2
+    assert compactor.run_once() == 0
+
+    assert not (tmp_path / "2024" / "3" / "1.csv").exists()
+    assert (tmp_path / "2024" / "3" / "3.csv").exists()
+    with gzip.open(tmp_path / "2024" / "3" / "1.csv.gz", "rt") as f:
+        assert f.read().splitlines()[:2] == ["time,uv", f"{first},0"]
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())["files"]
+    assert sorted(manifest) == ["2024/3/1.csv.gz", "2024/3/2.csv.gz"]
+    assert manifest["2024/3/2.csv.gz"]["start"] == second
+    assert manifest["2024/3/2.csv.gz"]["end"] == second + 540
+    assert manifest["2024/3/2.csv.gz"]["rows"] == 10
+
+
+def test_compactor_waits_for_grace_period_after_midnight(tmp_path):
+    write_days(tmp_path, [local(2024, 3, 1, 12, 0, 0)])
+    compactor = Compactor(tmp_path, codec="gzip", clock=lambda: local(2024, 3, 2, 0, 5, 0), grace=3600)
+
+    assert compactor.run_once() == 0
+
+
+def test_read_range_spans_compressed_and_plain_days(tmp_path):
+    first, second = local(2024, 3, 1, 23, 50, 0), local(2024, 3, 2, 0, 0, 0)
+    write_days(tmp_path, [first, second])
+    Compactor(tmp_path, codec="gzip", clock=lambda: second, grace=0).run_once()
+
+    rows = list(read_range(tmp_path, first + 300, second + 180))
+
+    assert [int(row["time"]) for row in rows] == [first + t * 60 for t in range(5, 10)] + [
+        second + t * 60 for t in range(3)
+    ]
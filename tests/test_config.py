@@ -3,6 +3,7 @@ from pathlib import Path
 import pytest
 
 from umd_client.config import ConfigError, load_config
+from umd_client.deadband import Deadband
 
 
 def test_load_config_applies_defaults(tmp_path, monkeypatch):
@@ -46,3 +47,98 @@ def test_load_config_rejects_missing_required_fields(tmp_path):
 
     with pytest.raises(ConfigError, match="station_key"):
         load_config(config_path)
+
+
+def test_load_config_requires_outbox_for_batch_uploads(tmp_path):
+    config_path = tmp_path / ".env.toml"
+    config_path.write_text(
+        "\n".join(
+            [
+                "station_name = 'station-a'",
+                "station_key = 'secret'",
+                "server = 'https://example.test/upload'",
+                "batch_size = 20",
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ConfigError, match="outbox_enabled"):
+        load_config(config_path)
+
+
+def test_load_config_rejects_unknown_archive_compression(tmp_path):
+    config_path = tmp_path / ".env.toml"
+    config_path.write_text(
+        "\n".join(
+            [
+                "station_name = 'station-a'",
+                "station_key = 'secret'",
+                "server = 'https://example.test/upload'",
+                "archive_compression = 'lz4'",
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ConfigError, match="archive_compression"):
+        load_config(config_path)
+
+
+def test_load_config_rejects_unknown_hardware(tmp_path):
+    config_path = tmp_path / ".env.toml"
+    config_path.write_text(
+        "\n".join(
+            [
+                "station_name = 'station-a'",
+                "station_key = 'secret'",
+                "server = 'https://example.test/upload'",
+                "hardware = 'mock'",
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ConfigError, match="hardware"):
+        load_config(config_path)
+
+
+def test_load_config_takes_hardware_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("UMD_HARDWARE", "simulated")
+    config_path = tmp_path / ".env.toml"
+    config_path.write_text(
+        "\n".join(
+            [
+                "station_name = 'station-a'",
+                "station_key = 'secret'",
+                "server = 'https://example.test/upload'",
+                "hardware = 'auto'",
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    assert load_config(config_path).hardware == "simulated"
+
+
+def test_load_config_parses_deadbands(tmp_path):
+    config_path = tmp_path / ".env.toml"
+    config_path.write_text(
+        "\n".join(
+            [
+                "station_name = 'station-a'",
+                "station_key = 'secret'",
+                "server = 'https://example.test/upload'",
+                "heartbeat_interval = 900",
+                "[deadband]",
+                "temperature = 0.2",
+                "lux = '5%'",
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    config = load_config(config_path)
+
+    assert config.deadbands == {"temperature": Deadband(0.2), "lux": Deadband(5.0, relative=True)}
+    assert config.heartbeat_interval == 900
@@ -0,0 +1,33 @@
+import pytest
+
+from umd_client.deadband import Deadband, DeadbandFilter, parse_deadband
+from umd_client.sensors.types import Reading
+
+
+def reading(timestamp, temperature, humidity=60.0, lux=1000.0):
+    return Reading(
+        timestamp=timestamp,
+        data={"time": timestamp, "temperature": temperature, "humidity": humidity, "lux": lux},
+    )
+
+
+def test_parse_deadband_accepts_absolute_and_relative_values():
+    assert parse_deadband(0.5) == Deadband(0.5)
+    assert parse_deadband("2%") == Deadband(2.0, relative=True)
+    with pytest.raises(ValueError):
+        parse_deadband("fast")
+    with pytest.raises(ValueError):
+        parse_deadband(-1)
+
+
+def test_deadband_filter_sends_on_change_or_heartbeat():
+    deadband = DeadbandFilter({"temperature": Deadband(0.5), "lux": Deadband(10.0, relative=True)}, heartbeat=300)
+
+    assert deadband.should_send(reading(0, 20.0)) is True
+    assert deadband.should_send(reading(30, 20.3, humidity=90.0)) is False
+    assert deadband.should_send(reading(60, 20.4, lux=1090.0)) is False
+    assert deadband.should_send(reading(90, 20.6)) is True
+    assert deadband.should_send(reading(120, 20.6, lux=1200.0)) is True
+    assert deadband.should_send(reading(150, 20.6, lux=1200.0)) is False
+    assert deadband.should_send(reading(420, 20.6, lux=1200.0)) is True
+    assert deadband.suppressed == 3
@@ -0,0 +1,54 @@
+import io
+import sys
+
+import pytest
+
+from umd_client.sensors.types import Reading
+from umd_client.storage.export import export
+from umd_client.storage.sqlite import Database
+
+
+def make_history(path):
+    database = Database(path, flush_interval=3600)
+    database.insert_many(
+        Reading(timestamp=t, data={"temperature": t / 10, "uv": None if t % 2 else 3}) for t in range(10)
+    )
+    database.close()
+    return path
+
+
+def test_export_streams_csv_in_chunks(tmp_path):
+    path = make_history(tmp_path / "readings.sqlite3")
+    out = io.StringIO()
+
+    assert export(path, out, start=2, end=7, chunk_size=2) == 5
+    assert out.getvalue().splitlines() == [
+        "time,temperature,uv",
+        "2,0.2,3.0",
+        "3,0.3,",
+        "4,0.4,3.0",
+        "5,0.5,",
+        "6,0.6,3.0",
+    ]
+
+
+def test_export_requires_pyarrow_for_columnar_formats(tmp_path, monkeypatch):
+    path = make_history(tmp_path / "readings.sqlite3")
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    with pytest.raises(RuntimeError, match="pyarrow"):
+        export(path, tmp_path / "out.parquet", start=0, end=10, format="parquet")
+
+
+def test_export_writes_parquet_and_arrow(tmp_path):
+    ipc = pytest.importorskip("pyarrow.ipc")
+    parquet = pytest.importorskip("pyarrow.parquet")
+
+    path = make_history(tmp_path / "readings.sqlite3")
+
+    assert export(path, tmp_path / "out.parquet", start=0, end=10, format="parquet", chunk_size=4) == 10
+    assert export(path, tmp_path / "out.arrow", start=0, end=10, format="arrow", chunk_size=4) == 10
+
+    table = parquet.read_table(tmp_path / "out.parquet")
+    assert table.column("time").to_pylist() == list(range(10))
+    assert ipc.open_file(tmp_path / "out.arrow").read_all().column("uv").null_count == 5
@@ -0,0 +1,74 @@
+import threading
+
+from umd_client.sensors.i2c import I2CBus
+
+
+class FakeSMBus:
+    def __init__(self, registers=None):
+        self.registers = dict(registers or {})
+
+    def read_byte_data(self, address, register):
+        return self.registers.get((address, register), 0)
+
+    def write_byte_data(self, address, register, value):
+        self.registers[(address, register)] = value
+
+    def read_i2c_block_data(self, address, register, length):
+        return [self.registers.get((address, register + offset), 0) for offset in range(length)]
+
+    def write_i2c_block_data(self, address, register, data):
+        for offset, value in enumerate(data):
+            self.registers[(address, register + offset)] = value
+
+
+def test_i2c_bus_counts_transactions_and_bytes_per_device():
+    bus = I2CBus(FakeSMBus({(0x53, 0x10): 7}))
+
+    assert bus.read_byte_data(0x53, 0x10) == 7
+    bus.write_byte_data(0x53, 0x00, 0x0A)
+    assert bus.read_i2c_block_data(0x76, 0xF7, 8) == [0] * 8
+    bus.write_i2c_block_data(0x59, 0x26, [0x0F, 0x80, 0x00])
+
+    assert bus.stats() == {
+        "0x53": {"transactions": 2, "read_bytes": 1, "written_bytes": 3},
+        "0x59": {"transactions": 1, "read_bytes": 0, "written_bytes": 4},
+        "0x76": {"transactions": 1, "read_bytes": 8, "written_bytes": 1},
+    }
+
+
+def test_i2c_bus_lock_groups_multi_step_transfers():
+    bus = I2CBus(FakeSMBus())
+    observed = []
+
+    def other_driver():
+        bus.write_byte_data(0x29, 0xA0, 1)
+        observed.append("other")
+
+    with bus.lock:
+        bus.write_byte_data(0x68, 0x7F, 0x30)
+        thread = threading.Thread(target=other_driver)
+        thread.start()
+        thread.join(0.05)
+        observed.append("bank read")
+        bus.read_i2c_block_data(0x68, 0x2D, 12)
+    thread.join()
+
+    assert observed == ["bank read", "other"]
+
+
+def test_sensor_hat_drivers_read_in_bursts():
+    from umd_client.sensors.sensor_hat.BME280 import BME280
+    from umd_client.sensors.sensor_hat.LTR390 import LTR390
+
+    bus = I2CBus(FakeSMBus({(0x53, 0x06): 0xB2, (0x53, 0x10): 0x34, (0x53, 0x11): 0x12, (0x53, 0x12): 0x01}))
+    uv = LTR390(bus=bus)
+    bme = BME280(bus=bus)
+    before = bus.stats()
+
+    assert uv.UVS() == 0x011234
+    bme.get_calib_param()
+    bme.readData()
+
+    after = bus.stats()
+    assert after["0x53"]["transactions"] - before["0x53"]["transactions"] == 1
+    assert after["0x76"]["transactions"] - before["0x76"]["transactions"] == 4
@@ -0,0 +1,114 @@
+import math
+import time
+
+import pytest
+
+from umd_client.sensors.imu import IMUService, ShakeWindow
+
+
+class FakeICM:
+    def __init__(self, gyroscopes):
+        self.gyroscopes = iter(gyroscopes)
+        self.half_periods = []
+
+    def getdata(self, halfT=0.024):
+        self.half_periods.append(halfT)
+        return [1.0, 2.0, 3.0, 0, 0, 16384, *next(self.gyroscopes), 10, 20, 30]
+
+
+def test_shake_window_tracks_rms_peak_and_crossings_over_the_window():
+    window = ShakeWindow(window=1.0)
+    window.add(0.0, (3, 4, 0))
+    window.add(0.5, (-6, -8, 0))
+    window.add(1.0, (3, 4, 0))
+
+    # the first sample has left the window
+    assert len(window) == 2
+    assert window.rms() == pytest.approx(math.sqrt((100 + 25) / 2))
+    assert window.peak() == 10
+    assert window.crossing_rate() == pytest.approx(4 / 0.5 / 3)
+
+    window.add(1.6, (0, 0, 1))
+
+    assert window.peak() == 5
+
+
+def test_imu_service_fuses_with_the_elapsed_time_and_publishes_snapshots(clock):
+    icm = FakeICM([(3, 4, 0), (0, 0, 0), (0, 0, 2)])
+    service = IMUService(icm, rate=100, window=10, clock=clock)
+
+    assert service.read() is None
+    service.step()
+    clock.now = 0.03
+    service.step()
+    clock.now = 0.04
+    snapshot = service.step()
+
+    assert icm.half_periods == pytest.approx([0.005, 0.015, 0.005])
+    assert service.read() is snapshot
+    assert snapshot.motion[:3] == (1.0, 2.0, 3.0)
+    assert snapshot.samples == 3
+    assert snapshot.shake_peak == 5
+    assert snapshot.rate == pytest.approx(50)
+
+
+def test_imu_service_spreads_fifo_samples_over_the_drain_interval(clock):
+    icm = FakeICM([])
+    icm.fifo_overflows = 0
+    icm.getfifo = lambda: [[0.0] * 6 + [value, 0, 0] + [0.0] * 3 for value in (4, -4, 4, -4)]
+    service = IMUService(icm, rate=100, window=10, fifo=True, clock=clock)
+
+    clock.now = 1.0
+    service.drain()
+    clock.now = 1.02
+    snapshot = service.drain()
+
+    # the second drain cannot start before the first one ended
+    assert snapshot.timestamp == pytest.approx(1.04)
+    assert snapshot.samples == 8
+    assert snapshot.rate == pytest.approx(100)
+    assert snapshot.crossing_rate == pytest.approx(7 / 0.07 / 3)
+
+
+def test_icm20948_drains_fifo_packets_in_bursts(clock):
+    from umd_client.sensors.i2c import I2CBus
+    from umd_client.sensors.sensor_hat.ICM20948 import FIFO_PACKET_LEN, ICM20948
+    from umd_client.simulator import SimulatedSMBus
+
+    bus = I2CBus(SimulatedSMBus(clock=clock))
+    icm = ICM20948(bus=bus)
+    assert icm.SetSampleRate(100) == pytest.approx(1125 / 11)
+    icm.StartFIFO()
+    bus.devices.clear()
+
+    clock.now += 0.1
+    samples = icm.ReadFIFO()
+
+    assert len(samples) == 10
+    assert all(accel[2] == 16384 for accel, _, _ in samples)
+    # bank select, count, then 210 bytes in 32-byte bursts
+    assert bus.stats()["0x68"]["transactions"] == 2 + -(-10 * FIFO_PACKET_LEN // 32)
+
+    clock.now += 10
+    assert len(icm.ReadFIFO()) == icm.fifo_capacity
+    assert icm.fifo_overflows == 1
+    clock.now += 0.1
+    assert len(icm.getfifo()) == 10
+
+
+def test_sensor_hat_uploads_windowed_shake_from_the_imu_service():
+    from umd_client.sensors.i2c import I2CBus
+    from umd_client.sensors.sensor_hat import SensorHatSensor
+    from umd_client.simulator import SimulatedSMBus
+
+    sensor = SensorHatSensor(bus=I2CBus(SimulatedSMBus()), imu_rate=100)
+    try:
+        time.sleep(0.2)
+        reading = sensor.read()
+    finally:
+        sensor.close()
+
+    assert sensor.sensor.motion.samples > 1
+    assert reading.data["shake"] == round(sensor.sensor.motion.shake_rms, 2)
+    assert reading.data["shake_peak"] >= reading.data["shake"]
+    assert "shake_crossing_rate" in reading.data
@@ -0,0 +1,52 @@
+import gzip
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from umd_client.loadtest import StandInServer, loadtest, percentile, validate_payload
+from umd_client.transport import build_payload, encode_batch
+
+
+def test_loadtest_uploads_every_virtual_station_through_the_stand_in():
+    report = loadtest(stations=20, rounds=2, concurrency=4)
+
+    assert report["requests"] == 40
+    assert report["failures"] == 0
+    assert report["server"]["payloads"] == 40
+    assert report["server"]["rejected"] == 0
+    assert set(report["latency_ms"]) == {"p50", "p90", "p99", "max"}
+
+
+def test_stand_in_accepts_gzip_batches_and_rejects_bad_payloads():
+    payload = build_payload("station", "key", ["time", "temperature"], [1, 20.5], timestamp=1)
+    batch = gzip.compress(encode_batch([json.dumps(payload).encode()] * 3))
+
+    with StandInServer() as server:
+        request = urllib.request.Request(server.url, data=batch, headers={"Content-Encoding": "gzip"}, method="POST")
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.status == 200
+        request = urllib.request.Request(server.url, data=b'{"id": "station"}', method="POST")
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(request, timeout=5)
+        assert excinfo.value.code == 400
+        excinfo.value.close()
+
+    assert server.stats.payloads == 3
+    assert server.stats.rejected == 1
+
+
+def test_validate_payload_reports_shape_problems():
+    assert validate_payload(build_payload("station", "key", ["time"], [1])) == []
+    errors = validate_payload({"id": "station", "timestamp": "now", "key": "k", "data": {"uv": "high"}})
+    assert "timestamp must be int" in errors
+    assert "data.hold1 is missing" in errors
+    assert "data.uv must be a number or null" in errors
+
+
+def test_percentile_uses_nearest_rank():
+    ordered = [float(value) for value in range(1, 101)]
+    assert percentile(ordered, 50) == 50.0
+    assert percentile(ordered, 99) == 99.0
+    assert percentile([], 50) == 0.0
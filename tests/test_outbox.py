@@ -0,0 +1,94 @@
+import json
+import sqlite3
+
+from umd_client.config import ClientConfig
+from umd_client.sensors.types import Reading
+from umd_client.storage.outbox import Outbox
+from umd_client.uplink import OutboxDrainer, Uplink
+
+
+def test_outbox_is_fifo_durable_and_capped(tmp_path):
+    path = tmp_path / "outbox.sqlite3"
+    outbox = Outbox(path, max_entries=2)
+    for body in [b"a", b"b", b"c"]:
+        outbox.put(body)
+    outbox.close()
+
+    reopened = Outbox(path, max_entries=2)
+
+    assert [entry.body for entry in reopened.peek(limit=5)] == [b"b", b"c"]
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    reopened.close()
+
+
+def test_drainer_deletes_only_after_success_and_backs_off(tmp_path, clock):
+    outbox = Outbox(tmp_path / "outbox.sqlite3", max_entries=10)
+    outbox.put(b"first")
+    outbox.put(b"second")
+    results = [False, True, True]
+    sent = []
+
+    def send(bodies):
+        sent.extend(bodies)
+        return results.pop(0)
+
+    drainer = OutboxDrainer(outbox, send, base_delay=10, clock=clock, jitter=lambda: 1.0)
+
+    assert drainer.drain_once() == 0
+    assert drainer.retry_at == 10
+    assert outbox.peek(limit=1)[0].attempts == 1
+    assert drainer.drain_once() == 0
+
+    clock.now = 10
+    assert drainer.drain_once() == 2
+    assert sent == [b"first", b"first", b"second"]
+    assert len(outbox) == 0
+    outbox.close()
+
+
+def test_drainer_backoff_grows_exponentially_with_bounded_jitter(tmp_path):
+    drainer = OutboxDrainer(Outbox(tmp_path / "outbox.sqlite3", max_entries=1), lambda bodies: True, base_delay=5, max_delay=60)
+
+    drainer.jitter = lambda: 0.0
+    assert [drainer.backoff(failures) for failures in [1, 2, 3, 10]] == [2.5, 5.0, 10.0, 30.0]
+    drainer.jitter = lambda: 1.0
+    assert [drainer.backoff(failures) for failures in [1, 2, 3, 10]] == [5.0, 10.0, 20.0, 60.0]
+    assert drainer.backoff(5000) == 60.0
+
+
+def test_uplink_queues_payloads_in_outbox(tmp_path):
+    config = ClientConfig(station_name="station-a", station_key="secret", server="https://example.test/upload")
+    outbox = Outbox(tmp_path / "outbox.sqlite3", max_entries=10)
+    uplink = Uplink(config, outbox=outbox, opener=lambda request, timeout: None, latest_path=tmp_path / "latest.json")
+    reading = Reading(timestamp=123, data={"time": 123, "temperature": 22.5})
+
+    assert uplink.publish(reading) is True
+    queued = json.loads(outbox.peek(limit=1)[0].body)
+    assert queued["data"]["temperature"] == 22.5
+    assert json.loads((tmp_path / "latest.json").read_text(encoding="utf-8")) == queued
+
+    assert uplink.drainer.drain_once() == 1
+    assert len(outbox) == 0
+    uplink.close()
+
+
+def test_drainer_waits_for_a_full_batch_or_its_age_limit(tmp_path, clock):
+    clock.now = 100.0
+    outbox = Outbox(tmp_path / "outbox.sqlite3", max_entries=10, clock=clock)
+    batches = []
+    drainer = OutboxDrainer(outbox, lambda bodies: batches.append(bodies) or True, batch_size=3, batch_max_age=60, wall_clock=clock)
+    outbox.put(b"1")
+    outbox.put(b"2")
+
+    assert drainer.drain_once() == 0
+    assert drainer.batch_due_in == 60
+
+    outbox.put(b"3")
+    outbox.put(b"4")
+    assert drainer.drain_once() == 3
+    assert drainer.batch_due_in == 60
+
+    clock.now = 160.0
+    assert drainer.drain_once() == 1
+    assert batches == [[b"1", b"2", b"3"], [b"4"]]
+    outbox.close()
@@ -0,0 +1,71 @@
+import io
+import json
+import math
+
+from umd_client.sensors.types import Reading
+from umd_client.storage.query import lttb, min_max, query, query_fields, write_csv, write_ndjson
+from umd_client.storage.sqlite import Database
+
+
+def make_history(path, count=1000):
+    database = Database(path, flush_interval=3600)
+    database.insert_many(
+        Reading(timestamp=t * 30, data={"temperature": round(20 + 5 * math.sin(t / 50), 3), "uv": t % 12})
+        for t in range(count)
+    )
+    database.close()
+    return path
+
+
+def test_query_streams_a_range_of_selected_fields(tmp_path):
+    path = make_history(tmp_path / "readings.sqlite3")
+
+    rows = list(query(path, start=300, end=420, fields=["uv"]))
+
+    assert rows == [
+        {"time": 300, "uv": 10.0},
+        {"time": 330, "uv": 11.0},
+        {"time": 360, "uv": 0.0},
+        {"time": 390, "uv": 1.0},
+    ]
+    assert query_fields(path) == ["temperature", "uv"]
+
+
+def test_query_downsamples_each_field(tmp_path):
+    path = make_history(tmp_path / "readings.sqlite3")
+
+    reduced = list(query(path, 0, 30_000, fields=["temperature"], points=50))
+    minmax = list(query(path, 0, 30_000, fields=["temperature", "uv"], points=20, method="minmax"))
+
+    assert len(reduced) == 50
+    assert (reduced[0]["time"], reduced[-1]["time"]) == (0, 999 * 30)
+    assert max(row["temperature"] for row in reduced) > 24.99
+    assert all(row["time"] < next_row["time"] for row, next_row in zip(minmax, minmax[1:], strict=False))
+    assert {row.get("uv") for row in minmax} >= {0.0, 11.0}
+
+
+def test_lttb_keeps_spikes_and_endpoints():
+    points = [(t, 100.0 if t == 37 else 0.0) for t in range(100)]
+
+    assert list(lttb(iter(points), len(points), 100)) == points
+    reduced = list(lttb(iter(points), len(points), 10))
+
+    assert len(reduced) == 10
+    assert (37, 100.0) in reduced
+    assert (reduced[0], reduced[-1]) == (points[0], points[-1])
+
+
+def test_min_max_keeps_the_extremes_of_each_bucket():
+    points = [(t, float(t % 10)) for t in range(100)]
+
+    assert list(min_max(iter(points), 0, 100, 4)) == [(0, 0.0), (9, 9.0), (50, 0.0), (59, 9.0)]
+
+
+def test_writers_emit_ndjson_and_csv():
+    rows = [{"time": 1, "uv": 2.0}, {"time": 2}]
+    ndjson, text = io.StringIO(), io.StringIO()
+
+    assert write_ndjson(rows, ndjson) == 2
+    assert write_csv(rows, ["uv"], text) == 2
+    assert [json.loads(line) for line in ndjson.getvalue().splitlines()] == rows
+    assert text.getvalue() == "time,uv\n1,2.0\n2,\n"
@@ -0,0 +1,73 @@
+import os
+
+from umd_client.storage.quota import QuotaManager, classify
+
+
+def write(path, size, mtime):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_classify_maps_data_path_layout_to_categories():
+    assert classify("photo/20240301-120000.jpg") == "photos"
+    assert classify("2024/3/1.csv.gz") == "archives"
+    assert classify("binlog/20240301-00.bin") == "binlog"
+    assert classify("outbox.sqlite3-wal") == "outbox"
+    assert classify("readings.sqlite3") == "history"
+    assert classify("latest_data.json") == "other"
+
+
+def test_quota_evicts_oldest_first_and_keeps_newest(tmp_path):
+    photos = [write(tmp_path / "photo" / f"{n}.jpg", 100, 1000 + n) for n in range(5)]
+    write(tmp_path / "2024" / "3" / "1.csv", 1000, 0)
+    quota = QuotaManager(tmp_path, {"photos": 250})
+
+    assert quota.enforce() == 3
+
+    assert [path.exists() for path in photos] == [False, False, False, True, True]
+    usage = quota.usage()
+    assert usage["photos"] == {"bytes": 200, "files": 2, "budget": 250, "evicted_files": 3, "evicted_bytes": 300}
+    assert usage["archives"]["bytes"] == 1000
+
+
+def test_quota_record_updates_index_without_rescan(tmp_path):
+    quota = QuotaManager(tmp_path, {"photos": 150})
+    old = write(tmp_path / "photo" / "old.jpg", 100, 1000)
+    new = write(tmp_path / "photo" / "new.jpg", 100, 2000)
+    assert quota.usage()["photos"]["bytes"] == 0
+
+    quota.record(old)
+    quota.record(new)
+    assert quota.usage()["photos"]["bytes"] == 200
+    quota.enforce()
+
+    assert not old.exists()
+    assert new.exists()
+    assert quota.usage()["photos"]["bytes"] == 100
+
+
+def test_quota_restats_growing_newest_file(tmp_path):
+    write(tmp_path / "binlog" / "20240301-00.bin", 100, 1000)
+    current = write(tmp_path / "binlog" / "20240302-00.bin", 100, 2000)
+    quota = QuotaManager(tmp_path, {"binlog": 250})
+
+    write(current, 200, 3000)
+    quota.enforce()
+
+    assert quota.usage()["binlog"]["files"] == 1
+    assert quota.usage()["binlog"]["bytes"] == 200
+
+
+def test_quota_record_counts_a_rewritten_path_once(tmp_path):
+    quota = QuotaManager(tmp_path, {"photos": 1024})
+    photo = write(tmp_path / "photo" / "20240301-120000.jpg", 100, 1000)
+
+    quota.record(photo)
+    quota.record(photo)
+    write(photo, 40, 2000)
+    quota.record(photo)
+
+    assert quota.usage()["photos"]["files"] == 1
+    assert quota.usage()["photos"]["bytes"] == 40
@@ -0,0 +1,74 @@
+import io
+
+import pytest
+
+from umd_client.storage.ringfile import RingFile
+
+
+def test_ring_file_overwrites_the_oldest_row_and_survives_reopen(tmp_path):
+    path = tmp_path / "latest_mean.ring"
+    ring = RingFile(path, ["time", "temperature"], capacity=3)
+    size = path.stat().st_size
+    for timestamp in range(5):
+        ring.append([timestamp, timestamp / 2])
+    ring.close()
+
+    ring = RingFile(path, ["time", "temperature"], capacity=3)
+
+    assert path.stat().st_size == size
+    assert ring.rows() == [[2.0, 1.0], [3.0, 1.5], [4.0, 2.0]]
+    out = io.StringIO()
+    assert ring.write_csv(out) == 3
+    assert out.getvalue() == "time,temperature\n2,1.0\n3,1.5\n4,2.0\n"
+    ring.close()
+
+
+def test_ring_file_keeps_newest_rows_when_capacity_changes(tmp_path):
+    path = tmp_path / "latest_mean.ring"
+    ring = RingFile(path, ["time"], capacity=4)
+    for timestamp in range(6):
+        ring.append([timestamp])
+    ring.close()
+
+    smaller = RingFile(path, ["time"], capacity=2)
+    assert smaller.rows() == [[4.0], [5.0]]
+    smaller.close()
+
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_ring_file_moves_a_file_with_other_fields_aside(tmp_path):
+    path = tmp_path / "latest_mean.ring"
+    ring = RingFile(path, ["time"], capacity=2)
+    ring.append([1])
+    ring.close()
+
+    ring = RingFile(path, ["time", "uv"], capacity=2)
+    assert ring.rows() == []
+    ring.close()
+
+    (aside,) = [p for p in tmp_path.iterdir() if p != path]
+    assert aside.name.startswith("latest_mean.ring.")
+    old = RingFile.open_readonly(aside)
+    assert old.fields == ["time"]
+    assert old.rows() == [[1.0]]
+    old.close()
+
+
+def test_ring_file_opens_read_only_with_the_layout_from_its_header(tmp_path):
+    path = tmp_path / "latest_mean.ring"
+    ring = RingFile(path, ["time", "uv"], capacity=2)
+    for timestamp in range(3):
+        ring.append([timestamp, timestamp * 2])
+
+    reader = RingFile.open_readonly(path)
+    assert (reader.fields, reader.capacity) == (["time", "uv"], 2)
+    assert reader.rows() == [[1.0, 2.0], [2.0, 4.0]]
+    with pytest.raises(ValueError):
+        reader.append([3, 6])
+    reader.close()
+    ring.close()
+
+    (tmp_path / "other.ring").write_bytes(b"not a ring")
+    with pytest.raises(ValueError):
+        RingFile.open_readonly(tmp_path / "other.ring")
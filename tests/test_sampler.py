@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from umd_client.sampler import Sampler, aggregate_readings
+from umd_client.sensors.types import Reading
+
+
+class CountingSensor:
+    def __init__(self, temperatures):
+        self.temperatures = list(temperatures)
+        self.reads = 0
+
+    def read(self):
+        temperature = self.temperatures[self.reads]
+        self.reads += 1
+        return Reading(timestamp=100 + self.reads, data={"time": 100 + self.reads, "temperature": temperature, "uv": 4})
+
+
+def test_aggregate_readings_reports_mean_min_max_last():
+    readings = [
+        Reading(timestamp=1, data={"time": 1, "temperature": 20.0, "uv": 1}),
+        Reading(timestamp=2, data={"time": 2, "temperature": 23.0, "uv": 3}),
+        Reading(timestamp=3, data={"time": 3, "temperature": 21.0, "uv": 2}),
+    ]
+
+    reading = aggregate_readings(readings)
+
+    assert reading.timestamp == 3
+    assert reading.data == {
+        "time": 3,
+        "temperature": 21.33,
+        "uv": 2,
+        "temperature_min": 20.0,
+        "temperature_max": 23.0,
+        "temperature_last": 21.0,
+        "uv_min": 1,
+        "uv_max": 3,
+        "uv_last": 2,
+        "samples": 3,
+    }
+
+
+def test_aggregate_readings_rejects_empty_window():
+    with pytest.raises(ValueError):
+        aggregate_readings([])
+
+
+def test_sampler_read_drains_the_window():
+    sensor = CountingSensor([20.0, 22.0, 30.0])
+    sampler = Sampler(sensor)
+    sampler.sample()
+    sampler.sample()
+
+    first = sampler.read()
+    second = sampler.read()
+
+    assert first.data["temperature"] == 21.0
+    assert first.data["samples"] == 2
+    assert len(sampler) == 0
+    assert second.data["temperature"] == 30.0
+    assert second.data["samples"] == 1
+    assert sensor.reads == 3
+
+
+def test_sampler_read_waits_for_an_in_flight_sample_instead_of_reading_concurrently():
+    entered = threading.Event()
+    release = threading.Event()
+
+    class SlowSensor(CountingSensor):
+        active = 0
+        overlapped = False
+
+        def read(self):
+            self.active += 1
+            self.overlapped |= self.active > 1
+            entered.set()
+            release.wait(5)
+            reading = super().read()
+            self.active -= 1
+            return reading
+
+    sensor = SlowSensor([20.0, 30.0])
+    sampler = Sampler(sensor)
+    sampling = threading.Thread(target=sampler.sample)
+    sampling.start()
+    entered.wait(5)
+    results = []
+    reading = threading.Thread(target=lambda: results.append(sampler.read()))
+    reading.start()
+    reading.join(0.1)
+    release.set()
+    sampling.join(5)
+    reading.join(5)
+
+    assert not sensor.overlapped
+    assert sensor.reads == 1
+    assert results[0].data["temperature"] == 20.0
@@ -1,4 +1,6 @@
-from umd_client.scheduler import ScheduledTask, due_tasks
+import pytest
+
+from umd_client.scheduler import ScheduledTask, Scheduler, due_tasks
 
 
 def test_due_tasks_runs_never_run_tasks_and_respects_frequency():
@@ -10,3 +12,45 @@ def test_due_tasks_runs_never_run_tasks_and_respects_frequency():
 
     assert [task.name for task in due_tasks(tasks, now=350)] == ["upload"]
     assert [task.name for task in due_tasks(tasks, now=401)] == ["upload", "display"]
+
+
+def test_scheduler_sleeps_until_next_deadline_without_drift(clock):
+    scheduler = Scheduler(
+        [ScheduledTask("upload", frequency=30), ScheduledTask("display", frequency=300)],
+        clock=clock,
+        sleep=clock.sleep,
+        wall_clock=lambda: 1000.0,
+    )
+
+    assert [task.name for task in scheduler.wait()] == ["upload", "display"]
+    clock.now += 7  # the tasks overran
+    assert [task.name for task in scheduler.wait()] == ["upload"]
+    assert clock.now == 30
+    assert scheduler.next_deadline() == 60
+
+
+def test_scheduler_honours_last_run_when_building_deadlines(clock):
+    clock.now = 5.0
+    scheduler = Scheduler([ScheduledTask("upload", frequency=30, last_run=990)], clock=clock, wall_clock=lambda: 1000.0)
+
+    assert scheduler.next_deadline() == 25.0
+
+
+def test_scheduler_catch_up_policies(clock):
+    tasks = [
+        ScheduledTask("skip", frequency=10, catch_up="skip"),
+        ScheduledTask("coalesce", frequency=10, catch_up="coalesce"),
+        ScheduledTask("run_all", frequency=10, catch_up="run_all"),
+    ]
+    scheduler = Scheduler(tasks, clock=clock, wall_clock=lambda: 0.0)
+    scheduler.pop_due()
+
+    names = [task.name for task in scheduler.pop_due(now=35)]
+
+    assert names == ["coalesce", "run_all", "run_all", "run_all"]
+    assert scheduler.next_deadline() == 40
+
+
+def test_scheduled_task_rejects_unknown_catch_up_policy():
+    with pytest.raises(ValueError, match="catch_up"):
+        ScheduledTask("upload", frequency=30, catch_up="later")
@@ -38,3 +38,41 @@ def test_build_reading_maps_sensor_hat_core_fields():
     assert reading.value_names == ["time", "temperature", "humidity", "pressure", "lux", "uv", "shake"]
     assert reading.values == [123456, 22.5, 60.0, 1013.25, 1200.5, 4, 5.0]
     assert reading.display_values == [22.5, 60.0, 1013.25, 1200.5, 4]
+
+
+def test_sensor_hat_read_overlaps_gas_conversion_with_other_chips():
+    from umd_client.sensors.sensor_hat import Sensor_HAT
+
+    calls = []
+
+    class Chip:
+        def __init__(self, name, result):
+            self.name = name
+            self.result = result
+
+        def __getattr__(self, method):
+            def call(*args):
+                calls.append(f"{self.name}.{method}")
+                return self.result
+
+            return call
+
+    hat = Sensor_HAT.__new__(Sensor_HAT)
+    hat.bme = Chip("bme", [1013.25, 22.5, 60.0])
+    hat.icm = Chip("icm", [1.0, 2.0, 3.0, 0, 0, 0, 3, 4, 0, 10, 20, 30])
+    hat.light = Chip("light", 1200.5)
+    hat.uv = Chip("uv", 4)
+    hat.sgp = Chip("sgp", 123)
+
+    data = hat.read()
+
+    assert calls == [
+        "bme.readData",
+        "sgp.startMeasureRaw",
+        "icm.getdata",
+        "light.Lux",
+        "uv.UVS",
+        "sgp.readMeasureRaw",
+    ]
+    assert data[:6] == [22.5, 60.0, 1013.25, 1200.5, 4, 123]
+    assert hat.latency >= 0
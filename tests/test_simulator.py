@@ -0,0 +1,120 @@
+import time
+from importlib import resources
+
+import pytest
+
+from umd_client.app import build_panel, build_sensor, build_tasks, build_uplink, run_due_tasks
+from umd_client.config import load_config
+from umd_client.loadtest import StandInServer
+from umd_client.sensors.i2c import I2CBus
+from umd_client.sensors.sensor_hat import SensorHatSensor
+from umd_client.simulator import HARDWARE_ENV, Environment, SimulatedPanel, SimulatedSMBus, sensirion_crc
+
+
+def test_sensor_hat_reads_the_simulated_environment():
+    bus = I2CBus(SimulatedSMBus())
+    sensor = SensorHatSensor(bus=bus)
+
+    reading = sensor.read()
+
+    assert 18 < reading.data["temperature"] < 26
+    assert 44 < reading.data["humidity"] < 66
+    assert 1010 < reading.data["pressure"] < 1016
+    assert reading.data["lux"] > 0
+    assert set(bus.stats()) == {"0x29", "0x53", "0x59", "0x68", "0x76"}
+
+
+def test_simulated_bus_nacks_missing_devices_and_early_sgp40_reads(clock):
+    bus = SimulatedSMBus(clock=clock)
+
+    with pytest.raises(OSError):
+        bus.read_byte_data(0x40, 0x00)
+
+    bus.write_i2c_block_data(0x59, 0x26, [0x0F, 0x80, 0x00, 0xA2, 0x66, 0x66, 0x93])
+    with pytest.raises(OSError):
+        bus.read_i2c_block_data(0x59, 0x00, 3)
+    clock.now = 0.03
+    msb, lsb, crc = bus.read_i2c_block_data(0x59, 0x00, 3)
+
+    assert 29000 <= (msb << 8 | lsb) <= 31000
+    assert crc == sensirion_crc(msb, lsb)
+
+
+def test_light_sensors_latch_once_per_integration_period(clock):
+    environment = Environment()
+    bus = SimulatedSMBus(environment=environment, clock=clock)
+    bus.write_byte_data(0x53, 0x04, 0x06)  # 2 s measurement rate
+    bus.write_byte_data(0x53, 0x00, 0x0A)  # enable, UVS mode
+
+    clock.now = 1.9
+    assert bus.read_i2c_block_data(0x53, 0x10, 3) == [0, 0, 0]
+    clock.now = 2.1
+    first = bus.read_i2c_block_data(0x53, 0x10, 3)
+    clock.now = 3.9
+    assert bus.read_i2c_block_data(0x53, 0x10, 3) == first
+    assert int.from_bytes(bytes(first), "little") == round(environment.uv_index(2.0) * 2300 * 3 / 18)
+
+
+def test_simulated_panel_collects_frames_and_holds_busy_while_refreshing(clock):
+    panel = SimulatedPanel(refresh_time=15.0, max_frames=2, clock=clock)
+    assert panel.module_init() == 0
+
+    for black in range(3):
+        for command, data in ((0x24, [black, 0x00]), (0x26, [0x0F]), (0x20, [])):
+            panel.digital_write(panel.DC_PIN, 0)
+            panel.spi_writebyte([command])
+            if data:
+                panel.digital_write(panel.DC_PIN, 1)
+                panel.spi_writebyte2(data)
+        assert panel.digital_read(panel.BUSY_PIN) == 1
+
+    assert list(panel.frames) == [(b"\x01\x00", b"\x0f"), (b"\x02\x00", b"\x0f")]
+    assert panel.refreshes == 3
+    clock.now = 15.0
+    assert panel.digital_read(panel.BUSY_PIN) == 0
+
+
+def test_run_pipeline_samples_uploads_and_displays_on_simulated_hardware(tmp_path, monkeypatch):
+    import umd_client.display.epd2in13b_v4 as display
+
+    fonts = resources.files("umd_client.assets.font")
+    if not fonts.joinpath("Minecraft.ttf").is_file():
+        # The text font is not shipped in every checkout; lay the screen out with the icon font instead.
+        monkeypatch.setattr(display, "_font_path", lambda name: str(fonts.joinpath("FluentSystemIcons-Resizable.ttf")))
+    monkeypatch.setenv(HARDWARE_ENV, "simulated")
+    with StandInServer() as server:
+        config_path = tmp_path / ".env.toml"
+        config_path.write_text(
+            "\n".join(
+                [
+                    "station_name = 'station-a'",
+                    "station_key = 'secret'",
+                    f"server = '{server.url}'",
+                    f"data_path = '{tmp_path / 'data'}'",
+                    "sample_frequency = 1",
+                    "history_enabled = false",
+                    "archive_compression = 'off'",
+                    "display_enabled = true",
+                ]
+            ),
+            encoding="utf-8",
+        )
+        config = load_config(config_path)
+        sensor = build_sensor(config)
+        uplink = build_uplink(config, latest_path=tmp_path / "latest_data.json")
+        panel = build_panel(config)
+        try:
+            reading = run_due_tasks(
+                config, sensor, build_tasks(config), now=int(time.time()), uplink=uplink, panel=panel
+            )
+        finally:
+            uplink.close()
+            sensor.close()
+
+    assert config.hardware == "simulated"
+    assert reading.data["samples"] == 1
+    assert 1010 < reading.data["pressure"] < 1016
+    assert server.stats.payloads == 1
+    assert server.stats.rejected == 0
+    assert (tmp_path / "latest_data.json").exists()
+    assert len(panel.frames) == 1
@@ -0,0 +1,88 @@
+import io
+import sys
+import time
+import types
+
+from umd_client.cli import main
+from umd_client.sensors.sn3003 import SN3003FSXCSN01, SN3003Sensor, export_latest_mean_csv
+from umd_client.storage.archive import archive_path
+
+
+class FakePort:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+def fake_serial():
+    return types.SimpleNamespace(Serial=FakePort, PARITY_NONE="N", EIGHTBITS=8, STOPBITS_ONE=1)
+
+
+def test_save_archives_raw_rows_and_keeps_a_readable_latest_mean(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "serial", fake_serial())
+    sensor = SN3003FSXCSN01()
+    width = len(sensor.names) - 2
+    start = int(time.time()) - 10
+    for offset in range(3):
+        sensor.mem_data.append([start + offset, *[float(offset)] * width, 10.0 + offset])
+    sensor.save(tmp_path, storage_size=4)
+    sensor.mem_data.append([start + 3, *[3.0] * width, 13.0])
+    sensor.save(tmp_path, storage_size=4)
+
+    out = io.StringIO()
+    assert export_latest_mean_csv(tmp_path, out) == 2
+    header, first, second = out.getvalue().splitlines()
+    assert header == ",".join(sensor.names)
+    assert first.split(",")[1:] == [*["1.0"] * width, "2.0"]
+    assert second.split(",")[1:] == [*["1.5"] * width, "3.0"]
+    sensor.close()
+
+    archive = archive_path(tmp_path, start).read_text().splitlines()
+    assert archive[0] == ",".join(sensor.names)
+    assert len(archive) == 5
+
+    config = tmp_path / "config.toml"
+    config.write_text(
+        f"station_name = 'station-a'\nstation_key = 'secret'\nserver = 'https://example.test/upload'\n"
+        f"data_path = '{tmp_path}'\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    assert main(["latest-mean", "--config", str(config)]) == 0
+    assert sys.stdout.getvalue() == out.getvalue()
+
+
+def test_save_takes_the_archive_policy_from_the_sensor_configuration(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "serial", fake_serial())
+    config = tmp_path / "sn3003.toml"
+    config.write_text(
+        "[SN3003FSXCSN01]\nnames = ['temperature', 'rain']\n[archive]\nflush_rows = 1\nfsync = 'flush'\n",
+        encoding="utf-8",
+    )
+    sensor = SN3003FSXCSN01(config_path=config)
+    now = int(time.time())
+    sensor.mem_data.extend([[now - 1, 20.0, 1.0], [now, 21.0, 1.5]])
+
+    sensor.save(tmp_path / "data", storage_size=4)
+
+    assert (sensor.archive.flush_rows, sensor.archive.fsync) == (1, "flush")
+    assert len(archive_path(tmp_path / "data", now).read_text().splitlines()) == 3
+    sensor.close()
+
+
+def test_closing_the_sensor_flushes_buffered_archive_rows(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "serial", fake_serial())
+    sensor = SN3003Sensor()
+    device = sensor.sensor
+    width = len(device.names) - 2
+    now = int(time.time())
+    device.mem_data.extend([[now - 1, *[1.0] * width, 1.0], [now, *[2.0] * width, 2.0]])
+    device.save(tmp_path, storage_size=4)
+    path = archive_path(tmp_path, now)
+    assert len(path.read_text().splitlines()) <= 1
+
+    sensor.close()
+
+    assert len(path.read_text().splitlines()) == 3
@@ -0,0 +1,169 @@
+import sqlite3
+import time
+
+from umd_client.app import collect_and_upload
+from umd_client.config import ClientConfig
+from umd_client.sensors.types import Reading
+from umd_client.storage.sqlite import Database, _cover
+
+
+def test_database_groups_commits_until_flush_interval(tmp_path, clock):
+    path = tmp_path / "readings.sqlite3"
+    database = Database(path, flush_interval=60, clock=clock)
+
+    database.insert(Reading(timestamp=1, data={"time": 1, "temperature": 20.5}))
+    database.insert(Reading(timestamp=2, data={"time": 2, "temperature": 21.0}))
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM readings").fetchone()[0] == 0
+
+    clock.now = 60
+    database.insert(Reading(timestamp=3, data={"time": 3, "temperature": 21.5}))
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM readings").fetchone()[0] == 3
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    database.close()
+
+
+def test_database_schema_is_idempotent_and_grows_with_new_fields(tmp_path):
+    path = tmp_path / "readings.sqlite3"
+    database = Database(path)
+    database.insert(Reading(timestamp=1, data={"time": 1, "temperature": 20.5, "uv": 3}))
+    database.close()
+
+    database = Database(path)
+    database.insert(Reading(timestamp=2, data={"time": 2, "temperature": 21.0, "Air Temp (C)'); DROP": 1.5}))
+
+    assert [reading.data for reading in database.readings()] == [
+        {"time": 1, "temperature": 20.5, "uv": 3},
+        {"time": 2, "temperature": 21.0, "air_temp__c_____drop": 1.5},
+    ]
+    assert [reading.timestamp for reading in database.readings(start=2)] == [2]
+    database.close()
+
+
+def test_collect_and_upload_persists_every_reading(tmp_path):
+    class Sensor:
+        def read(self):
+            return Reading(timestamp=5, data={"time": 5, "temperature": 20.0})
+
+    class Uplink:
+        def publish(self, reading):
+            return False
+
+    config = ClientConfig(station_name="station", station_key="key", server="http://127.0.0.1:9/upload")
+    database = Database(tmp_path / "readings.sqlite3")
+
+    collect_and_upload(config, Sensor(), uplink=Uplink(), history=database)
+
+    assert [reading.timestamp for reading in database.readings()] == [5]
+    database.close()
+
+
+def test_rollups_are_updated_incrementally_on_flush(tmp_path):
+    database = Database(tmp_path / "readings.sqlite3")
+    for timestamp, temperature in [(0, 20.0), (30, 22.0), (59, 21.0), (60, 25.0)]:
+        database.insert(Reading(timestamp=timestamp, data={"temperature": temperature}))
+
+    minutes = database.rollups("temperature", 60, 0, 120)
+    hour = database.rollups("temperature", 3600, 0, 3600)
+
+    assert [(m.start, m.count, m.min, m.max, m.last) for m in minutes] == [
+        (0, 3, 20.0, 22.0, 21.0),
+        (60, 1, 25.0, 25.0, 25.0),
+    ]
+    assert (hour[0].count, hour[0].mean, hour[0].max, hour[0].last) == (4, 22.0, 25.0, 25.0)
+    database.close()
+
+
+def test_replayed_readings_are_stored_and_rolled_up_once(tmp_path):
+    database = Database(tmp_path / "readings.sqlite3", flush_interval=3600)
+    database.insert_many(Reading(timestamp=t, data={"uv": 1.0}) for t in (0, 30, 30))
+    database.flush()
+    database.insert_many(Reading(timestamp=t, data={"uv": 5.0}) for t in (30, 60))
+    database.flush()
+
+    assert [(r.timestamp, r.data["uv"]) for r in database.readings()] == [(0, 1.0), (30, 1.0), (60, 5.0)]
+    minutes = database.rollups("uv", 60, 0, 120)
+    assert [(m.count, m.sum, m.max) for m in minutes] == [(2, 2.0, 1.0), (1, 5.0, 5.0)]
+    assert database.aggregate("uv", 0, 3600).count == 3
+    database.close()
+
+
+def test_aggregate_uses_coarse_buckets_and_raw_edges(tmp_path):
+    database = Database(tmp_path / "readings.sqlite3", flush_interval=3600)
+    database.insert_many(Reading(timestamp=t, data={"pressure": float(t % 7)}) for t in range(0, 2 * 86400, 30))
+    database.flush()
+
+    for start, end in [(0, 2 * 86400), (45, 86400 + 3 * 3600 + 95), (3599, 3601), (10, 20)]:
+        values = [float(t % 7) for t in range(0, 2 * 86400, 30) if start <= t < end]
+        aggregate = database.aggregate("pressure", start, end)
+        if not values:
+            assert aggregate is None
+            continue
+        assert aggregate.count == len(values)
+        assert aggregate.sum == sum(values)
+        assert (aggregate.min, aggregate.max) == (min(values), max(values))
+        assert aggregate.last == values[-1]
+    database.close()
+
+
+def test_cover_prefers_the_coarsest_buckets():
+    day, hour, minute = 86400, 3600, 60
+
+    assert _cover(30, 2 * day + hour + 90, (day, hour, minute)) == [
+        (None, 30, 60),
+        (minute, 60, hour),
+        (hour, hour, day),
+        (day, day, 2 * day),
+        (hour, 2 * day, 2 * day + hour),
+        (minute, 2 * day + hour, 2 * day + hour + 60),
+        (None, 2 * day + hour + 60, 2 * day + hour + 90),
+    ]
+
+
+def test_raw_rows_are_a_ring_buffer_by_count_and_age(tmp_path):
+    path = tmp_path / "readings.sqlite3"
+    database = Database(path, max_rows=5, prune_batch=2)
+    database.insert_many(Reading(timestamp=t, data={"uv": t}) for t in range(10))
+    assert len(database) == 10
+    assert database.prune_expired() == 5
+    assert [reading.timestamp for reading in database.readings()] == [5, 6, 7, 8, 9]
+    database.close()
+
+    database = Database(path, max_age=100)
+    database.insert(Reading(timestamp=105, data={"uv": 1}))
+    database.prune_expired()
+    assert [reading.timestamp for reading in database.readings()] == [5, 6, 7, 8, 9, 105]
+    database.insert(Reading(timestamp=107, data={"uv": 1}))
+    database.prune_expired()
+    assert [reading.timestamp for reading in database.readings()] == [7, 8, 9, 105, 107]
+    assert sqlite3.connect(path).execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    database.close()
+
+
+def test_prune_deletes_in_bounded_batches_and_keeps_rollups_longer(tmp_path):
+    database = Database(tmp_path / "readings.sqlite3", rollup_retention={60: 600, 3600: None, 86400: None})
+    database.insert_many(Reading(timestamp=t * 60, data={"uv": 1}) for t in range(30))
+    database.prune_expired()
+
+    database.max_rows = 10
+    assert database.prune(limit=4) == 4
+    assert len(database) == 26
+    database.prune(limit=100)
+
+    assert len(database) == 10
+    assert len(database.rollups("uv", 60, 0, 10**9)) == 11
+    assert database.aggregate("uv", 0, 10**9).count == 30
+    database.close()
+
+
+def test_background_pruner_trims_the_ring_after_flushes(tmp_path):
+    database = Database(tmp_path / "readings.sqlite3", max_rows=5, prune_batch=2, prune_interval=3600)
+    database.start()
+    database.insert_many(Reading(timestamp=t, data={"uv": t}) for t in range(10))
+
+    deadline = time.monotonic() + 5
+    while len(database) > 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert [reading.timestamp for reading in database.readings()] == [5, 6, 7, 8, 9]
+    database.close()
+    assert database._thread is None
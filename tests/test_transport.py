@@ -1,7 +1,20 @@
+import gzip
+import http.server
 import json
+import socket
+import threading
 import urllib.error
 
-from umd_client.transport import build_payload, send_payload
+from umd_client.transport import (
+    CircuitBreaker,
+    KeepAliveClient,
+    PayloadEncoder,
+    build_payload,
+    encode_payload,
+    post_batch,
+    post_body,
+    send_payload,
+)
 
 
 def test_build_payload_preserves_current_wire_shape():
@@ -71,3 +84,123 @@ def test_send_payload_still_writes_latest_file_when_request_fails(tmp_path):
 
     assert sent is False
     assert json.loads(latest_path.read_text(encoding="utf-8")) == payload
+
+
+def test_post_body_requires_a_2xx_status():
+    class FakeResponse:
+        def __init__(self, status):
+            self.status = status
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    responses = [FakeResponse(204), FakeResponse(302)]
+
+    assert post_body("https://example.test/upload", b"{}", opener=lambda request, timeout: responses[0]) is True
+    assert post_body("https://example.test/upload", b"{}", opener=lambda request, timeout: responses[1]) is False
+    assert all(response.closed for response in responses)
+
+
+def test_post_batch_sends_gzipped_compact_json_array():
+    captured = {}
+
+    def fake_urlopen(request, timeout):
+        captured["headers"] = dict(request.header_items())
+        captured["data"] = request.data
+
+    bodies = [b'{"id":"station-a","timestamp":1}', b'{"id":"station-a","timestamp":2}']
+
+    assert post_batch("https://example.test/upload", bodies, opener=fake_urlopen) is True
+    assert captured["headers"]["Content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(captured["data"])) == [
+        {"id": "station-a", "timestamp": 1},
+        {"id": "station-a", "timestamp": 2},
+    ]
+
+
+class RecordingHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    bodies = []
+
+    def do_POST(self):
+        self.bodies.append(self.rfile.read(int(self.headers["Content-Length"])))
+        status = 500 if self.path == "/fail" else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_keep_alive_client_reuses_one_connection_and_reconnects(monkeypatch):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    client = KeepAliveClient()
+    try:
+        for _ in range(3):
+            assert post_body(f"{url}/upload", b'{"id":"station-a"}', opener=client) is True
+        assert post_body(f"{url}/fail", b"{}", opener=client) is False
+
+        client._connections[("http", "127.0.0.1", server.server_port)].sock.shutdown(socket.SHUT_RDWR)
+        assert post_body(f"{url}/upload", b"{}", opener=client) is True
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+    assert client.stats.as_dict() == {
+        "requests": 5,
+        "connections": 2,
+        "reused": 4,
+        "reconnects": 1,
+        "dns_lookups": 1,
+        "tls_resumed": 0,
+    }
+
+
+def test_payload_encoder_matches_compact_build_payload():
+    names = ["time", "temperature", "humidity", "uv", "note"]
+    values = [111, 22.5, float("nan"), 4, "50% \"sunny\""]
+    encoder = PayloadEncoder("station-%s", "secret", names)
+
+    encoded = encoder.encode(values, timestamp=123)
+
+    assert encoded == encode_payload(build_payload("station-%s", "secret", names, values, timestamp=123), indent=None)
+    assert encoder.encode(values[:2], timestamp=123) == encode_payload(
+        build_payload("station-%s", "secret", names, values[:2], timestamp=123), indent=None
+    )
+
+
+def test_circuit_breaker_opens_probes_and_backs_off():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, max_reset_timeout=15, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert breaker.allow() is True
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.allow() is False
+
+    now[0] = 10.0
+    assert breaker.allow() is True
+    assert breaker.state == "half_open"
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.status() == {
+        "state": "open",
+        "consecutive_failures": 3,
+        "retry_in": 15.0,
+        "short_circuited": 2,
+        "transitions": 3,
+    }
+
+    now[0] = 25.0
+    assert breaker.allow() is True
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
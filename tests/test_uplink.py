@@ -0,0 +1,62 @@
+import json
+import urllib.error
+
+import pytest
+
+from umd_client.config import ClientConfig
+from umd_client.sensors.types import Reading
+from umd_client.transport import CircuitBreaker
+from umd_client.uplink import Uplink
+
+
+def reading(timestamp):
+    return Reading(timestamp=timestamp, data={"time": timestamp, "temperature": 22.5})
+
+
+def test_uplink_short_circuits_and_queues_while_server_is_down(tmp_path):
+    config = ClientConfig(station_name="station-a", station_key="secret", server="https://example.test/upload")
+    calls = []
+    online = [False]
+
+    def opener(request, timeout):
+        calls.append(json.loads(request.data)["data"]["time"])
+        if not online[0]:
+            raise urllib.error.URLError("offline")
+
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+    uplink = Uplink(config, opener=opener, latest_path=tmp_path / "latest.json", breaker=breaker)
+
+    assert uplink.publish(reading(1)) is False
+    assert uplink.publish(reading(2)) is False
+    assert uplink.publish(reading(3)) is False
+    assert calls == [1, 1]
+    assert uplink.status()["breaker"]["state"] == "open"
+    assert uplink.status()["queued"] == 3
+
+    online[0] = True
+    now[0] = 30.0
+    assert uplink.publish(reading(4)) is True
+    assert calls == [1, 1, 1, 2, 3, 4]
+    assert uplink.status()["queued"] == 0
+    assert uplink.status()["breaker"]["state"] == "closed"
+
+
+def test_uplink_settles_a_half_open_probe_that_raises(tmp_path):
+    config = ClientConfig(station_name="station-a", station_key="secret", server="https://example.test/upload")
+
+    def opener(request, timeout):
+        raise ValueError("malformed response")
+
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 30.0
+    uplink = Uplink(config, opener=opener, latest_path=tmp_path / "latest.json", breaker=breaker)
+
+    with pytest.raises(ValueError):
+        uplink.send_bodies([b"{}"])
+
+    assert breaker.state == "open"
+    now[0] = 90.0
+    assert breaker.allow() is True